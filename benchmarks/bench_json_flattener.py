@@ -0,0 +1,77 @@
+"""
+Benchmark of json_flattener against the flattener it replaced, on SOAP style
+vendor order payloads nested deeper and deeper.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_json_flattener [--repeat 5]
+"""
+from op_extractor.common.helpers import json_flattener
+from tests.fixtures.legacy_json_flattener import json_flattener as legacy_json_flattener
+from typing import Any, Callable, Dict
+import argparse
+import timeit
+
+
+# (orders, lines per order, extra nesting levels) of the payloads
+PAYLOADS = (
+    (1, 20, 2),
+    (10, 50, 4),
+    (50, 100, 8),
+    (100, 200, 12),
+)
+
+
+def nest(value: Any, depth: int) -> Any:
+    for level in range(depth):
+        value = {'Wrap%d' % level: value}
+    return value
+
+
+def vendor_payload(orders: int, lines: int, depth: int) -> Dict:
+    """Order status response of orders with lines, ship to address and packages nested depth levels deeper"""
+    return {'Envelope': {'Body': {'OrderStatusResponse': {'Orders': [
+        {
+            'Header': {
+                'PONumber': 'PO-%d' % order,
+                'Status': 'Shipped',
+                'ShipTo': nest({'Line1': '100 Main St', 'City': 'Austin', 'Zip': '78701'}, depth)
+            },
+            'Lines': [
+                {
+                    'Sku': 'SKU-%d' % line,
+                    'Qty': line,
+                    'Serials': ['SN-%d-%d' % (line, serial) for serial in range(4)],
+                    'Package': nest({'Carrier': 'UPS', 'Tracking': ['1Z%08d' % line]}, depth)
+                }
+                for line in range(lines)
+            ]
+        }
+        for order in range(orders)
+    ]}}}}
+
+
+def best_of(function: Callable, payload: Dict, repeat: int) -> float:
+    return min(timeit.repeat(lambda: function(payload), number=1, repeat=repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5, help='runs per payload, best one is reported')
+    args = parser.parse_args()
+
+    print('%7s %6s %6s %8s %10s %10s %8s' % ('orders', 'lines', 'depth', 'keys', 'legacy s', 'current s', 'speedup'))
+    for orders, lines, depth in PAYLOADS:
+        payload = vendor_payload(orders, lines, depth)
+        flat = json_flattener(payload)
+        if list(flat.items()) != list(legacy_json_flattener(payload).items()):
+            raise AssertionError('flatteners differ on payload %s' % ((orders, lines, depth),))
+
+        legacy = best_of(legacy_json_flattener, payload, args.repeat)
+        current = best_of(json_flattener, payload, args.repeat)
+        print('%7d %6d %6d %8d %10.4f %10.4f %7.1fx' % (
+            orders, lines, depth, len(flat), legacy, current, legacy / current))
+
+
+if __name__ == '__main__':
+    main()
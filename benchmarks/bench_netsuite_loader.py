@@ -0,0 +1,118 @@
+"""
+Benchmark of NetSuite purchase order ingestion, transform_rows and
+load_batch, showing time per row stays flat as the sync grows.
+
+The database is replaced by an in process fake at `BulkLoader.merge`: rows
+are still validated by the table schemas and encoded for COPY, only the
+statements are not run. Time is the Python side of the sync.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_netsuite_loader [--rows 10000 50000 200000]
+"""
+from op_netsuite_fetcher.common.orm_handler.bulk_loader import BulkLoader
+from op_netsuite_fetcher.order_processing.fetcher.netsuite_fetcher import NetsuiteFetcher
+from typing import Any, Dict, Iterator, List
+import argparse
+import logging
+import time
+
+
+ORDER_MAPPER = {
+    'soint_id': 'createdfrom',
+    'sales_order_status': 'salesorderstatus',
+    'point_id': 'internalid',
+    'tran_date': 'trandate',
+    'vendor_id': 'vendorid',
+    'vendor_po_number': 'tranid',
+    'vendor_name': 'vendorname',
+    'purchase_order_status': 'status'
+}
+STATUSES = ['pendingReceipt', 'pendingBilling', 'partiallyReceived', 'fullyBilled']
+ALLOWED_STATUSES = STATUSES[:3]
+
+
+def netsuite_rows(count: int) -> Iterator[Dict]:
+    """Rows of a saved search, three purchase orders per sales order and every tenth row repeated"""
+    for i in range(count):
+        row = {
+            'internalid': str(100000 + i),
+            'createdfrom': str(50000 + i // 3),
+            'salesorderstatus': 'pendingFulfillment',
+            'trandate': '2023-01-%02d' % (i % 28 + 1),
+            'vendorid': str(30000 + i % 50),
+            'tranid': 'PO%d' % i,
+            'vendorname': 'Vendor %d' % (i % 50),
+            'status': STATUSES[i % len(STATUSES)]
+        }
+        yield row
+        if i % 10 == 0:
+            yield dict(row)
+
+
+class FakeQuerySet:
+    """Reads the COPY stream like the server would, statements are not run"""
+
+    def __init__(self) -> None:
+        self.copied_bytes = 0
+
+    def execute_non_query(self, query: str, data: Any = None) -> None:
+        pass
+
+    def execute_copy(self, query: str, stream: Any, size: int = 65536) -> int:
+        rows = 0
+        for block in iter(lambda: stream.read(size), b''):
+            self.copied_bytes += len(block)
+            rows += block.count(b'\n')
+        return rows
+
+
+def fake_merge(self: BulkLoader, data: List[Dict], sql: str, params: Dict = None, **kwargs) -> List[Dict]:
+    self.stage(FakeQuerySet(), data)
+    key = 'soint_id' if self.table == 'sales_order' else 'point_id'
+    return [{'jsonb_object_agg': {str(row[key]): number for number, row in enumerate(data, 1)}}]
+
+
+def run(count: int, batch_size: int) -> Dict[str, float]:
+    fetcher = NetsuiteFetcher(config_file_path='netsuite.json')
+    fetcher.order_mapper = ORDER_MAPPER
+    fetcher.config_template = {'purchase_order_status': ALLOWED_STATUSES}
+    fetcher.pagination = {'batch_size': batch_size}
+
+    started = time.perf_counter()
+    transformed = sum(1 for _ in fetcher.transform_rows(netsuite_rows(count)))
+    transform_seconds = time.perf_counter() - started
+
+    fetcher.data = fetcher.transform_rows(netsuite_rows(count))
+    started = time.perf_counter()
+    fetcher.loader()
+    total_seconds = time.perf_counter() - started
+
+    return {
+        'rows': count,
+        'orders': transformed,
+        'transform': transform_seconds,
+        'load': total_seconds - transform_seconds,
+        'total': total_seconds
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000, 200000])
+    parser.add_argument('--batch-size', type=int, default=1000, help='pagination.batch_size of netsuite.json')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    BulkLoader.merge = fake_merge
+
+    print('%8s %8s %11s %8s %8s %8s' % ('rows', 'orders', 'transform s', 'load s', 'total s', 'us/row'))
+    for count in args.rows:
+        result = run(count, args.batch_size)
+        print('%8d %8d %11.3f %8.3f %8.3f %8.1f' % (
+            result['rows'], result['orders'], result['transform'], result['load'], result['total'],
+            result['total'] / count * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,13 @@
-from op_dispatcher.constants import CONFIG, ConfigFields, BLOB_CONTAINER_NAME, BLOB_NAME
-from op_dispatcher.common.helpers import connect_blob
-from op_dispatcher.conf import get_logger
+from op_dispatcher.constants import CONFIG, ConfigFields, VENDOR_CONFIG_PATH
+from op_dispatcher.common.helpers import (
+    ArtifactWriter, Deadline, get_storage, config_cache
+)
+from op_dispatcher.conf import get_logger, li_db
 import azure.functions as func
 from abc import ABC, abstractmethod
-from typing import Any
-import requests
-import json
+from contextlib import contextmanager
+from typing import Any, Generator
 import uuid
-import os
 
 
 logger = get_logger()
@@ -28,32 +28,44 @@ class Base(ABC):
         self.logger = logger
         self.data = None
         self.meta = {}  # Member variable to store meta data file
+        self.deadline = Deadline()  # Time budget of the invocation for requests to vendor
+
+    @contextmanager
+    def query_stats(self) -> Generator:
+        """
+        Collects statistics of the database queries of the stage. They are
+        logged at the end and kept in meta as `query_stats`
+        """
+        with li_db.instrumentation.invocation(self.object_type.value) as stats:
+            try:
+                yield stats
+            finally:
+                self.meta['query_stats'] = stats.summary(li_db.instrumentation.top_fingerprints)
 
     def read_config(self) -> Any:
+        """
+        Reads config file of the vendor through the config cache of the worker.
+        All vendor configs are preloaded on first read of a vendor config
+        """
+        config_file_path = self.kwargs.get('config_file_path')
         try:
-            if CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'blob':
-                self.logger.info("Using config files from azure blob")
-                with requests.get(
-                    self.kwargs.get('config_file_path')
-                ) as config_file:
-                    if config_file.status_code in range(200, 210):
-                        self.config_template = json.loads(config_file.text)
-                        self.logger.info(
-                            f"Azure blob file found for the vendor: {self.kwargs.get('config_file_path')}")
-                    else:
-                        self.config_template = None
-                        self.logger.info(f"Azure blob file does not found: {self.kwargs.get('config_file_path')}")
-                        return func.HttpResponse("config in blob is not found", status_code=404)
-            elif CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'local':
-                self.logger.info("Using config files from local directory")
-                with open(
-                    self.kwargs.get('config_file_path'), 'r'
-                ) as config_file:
-                    self.config_template = json.load(config_file)
-            else:
+            if CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) not in ('blob', 'local'):
                 self.logger.error("You need to pass CONFIG_FILE_LOCATION")
                 raise Exception("Couldnot find type for CONFIG_FILE_LOCATION")
 
+            self.logger.info("Using config files from %s" % (
+                "azure blob" if CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'blob' else "local directory"
+            ))
+            if config_file_path.startswith(VENDOR_CONFIG_PATH):
+                config_cache.preload_once(VENDOR_CONFIG_PATH)
+
+            self.config_template = config_cache.get(config_file_path)
+            self.logger.info("Config cache stats: %s" % config_cache.stats)
+            if self.config_template is None:
+                self.logger.info(f"Config file does not found: {config_file_path}")
+                return func.HttpResponse("config in blob is not found", status_code=404)
+            self.logger.info(f"Config file found for the vendor: {config_file_path}")
+
         except Exception as ex:
             self.logger.error(
                 "Error occured during reading config files",
@@ -64,7 +76,9 @@ class Base(ABC):
     def write(self, **kwargs) -> Any:
         # Check for potential errors
         if not self.data:
-            return logger.info("No data to save")
+            # Nothing to pass on (eg: all responses unchanged), no file is written
+            logger.info("No data to save")
+            return self
 
         if self.data == "":
             return logger.info("Data is empty after extraction")
@@ -79,44 +93,14 @@ class Base(ABC):
         if data_file_dir is None:
             raise Exception("Data file path is None")
 
-        if CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'blob':
-            blob_service_client = connect_blob()
-            if not blob_service_client:
-                raise Exception(
-                    "Data file path does not exist or is inaccessible"
-                )
-
-        elif CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'local':
-            if not os.path.exists(data_file_dir):
-                raise Exception(
-                    "Data file path does not exist or is inaccessible"
-                )
-            if not os.path.isdir(data_file_dir):
-                raise Exception("Data file path is not a directory")
-
-        # Write the vendor data to file
+        # Write the vendor data to file record by record, without building whole file in memory
         self.logger.info("Saving fetched data to a file/blob")
         try:
-            file_name = uuid.uuid1()
-            
-            if CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'local':
-                data_file_path = os.path.join(
-                    data_file_dir, str(file_name) + ".json"
-                )
-                with open(data_file_path, 'w') as outfile:
-                    outfile.write(json.dumps(self.data))
-
-            elif CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'blob':
-                data_file_path = os.path.join(
-                    str(file_name) + ".json"
-                )
-                
-                container = CONFIG.get(BLOB_CONTAINER_NAME) + "/" + CONFIG.get(BLOB_NAME) + "/" + data_file_dir
-                blob_client = blob_service_client.get_blob_client(
-                    container=container,
-                    blob=data_file_path
-                )
-                blob_client.upload_blob(json.dumps(self.data))
+            data_file_path = str(uuid.uuid1()) + ArtifactWriter.extension()
+
+            with ArtifactWriter(get_storage().open_writer(data_file_dir + "/" + data_file_path)) as writer:
+                writer.write_all(self.data)
+            self.logger.info("Saved %s records to %s" % (writer.count, data_file_path))
 
             self.meta[self.object_type.value.lower() + "_data_file_path"] = data_file_path
             return self
@@ -19,9 +19,10 @@ class BaseFetcher(Base):
         pass
 
     def execute(self) -> Any:
-        return self.fetch_config().extractor().write(
-            data_file_dir=self.kwargs['fetcher_write_path']
-        )
+        with self.query_stats():
+            return self.fetch_config().extractor().write(
+                data_file_dir=self.kwargs['fetcher_write_path']
+            )
 
 
 class BaseNetsuiteFetcher(BaseFetcher):
@@ -42,4 +43,5 @@ class BaseNetsuiteFetcher(BaseFetcher):
         pass
 
     def execute(self) -> Any:
-        return self.fetch_config().extractor().transformer().loader().updater()
\ No newline at end of file
+        with self.query_stats():
+            return self.fetch_config().extractor().transformer().loader().updater()
\ No newline at end of file
@@ -1,7 +1,19 @@
-from op_dispatcher.common.helpers.mapper_helpers import map_object_with_config
-from op_dispatcher.common.helpers.json_flattener import json_flattener
+from op_dispatcher.common.helpers.mapper_helpers import map_object_with_config, get_mapping_plan
+from op_dispatcher.common.helpers.json_flattener import json_flattener, unflatten
+from op_dispatcher.common.helpers.xml_flattener import xml_flattener
 from op_dispatcher.common.helpers.azure_blob import connect_blob
 from op_dispatcher.common.helpers.transform_helpers import *
 from op_dispatcher.common.helpers.extractor_helpers import *
 from op_dispatcher.common.helpers.common_helpers import *
 from op_dispatcher.common.helpers.http import *
+from op_dispatcher.common.helpers.concurrency import *
+from op_dispatcher.common.helpers.rate_limiter import *
+from op_dispatcher.common.helpers.template_helpers import *
+from op_dispatcher.common.helpers.polling_schedule import *
+from op_dispatcher.common.helpers.batch_helpers import *
+from op_dispatcher.common.helpers.artifacts import *
+from op_dispatcher.common.helpers.retry import *
+from op_dispatcher.common.helpers.circuit_breaker import *
+from op_dispatcher.common.helpers.projection import *
+from op_dispatcher.common.helpers.config_cache import *
+from op_dispatcher.common.helpers.storage import *
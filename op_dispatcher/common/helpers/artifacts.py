@@ -0,0 +1,151 @@
+from op_dispatcher.constants import CONFIG, ARTIFACT
+from azure.storage.blob import BlobBlock
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable
+import base64
+import gzip
+import json
+import io
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+ARTIFACT_CONFIG = CONFIG.get(ARTIFACT, {})
+
+
+class BlobBlockSink(io.RawIOBase):
+    """
+    Writable stream staging everything written to it as blocks of a block blob.
+    Blob is created from the staged blocks on close.
+
+    Up to max_concurrency blocks are staged at a time, writing waits for the
+    oldest block when that many are in flight so memory stays bounded
+    """
+
+    def __init__(self, blob_client: Any, block_size: int, max_concurrency: int = 1) -> None:
+        super().__init__()
+        self.blob_client = blob_client
+        self.block_size = block_size
+        self.max_concurrency = max_concurrency
+        self.buffer = bytearray()
+        self.block_ids = []
+        self.in_flight = []
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency) if max_concurrency > 1 else None
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self.buffer.extend(data)
+        if len(self.buffer) >= self.block_size:
+            self._stage_block()
+        return len(data)
+
+    def _stage_block(self) -> None:
+        if not self.buffer:
+            return
+        block_id = base64.b64encode(f"{len(self.block_ids):08d}".encode()).decode()
+        data = bytes(self.buffer)
+        self.block_ids.append(block_id)
+        self.buffer = bytearray()
+
+        if self.executor is None:
+            self.blob_client.stage_block(block_id=block_id, data=data)
+            return
+        if len(self.in_flight) >= self.max_concurrency:
+            self.in_flight.pop(0).result()
+        self.in_flight.append(self.executor.submit(self.blob_client.stage_block, block_id=block_id, data=data))
+
+    def _wait(self) -> None:
+        try:
+            for future in self.in_flight:
+                future.result()
+        finally:
+            self.in_flight = []
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self._stage_block()
+        self._wait()
+        self.blob_client.commit_block_list([BlobBlock(block_id=block_id) for block_id in self.block_ids])
+        super().close()
+
+    def abort(self) -> None:
+        """
+        Closes without committing, staged blocks are discarded by azure
+        """
+        if self.closed:
+            return
+        try:
+            self._wait()
+        except Exception:
+            pass
+        super().close()
+
+
+class ArtifactWriter:
+    """
+    Writes records of a stage one by one into a local file or an azure block blob.
+
+    Format is set in `[ARTIFACT]` of config.toml:
+        - `format = "ndjson"` writes a json record per line
+        - `format = "json"` writes a json list, same as artifacts before ndjson
+        - `gzip = true` compresses the file
+
+    Sink is a writable stream of a storage, eg: `get_storage().open_writer(key)`,
+    which is stored when the writer is closed and discarded on an error.
+
+    eg:-
+        with ArtifactWriter(sink) as writer:
+            for record in records:
+                writer.write(record)
+    """
+
+    def __init__(self, sink: Any, format: str = None, compress: bool = None) -> None:
+        self.format = format or ARTIFACT_CONFIG.get('format', 'ndjson')
+        self.compress = ARTIFACT_CONFIG.get('gzip', False) if compress is None else compress
+        self.sink = sink
+        self.stream = gzip.GzipFile(fileobj=sink, mode='wb') if self.compress else sink
+        self.count = 0
+
+    @staticmethod
+    def extension(format: str = None, compress: bool = None) -> str:
+        format = format or ARTIFACT_CONFIG.get('format', 'ndjson')
+        compress = ARTIFACT_CONFIG.get('gzip', False) if compress is None else compress
+        return "." + format + (".gz" if compress else "")
+
+    @staticmethod
+    def block_size() -> int:
+        return int(ARTIFACT_CONFIG.get('block_size_kb', 4096)) * 1024
+
+    def write(self, record: Any) -> None:
+        if self.format == 'json':
+            self.stream.write(b'[' if self.count == 0 else b', ')
+            self.stream.write(json.dumps(record).encode())
+        else:
+            self.stream.write(json.dumps(record).encode() + b'\n')
+        self.count += 1
+
+    def write_all(self, records: Iterable) -> int:
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self) -> None:
+        if self.format == 'json':
+            self.stream.write(b'[]' if self.count == 0 else b']')
+        if self.compress:
+            self.stream.close()
+        self.sink.close()
+
+    def __enter__(self) -> Any:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        elif not self.sink.closed:
+            # Partly written artifact is never stored
+            self.sink.abort()
@@ -0,0 +1,123 @@
+from op_dispatcher.common.helpers.template_helpers import CompiledTemplate
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+def chunk_list(items: List, size: int) -> List[List]:
+    size = max(int(size), 1)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def get_by_path(obj: Any, path: str) -> Any:
+    """
+    Returns value at dot separated path of a nested dict/list. Digits in path
+    are used as list index. Empty path returns obj itself
+    """
+    if not path:
+        return obj
+
+    for key in path.split("."):
+        if isinstance(obj, dict):
+            obj = obj.get(key)
+        elif isinstance(obj, list) and key.isdigit() and int(key) < len(obj):
+            obj = obj[int(key)]
+        else:
+            return None
+        if obj is None:
+            return None
+    return obj
+
+
+def replace_by_path(obj: Any, keys: List[str], value: Any) -> Any:
+    """
+    Returns copy of obj with value at keys replaced. Only containers on the
+    path are copied, rest of obj is shared
+    """
+    if not keys:
+        return value
+
+    key, rest = keys[0], keys[1:]
+    if isinstance(obj, list):
+        obj = list(obj)
+        obj[int(key)] = replace_by_path(obj[int(key)], rest, value)
+    else:
+        obj = dict(obj)
+        obj[key] = replace_by_path(obj.get(key), rest, value)
+    return obj
+
+
+class OrderBatch:
+    """
+    Packs several orders into one vendor request and splits the response back
+    to each order.
+
+    Configured from `api_request_template.batch` of vendor config eg:-
+        {
+            "size": 50,
+            "placeholder": "order_numbers",
+            "item_template": "<<so_number>>",
+            "separator": ",",
+            "response_path": "orders",
+            "order_number_path": "orderNumber",
+            "order_number_field": "so_number"
+        }
+
+    Each order is rendered with `item_template` and joined with `separator` into
+    the `<<placeholder>>` used in url or payload of the vendor config. Results
+    found at `response_path` are matched to orders by comparing value at
+    `order_number_path` of each result with `order_number_field` of order. The
+    record of an order is the whole response with only its own results left at
+    `response_path`, so it is same as a response of single order request.
+    """
+
+    def __init__(self, config: Dict, order_number_field: str = 'so_number', upper_keys: Iterable = None) -> None:
+        self.size = int(config.get('size', 1))
+        self.placeholder = config.get('placeholder', 'order_numbers')
+        self.separator = config.get('separator', ',')
+        self.order_number_field = config.get('order_number_field', order_number_field)
+        self.item_template = CompiledTemplate(
+            config.get('item_template', f'<<{self.order_number_field}>>'),
+            upper_keys=upper_keys
+        )
+        self.response_path = config.get('response_path')
+        self.order_number_path = config.get('order_number_path')
+
+    @staticmethod
+    def _key(value: Any) -> str:
+        return str(value).strip().casefold()
+
+    def split(self, orders: List[Dict]) -> List[List[Dict]]:
+        return chunk_list(orders, self.size)
+
+    def values(self, orders: List[Dict]) -> Dict:
+        """
+        Returns placeholder values for the request of a batch of orders
+        """
+        return {
+            self.placeholder: self.separator.join(self.item_template.render(order) for order in orders)
+        }
+
+    def demultiplex(self, response: Any, orders: List[Dict]) -> List[Tuple[Dict, Any]]:
+        """
+        Returns (order, record) for every order of batch found in response
+        """
+        results = get_by_path(response, self.response_path)
+        if results is None:
+            return []
+
+        is_list = isinstance(results, list)
+        results_of_order = {}
+        for result in (results if is_list else [results]):
+            order_number = get_by_path(result, self.order_number_path)
+            if order_number is not None:
+                results_of_order.setdefault(self._key(order_number), []).append(result)
+
+        keys = self.response_path.split(".") if self.response_path else []
+        records = []
+        for order in orders:
+            matched = results_of_order.get(self._key(order.get(self.order_number_field)))
+            if not matched:
+                continue
+            if not is_list and len(matched) == 1:
+                matched = matched[0]
+            records.append((order, replace_by_path(response, keys, matched)))
+        return records
@@ -0,0 +1,325 @@
+from op_dispatcher.constants import (
+    CONFIG,
+    CONFIG_CACHE,
+    CONFIG_DIRECTORY,
+    DEFAULT_REQUEST_TIMEOUT,
+    ConfigFields
+)
+from op_dispatcher.common.helpers.storage import get_storage
+from op_dispatcher.common.helpers.concurrency import map_bounded
+from op_dispatcher.common.helpers.http import http_clients
+from op_dispatcher.conf import get_logger
+from collections import OrderedDict
+from typing import Any, Dict, List, Union
+import tempfile
+import threading
+import hashlib
+import time
+import json
+import os
+
+
+logger = get_logger()
+
+
+class ConfigEntry:
+    """
+    Text of a config file with the validator it was read with, ETag of the blob
+    or (mtime, size) of the local file
+    """
+
+    def __init__(self, text: str, validator: Any) -> None:
+        self.text = text
+        self.validator = validator
+        self.checked_at = time.monotonic()
+
+
+class ConfigCache:
+    """
+    Two tier cache of vendor and netsuite config files.
+
+    Configured from `[CONFIG_CACHE]` of config.toml eg:-
+        enabled = true
+        max_entries = 256
+        ttl_seconds = 300
+        disk_cache = true
+        disk_dir = ""
+        preload = true
+        preload_max_in_flight = 8
+
+    Configs read from blob are kept in an LRU of the worker for ttl_seconds,
+    after which they are revalidated with `If-None-Match` against the ETag
+    they were read with, so an unchanged config costs a 304 without body.
+    With disk_cache, configs are also written under disk_dir (temp dir of the
+    worker by default), so a recycled worker revalidates them instead of
+    downloading them again. A cached config is served when the blob cannot be
+    read, except when it is not found.
+
+    Configs read from local directory are revalidated on every read by mtime
+    and size of the file.
+
+    Text of config is cached, every read returns a new parsed dictionary, so
+    callers can change it freely.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_entries: int = 256,
+        ttl_seconds: float = 300,
+        disk_cache: bool = True,
+        disk_dir: str = None,
+        preload: bool = True,
+        preload_max_in_flight: int = 8
+    ) -> None:
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = (disk_dir or os.path.join(tempfile.gettempdir(), "op_config_cache")) if disk_cache else None
+        self.preload_enabled = preload
+        self.preload_max_in_flight = preload_max_in_flight
+        self.preloaded = False
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "disk_hits": 0,
+            "revalidated": 0,
+            "stale_served": 0,
+            "evicted": 0
+        }
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'ConfigCache':
+        return cls(
+            enabled=config.get('enabled', True),
+            max_entries=int(config.get('max_entries', 256)),
+            ttl_seconds=float(config.get('ttl_seconds', 300)),
+            disk_cache=config.get('disk_cache', True),
+            disk_dir=config.get('disk_dir') or None,
+            preload=config.get('preload', True),
+            preload_max_in_flight=int(config.get('preload_max_in_flight', 8))
+        )
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+    def _get_entry(self, path: str) -> Union[ConfigEntry, None]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+            return entry
+
+    def _put_entry(self, path: str, entry: ConfigEntry) -> None:
+        with self._lock:
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evicted"] += 1
+
+    def _drop_entry(self, path: str) -> None:
+        with self._lock:
+            self._entries.pop(path, None)
+        disk_path = self._disk_path(path)
+        if disk_path and os.path.exists(disk_path):
+            try:
+                os.remove(disk_path)
+            except FileNotFoundError:
+                pass
+
+    def _disk_path(self, path: str) -> Union[str, None]:
+        if self.disk_dir is None:
+            return None
+        return os.path.join(self.disk_dir, hashlib.sha1(path.encode('utf-8')).hexdigest() + ".json")
+
+    def _read_disk(self, path: str) -> Union[ConfigEntry, None]:
+        disk_path = self._disk_path(path)
+        if disk_path is None or not os.path.exists(disk_path):
+            return None
+        try:
+            with open(disk_path, 'r') as f:
+                stored = json.load(f)
+        except Exception:
+            logger.warning("Could not read cached config of %s from disk" % path, exc_info=True)
+            return None
+
+        entry = ConfigEntry(stored.get('text'), stored.get('etag'))
+        # Revalidated on first read, worker may have been recycled long after it was written
+        entry.checked_at = None
+        return entry
+
+    def _write_disk(self, path: str, entry: ConfigEntry) -> None:
+        disk_path = self._disk_path(path)
+        if disk_path is None:
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            tmp_path = disk_path + ".%s.tmp" % threading.get_ident()
+            with open(tmp_path, 'w') as f:
+                json.dump({"path": path, "etag": entry.validator, "text": entry.text}, f)
+            os.replace(tmp_path, disk_path)
+        except Exception:
+            logger.warning("Could not write cached config of %s to disk" % path, exc_info=True)
+
+    def _is_fresh(self, entry: ConfigEntry) -> bool:
+        return entry.checked_at is not None and time.monotonic() - entry.checked_at < self.ttl_seconds
+
+    def _read_blob(self, path: str) -> Union[str, None]:
+        entry = self._get_entry(path)
+        if entry is not None and self._is_fresh(entry):
+            self._count("hits")
+            return entry.text
+
+        if entry is None:
+            entry = self._read_disk(path)
+            if entry is not None:
+                self._count("disk_hits")
+
+        headers = {"If-None-Match": entry.validator} if entry is not None and entry.validator else {}
+        try:
+            session = http_clients.get_session(path, client_key='config_cache')
+            with session.get(path, headers=headers, timeout=DEFAULT_REQUEST_TIMEOUT) as response:
+                status_code, text, etag = response.status_code, response.text, response.headers.get('ETag')
+        except Exception:
+            if entry is None:
+                raise
+            logger.warning("Could not revalidate config %s, using cached config" % path, exc_info=True)
+            self._count("stale_served")
+            return entry.text
+
+        if status_code == 304 and entry is not None:
+            self._count("revalidated")
+            entry.checked_at = time.monotonic()
+            self._put_entry(path, entry)
+            return entry.text
+
+        if status_code in range(200, 210):
+            self._count("misses")
+            entry = ConfigEntry(text, etag)
+            self._put_entry(path, entry)
+            self._write_disk(path, entry)
+            return text
+
+        if status_code == 404:
+            self._drop_entry(path)
+            return None
+
+        if entry is not None:
+            logger.warning("Reading config %s returned HTTP %s, using cached config" % (path, status_code))
+            self._count("stale_served")
+            return entry.text
+        return None
+
+    def _read_local(self, path: str) -> Union[str, None]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._drop_entry(path)
+            return None
+
+        validator = (stat.st_mtime_ns, stat.st_size)
+        entry = self._get_entry(path)
+        if entry is not None and entry.validator == validator:
+            self._count("hits")
+            return entry.text
+
+        self._count("misses")
+        with open(path, 'r') as config_file:
+            text = config_file.read()
+        self._put_entry(path, ConfigEntry(text, validator))
+        return text
+
+    def read_text(self, path: str) -> Union[str, None]:
+        """
+        Returns text of config file, None when it is not found
+        """
+        if CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'blob':
+            if not self.enabled:
+                self._count("misses")
+                with http_clients.get_session(path, client_key='config_cache').get(
+                    path, timeout=DEFAULT_REQUEST_TIMEOUT
+                ) as response:
+                    return response.text if response.status_code in range(200, 210) else None
+            return self._read_blob(path)
+
+        if CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'local':
+            if not self.enabled:
+                self._count("misses")
+                if not os.path.exists(path):
+                    return None
+                with open(path, 'r') as config_file:
+                    return config_file.read()
+            return self._read_local(path)
+
+        raise Exception("Couldnot find type for CONFIG_FILE_LOCATION")
+
+    def get(self, path: str) -> Union[Dict, None]:
+        """
+        Returns parsed config file, None when it is not found
+        """
+        text = self.read_text(path)
+        return json.loads(text) if text is not None else None
+
+    def list_configs(self, directory: str) -> List[str]:
+        """
+        Returns paths of all json config files under directory, as they are
+        passed in config_file_path
+        """
+        if CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'local':
+            return [
+                os.path.join(directory, file_name)
+                for file_name in sorted(os.listdir(directory))
+                if file_name.endswith('.json')
+            ]
+
+        # Url of a blob is CONFIG_DIRECTORY followed by its key in storage
+        return [
+            CONFIG.get(CONFIG_DIRECTORY) + key
+            for key in get_storage('blob').list(directory[len(CONFIG.get(CONFIG_DIRECTORY)):])
+            if key.endswith('.json')
+        ]
+
+    def preload(self, directory: str) -> int:
+        """
+        Reads all configs under directory into the cache. Failure is only
+        logged, configs are read again one by one when they are needed
+
+        :return: number of configs loaded
+        :rtype: int
+        """
+        self.preloaded = True
+        if not self.enabled:
+            return 0
+
+        try:
+            paths = self.list_configs(directory)
+        except Exception:
+            logger.warning("Could not list configs under %s for preloading" % directory, exc_info=True)
+            return 0
+
+        texts = map_bounded(self.read_text, paths, self.preload_max_in_flight)
+        loaded = len([text for text in texts if text is not None])
+        logger.info("Preloaded %s of %s config(s) from %s" % (loaded, len(paths), directory))
+        return loaded
+
+    def preload_once(self, directory: str) -> None:
+        if self.preload_enabled and not self.preloaded:
+            self.preload(directory)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.preloaded = False
+
+    @property
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries))
+
+
+config_cache = ConfigCache.from_config(CONFIG.get(CONFIG_CACHE, {}))
@@ -1,8 +1,9 @@
-from typing import Dict, List, Union, Any
+from typing import Dict, List, Set, Any
+from op_dispatcher.common.helpers.template_helpers import compile_config_template
+from op_dispatcher.common.helpers.xml_flattener import xml_flattener
 from op_dispatcher.conf import get_logger
 import xmltodict
 import requests
-import json
 
 
 logger = get_logger()
@@ -10,63 +11,72 @@ logger = get_logger()
 
 def data_to_be_inserted_into_table(
     data: List,
-    invoice_list: Dict
-) -> Union[List, Dict]:
+    invoice_numbers: Dict[int, Set[str]]
+) -> List:
     """
-    Filters those objects that are not in given list of objects
+    Filters out objects whose invoice is already in vendor_invoice for their purchase order
 
-    :param data:
-    :type data:
+    :param data: objects having purchase_order_id and invoice_number
+    :type data: list
 
-    :param invoice_list: 
-    :type invoice_list:
+    :param invoice_numbers: set of existing invoice numbers by purchase_order_id
+    :type invoice_numbers: dict
 
-    :return:
-    :type:
+    :return: objects without invoice number or with a new invoice of their purchase order
+    :rtype: list
     """
 
-    tmp_data_list = []
-    for item in data:
-        if item.get('invoice_number') and item.get('invoice_number') in invoice_list:
-            continue
-        elif item.get('invoice_number') and not invoice_list:
-            tmp_data_list.append(item)
-        elif not item.get('invoice_number'):
-            tmp_data_list.append(item)
+    return [
+        item for item in data
+        if not item.get('invoice_number')
+        or item.get('invoice_number') not in invoice_numbers.get(item.get('purchase_order_id'), ())
+    ]
 
-    return tmp_data_list
 
+def prepare_config_files(self) -> Dict:
+    """
+    Reads config template and renders it with template values of the vendor
+
+    Sets `compiled_template` on given object, so that values of each order are
+    rendered from it without parsing the config again.
 
-def prepare_config_files(self):
+    :return: config rendered with template values
+    :rtype: dict
+    """
     # Read the config template
     self.read_config()
 
-    # Load other values
-    template_values = self.kwargs.get('template_values')
-    template_str = json.dumps(self.config_template)
-
     logger.info("Replacing template values")
-    for k, v in template_values.items():
-        if (
-            self.config_template.get("data")
-            and self.config_template.get("data").get(
-                "payload_value_to_upper"
-            )
-            and k in self.config_template.get("data").get(
-                "payload_value_to_upper"
-            )
-        ):
-            v = str(v).upper()
-        template_str = template_str.replace(f'<<{k}>>', v)
-
-    return template_str
+    config_template = compile_config_template(self.config_template).render(
+        self.kwargs.get('template_values')
+    )
+    self.compiled_template = compile_config_template(config_template)
+
+    return config_template
 
 
 def xml_to_json_parser(response: requests.Response) -> Any:
     logger.info("Parsing xml response to python dictionary")
     try:
-        xml_text = json.dumps(xmltodict.parse(response.text))
-        response_deserialize = json.loads(xml_text)
+        response_deserialize = xmltodict.parse(response.text)
+    except Exception as e:
+        logger.error(response.text)
+        logger.error("Error during deserialization of response from vendor", exc_info=True)
+        raise Exception(e)
+    return response_deserialize
+
+
+def xml_to_flat_parser(response: requests.Response, prefixes: List[str] = None) -> Dict:
+    """
+    Parses xml response straight into flattened dictionary, same as flattening
+    the output of xml_to_json_parser with json_flattener
+
+    :param prefixes: only keys under these paths are kept, see xml_flattener
+    :type prefixes: list
+    """
+    logger.info("Parsing xml response to flattened dictionary")
+    try:
+        response_deserialize = xml_flattener(response.text, prefixes)
     except Exception as e:
         logger.error(response.text)
         logger.error("Error during deserialization of response from vendor", exc_info=True)
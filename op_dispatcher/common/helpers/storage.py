@@ -0,0 +1,359 @@
+from op_dispatcher.constants import (
+    CONFIG,
+    STORAGE,
+    BLOB_NAME,
+    BLOB_CONTAINER_NAME,
+    ConfigFields
+)
+from op_dispatcher.common.helpers.azure_blob import connect_blob
+from op_dispatcher.common.helpers.artifacts import ArtifactWriter, BlobBlockSink, GZIP_MAGIC
+from op_dispatcher.conf import get_logger
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List
+import threading
+import uuid
+import gzip
+import json
+import io
+import os
+
+
+logger = get_logger()
+STORAGE_CONFIG = CONFIG.get(STORAGE, {})
+
+
+class ChunkReader(io.RawIOBase):
+    """
+    Readable stream over an iterator of byte chunks, eg: chunks of a blob download
+    """
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        super().__init__()
+        self.chunks = chunks
+        self.pending = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self.pending:
+            self.pending = next(self.chunks, None)
+            if self.pending is None:
+                self.pending = b''
+                return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+class AtomicFileSink(io.BufferedWriter):
+    """
+    Local file written under a temporary name and renamed to its path on
+    close, so a reader never sees a partly written file
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.tmp_path = "%s.%s.tmp" % (path, uuid.uuid4().hex)
+        super().__init__(io.FileIO(self.tmp_path, 'wb'))
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        super().close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        if self.closed:
+            return
+        super().close()
+        os.remove(self.tmp_path)
+
+
+class MemorySink(io.BytesIO):
+    """
+    Buffer stored into MemoryStorage on close
+    """
+
+    def __init__(self, storage: 'MemoryStorage', key: str) -> None:
+        super().__init__()
+        self.storage = storage
+        self.key = key
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.storage.put(self.key, self.getvalue())
+        super().close()
+
+    def abort(self) -> None:
+        super().close()
+
+
+class Storage(ABC):
+    """
+    Storage of artifacts passed between stages. Keys are `/` separated paths
+    relative to the root of the storage, eg: `outdir/fetcher_data/<file>`
+    """
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def get(self, key: str, offset: int = None, length: int = None) -> bytes:
+        """
+        Returns content of key, or length bytes of it from offset
+        """
+        pass
+
+    @abstractmethod
+    def open_stream(self, key: str, offset: int = None, length: int = None) -> io.BufferedReader:
+        """
+        Returns readable stream over content of key, or length bytes of it from offset
+        """
+        pass
+
+    @abstractmethod
+    def open_writer(self, key: str) -> Any:
+        """
+        Returns writable stream stored to key on close. Stream is discarded by abort
+        """
+        pass
+
+    @abstractmethod
+    def list(self, prefix: str = "") -> List[str]:
+        """
+        Returns keys starting with prefix
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+
+class AzureBlobStorage(Storage):
+    """
+    Storage in a container of azure blob storage under a root path, eg:
+    container `stage` and root `order-processing/`. One client of the process
+    is used for every request.
+
+    Blocks are uploaded and ranges downloaded with max_concurrency requests
+    at a time
+    """
+
+    def __init__(
+        self,
+        container: str,
+        root: str = "",
+        max_concurrency: int = 4,
+        block_size: int = None
+    ) -> None:
+        blob_service_client = connect_blob()
+        if not blob_service_client:
+            raise Exception("Could not connect to blob storage")
+        self.container_client = blob_service_client.get_container_client(container)
+        self.root = root.rstrip('/') + '/' if root else ""
+        self.max_concurrency = max_concurrency
+        self.block_size = block_size or ArtifactWriter.block_size()
+
+    def put(self, key: str, data: bytes) -> None:
+        self.container_client.upload_blob(
+            self.root + key,
+            data,
+            overwrite=True,
+            max_concurrency=self.max_concurrency
+        )
+
+    def _download(self, key: str, offset: int = None, length: int = None) -> Any:
+        return self.container_client.download_blob(
+            self.root + key,
+            offset=offset,
+            length=length,
+            max_concurrency=self.max_concurrency
+        )
+
+    def get(self, key: str, offset: int = None, length: int = None) -> bytes:
+        return self._download(key, offset, length).readall()
+
+    def open_stream(self, key: str, offset: int = None, length: int = None) -> io.BufferedReader:
+        # Chunks are downloaded as the stream is read, whole blob is never held in memory
+        return io.BufferedReader(ChunkReader(iter(self._download(key, offset, length).chunks())))
+
+    def open_writer(self, key: str) -> BlobBlockSink:
+        return BlobBlockSink(
+            self.container_client.get_blob_client(self.root + key),
+            self.block_size,
+            self.max_concurrency
+        )
+
+    def list(self, prefix: str = "") -> List[str]:
+        return [
+            blob.name[len(self.root):]
+            for blob in self.container_client.list_blobs(name_starts_with=self.root + prefix)
+        ]
+
+    def delete(self, key: str) -> None:
+        self.container_client.delete_blob(self.root + key)
+
+
+class LocalStorage(Storage):
+    """
+    Storage in a local directory. Files are written under a temporary name and
+    renamed when complete
+    """
+
+    def __init__(self, root: str = "") -> None:
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def put(self, key: str, data: bytes) -> None:
+        sink = self.open_writer(key)
+        try:
+            sink.write(data)
+        except Exception:
+            sink.abort()
+            raise
+        sink.close()
+
+    def get(self, key: str, offset: int = None, length: int = None) -> bytes:
+        with self.open_stream(key, offset, length) as stream:
+            return stream.read()
+
+    def open_stream(self, key: str, offset: int = None, length: int = None) -> io.BufferedReader:
+        stream = open(self._path(key), 'rb')
+        if offset:
+            stream.seek(offset)
+        if length is None:
+            return stream
+        data = stream.read(length)
+        stream.close()
+        return io.BufferedReader(io.BytesIO(data))
+
+    def open_writer(self, key: str) -> AtomicFileSink:
+        path = self._path(key)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        return AtomicFileSink(path)
+
+    def list(self, prefix: str = "") -> List[str]:
+        directory = os.path.dirname(prefix)
+        if not os.path.isdir(self._path(directory)):
+            return []
+        keys = []
+        for dir_path, _, file_names in os.walk(self._path(directory)):
+            relative_dir = os.path.relpath(dir_path, self._path(directory))
+            for file_name in file_names:
+                key = os.path.normpath(os.path.join(directory, relative_dir, file_name)).replace(os.sep, '/')
+                if key.startswith(prefix) and not file_name.endswith('.tmp'):
+                    keys.append(key)
+        return sorted(keys)
+
+    def delete(self, key: str) -> None:
+        os.remove(self._path(key))
+
+
+class MemoryStorage(Storage):
+    """
+    Storage in memory of the process, for tests and benchmarks of stages
+    without blob storage or disk
+    """
+
+    def __init__(self) -> None:
+        self.objects = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self.objects[key] = bytes(data)
+
+    def get(self, key: str, offset: int = None, length: int = None) -> bytes:
+        with self._lock:
+            if key not in self.objects:
+                raise FileNotFoundError(key)
+            data = self.objects[key]
+        offset = offset or 0
+        return data[offset:offset + length] if length is not None else data[offset:]
+
+    def open_stream(self, key: str, offset: int = None, length: int = None) -> io.BufferedReader:
+        return io.BufferedReader(io.BytesIO(self.get(key, offset, length)))
+
+    def open_writer(self, key: str) -> MemorySink:
+        return MemorySink(self, key)
+
+    def list(self, prefix: str = "") -> List[str]:
+        with self._lock:
+            return sorted(key for key in self.objects if key.startswith(prefix))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if self.objects.pop(key, None) is None:
+                raise FileNotFoundError(key)
+
+
+def create_storage(backend: str) -> Storage:
+    if backend == 'blob':
+        return AzureBlobStorage(
+            CONFIG.get(BLOB_CONTAINER_NAME),
+            CONFIG.get(BLOB_NAME),
+            max_concurrency=int(STORAGE_CONFIG.get('max_concurrency', 4))
+        )
+    if backend == 'local':
+        return LocalStorage(STORAGE_CONFIG.get('local_root', ""))
+    if backend == 'memory':
+        return MemoryStorage()
+    raise Exception("Unknown storage backend %s" % backend)
+
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(backend: str = None) -> Storage:
+    """
+    Returns storage of the process for backend. Backend is `backend` of
+    `[STORAGE]` in config.toml, or CONFIG_FILE_TYPE when it is not set
+
+    :param backend: blob, local or memory
+    :type backend: str
+    """
+
+    backend = backend or STORAGE_CONFIG.get('backend') or CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value)
+    with _storages_lock:
+        storage = _storages.get(backend)
+        if storage is None:
+            storage = _storages[backend] = create_storage(backend)
+    return storage
+
+
+def read_artifact(key: str, storage: Storage = None) -> Iterator[Dict]:
+    """
+    Yields records of an artifact written by any stage, without loading whole
+    file in memory. Gzip and format (ndjson or json list) are detected from
+    content, so older `.json` artifacts are read as well.
+
+    :param key: key of the artifact in storage eg: `outdir/fetcher_data/<file>`
+    :type key: str
+
+    :param storage: storage to read from, storage of the process by default
+    :type storage: Storage
+    """
+
+    stream = (storage or get_storage()).open_stream(key)
+    try:
+        if stream.peek(2)[:2] == GZIP_MAGIC:
+            stream = io.BufferedReader(gzip.GzipFile(fileobj=stream, mode='rb'))
+
+        if stream.peek(64).lstrip()[:1] == b'[':
+            yield from json.load(stream)
+        else:
+            for line in stream:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    finally:
+        stream.close()
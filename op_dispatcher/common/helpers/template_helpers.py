@@ -0,0 +1,127 @@
+from typing import Any, Dict, Iterable, List, Tuple
+import re
+
+
+PLACEHOLDER_PATTERN = re.compile(r'<<([^<>]+?)>>')
+
+
+class CompiledTemplate:
+    """
+    Vendor config parsed once into a template whose `<<placeholder>>` leaves are known.
+
+    Every string leaf containing placeholders is split into literal parts and
+    placeholder names at compile time. Rendering a path then only formats those
+    leaves with the values of an order, without dumping, replacing and loading
+    the whole config again. Since values are substituted into python strings
+    (not into JSON text), quotes or backslashes in values cannot break the config.
+
+    eg:-
+        compiled = CompiledTemplate(config, upper_keys=["po_number"])
+        url = compiled.get(("api_request_template", "url", "raw"), {"po_number": "abc"})
+
+    :param template: vendor config
+    :type template: dict
+
+    :param upper_keys: placeholders whose value is rendered in uppercase
+        (`data.payload_value_to_upper` in vendor config)
+    :type upper_keys: list
+    """
+
+    def __init__(self, template: Any, upper_keys: Iterable = None) -> None:
+        self.template = template
+        self.upper_keys = set(upper_keys or ())
+        self.leaves = {}
+        self.placeholders = set()
+        self._compile(template, ())
+
+    def _compile(self, node: Any, path: Tuple) -> bool:
+        """
+        Records templated leaves under node. Returns True if node has any
+        """
+        has_placeholder = False
+        if isinstance(node, dict):
+            for key, value in node.items():
+                has_placeholder |= self._compile(value, path + (key,))
+        elif isinstance(node, list):
+            for idx, value in enumerate(node):
+                has_placeholder |= self._compile(value, path + (idx,))
+        elif isinstance(node, str) and '<<' in node:
+            parts = PLACEHOLDER_PATTERN.split(node)
+            if len(parts) > 1:
+                self.leaves[path] = parts
+                self.placeholders.update(parts[1::2])
+                has_placeholder = True
+
+        if has_placeholder:
+            self.leaves.setdefault(path, None)
+        return has_placeholder
+
+    def format_value(self, key: str, value: Any) -> str:
+        value = str(value)
+        if key in self.upper_keys:
+            value = value.upper()
+        return value
+
+    def _render_leaf(self, parts: List[str], values: Dict) -> str:
+        rendered = []
+        for idx, part in enumerate(parts):
+            if idx % 2 == 0:
+                rendered.append(part)
+            elif part in values:
+                rendered.append(self.format_value(part, values[part]))
+            else:
+                # Placeholder without value is kept as it is
+                rendered.append(f'<<{part}>>')
+        return "".join(rendered)
+
+    def _render(self, node: Any, path: Tuple, values: Dict) -> Any:
+        if path not in self.leaves:
+            # Nothing to render below this node, so it is shared instead of copied
+            return node
+
+        parts = self.leaves[path]
+        if parts is not None:
+            return self._render_leaf(parts, values)
+        if isinstance(node, dict):
+            return {key: self._render(value, path + (key,), values) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self._render(value, path + (idx,), values) for idx, value in enumerate(node)]
+        return node
+
+    def get(self, path: Tuple, values: Dict = None, default: Any = None) -> Any:
+        """
+        Returns node of template at given path rendered with values
+
+        :param path: keys/indexes leading to the node eg: ("data", "xml_payload")
+        :type path: tuple
+
+        :param values: values for placeholders
+        :type values: dict
+
+        :param default: returned when path doesnot exist in template
+        :type default: any
+        """
+        node = self.template
+        for key in path:
+            try:
+                node = node[key]
+            except (KeyError, IndexError, TypeError):
+                return default
+        if node is None:
+            return default
+        return self._render(node, tuple(path), values or {})
+
+    def render(self, values: Dict = None) -> Any:
+        """
+        Returns whole template rendered with values
+        """
+        return self._render(self.template, (), values or {})
+
+
+def compile_config_template(config_template: Dict) -> CompiledTemplate:
+    """
+    Compiles vendor config with `data.payload_value_to_upper` of that config
+    """
+    data = config_template.get("data") if isinstance(config_template, dict) else None
+    upper_keys = data.get("payload_value_to_upper") if isinstance(data, dict) else None
+    return CompiledTemplate(config_template, upper_keys=upper_keys)
@@ -4,6 +4,7 @@ ORM base class for performing MRC database actions
 
 from marshmallow import fields, ValidationError, EXCLUDE
 from op_dispatcher.common.orm_handler.common_orm import update_data, upsert_bulk_data
+from op_dispatcher.common.orm_handler.bulk_loader import BulkLoader
 from abc import ABC, abstractmethod
 from op_dispatcher.utils.logger import tracelog
 from op_dispatcher.conf import get_logger
@@ -192,6 +193,27 @@ class VBOrmBase(ABC):
         update_data(self.get_table(), self.loaded_data, identifier, row_value)
 
 
+    @tracelog(logger)
+    def bulk_merge(self, data, sql: str, params: dict = None, **kwargs) -> list:
+        """Load rows into table through a COPY staging table and merge them with sql.
+
+        Columns are the loadable fields of table schema present in data, see `BulkLoader`.
+
+        :params data: loaded rows of table.
+        :type data: list
+
+        :params sql: merge query formatted with table_name, staging_table, column_names
+                     and kwargs. eg:: QUERY_MERGE_SALES_ORDER
+        :type sql: str
+
+        :params params: parameters of merge query.
+        :type params: dict
+
+        :returns: rows returned by merge query.
+        :rtype: list
+        """
+        return BulkLoader(self.get_table(), self.get_schema()).merge(data, sql, params, **kwargs)
+
     @tracelog(logger)
     def upsert(self, row_value: Any = None, identifier: str = 'id', returning: bool = None, conflict_fields: str = None, chunk_size: int = 200, sql: str = None):
         """Upsert `src_data` in database.
@@ -230,7 +252,8 @@ class VBOrmBase(ABC):
                 chunk_size=chunk_size,
                 returning=returning,
                 conflict_fields=conflict_fields,
-                sql=sql
+                sql=sql,
+                schema=self.get_schema()
             )
 
         except Exception as ex:
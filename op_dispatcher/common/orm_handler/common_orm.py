@@ -1,7 +1,11 @@
 """ Collections of most common db queries"""
-from typing import Any, Union, Optional, Sequence
+from contextlib import contextmanager
+from typing import Any, Generator, Union, Optional, Sequence
 from op_dispatcher.utils.logger import tracelog
+from op_dispatcher.sql_queries import QUERY_MERGE_BULK_DATA
+from op_dispatcher.common.orm_handler.bulk_loader import BulkLoader
 from op_dispatcher.conf import li_db, get_logger
+from marshmallow import Schema
 
 logger = get_logger()
 
@@ -213,6 +217,38 @@ def generate_bulk_upsert_sql(table: str, insert_data: list, include, returning,
     return sql
 
 
+def generate_on_conflict_sql(columns: list, returning: bool, conflict_fields: str = None) -> str:
+    """Prepare on conflict clause of bulk upsert, same as `generate_bulk_upsert_sql`.
+
+        eg::
+            ON CONFLICT (col1) DO UPDATE SET col2 = EXCLUDED.col2
+
+        :params columns: columns of inserted rows.
+        :type columns: list
+
+        :params returning: update non conflict columns if true, do nothing if false,
+                           no on conflict clause if None.
+        :type returning: bool
+
+        :params conflict_fields: fields that are primary key in table and are required for upsert on conflict
+        :type conflict_fields: str
+
+        :returns: Generated on conflict clause.
+        :rtype: str
+        """
+    if returning is None:
+        return ''
+
+    if returning is False:
+        return 'ON CONFLICT (%s) DO NOTHING' % conflict_fields
+
+    conflict_columns = [fld.strip() for fld in conflict_fields.split(',')]
+    update_columns = ', '.join(f'{col} = EXCLUDED.{col}' for col in columns if col not in conflict_columns)
+    if not update_columns:
+        return 'ON CONFLICT (%s) DO NOTHING' % conflict_fields
+    return 'ON CONFLICT (%s) DO UPDATE SET %s' % (conflict_fields, update_columns)
+
+
 def execute_sql_query(query: str, data: Optional[Sequence] = None):
     """
     :param query:
@@ -229,12 +265,50 @@ def execute_sql_query(query: str, data: Optional[Sequence] = None):
     return queryset
 
 
+@contextmanager
+def stream_sql_query(query: str, data: Optional[Sequence] = None, itersize: int = None) -> Generator:
+    """Execute query on a server side cursor. Rows are fetched itersize at a
+    time as they are read, so they are never all held in memory.
+
+        eg::
+            with stream_sql_query(QUERY_SELECT_SALESORDER % (...), itersize=5000) as rows:
+                for row in rows:
+                    ...
+
+    Rows must be read inside the with block, its transaction holds a pooled
+    connection until the block ends. See `PgSQlStreamResultSet` for reading
+    them as tuples, in batches or as dataframes.
+
+    :params query: query to execute.
+    :type query: str
+
+    :params data: parameters of the query.
+    :type data: Sequence
+
+    :params itersize: rows fetched in one round trip, 2000 by default.
+    :type itersize: int
+
+    :yields: `PgSQlStreamResultSet` of the query.
+
+    :raises Exception: Raised when error occurs in query execution.
+    """
+    with li_db.transaction(auto_commit=True) as query_set:
+        try:
+            result_set = query_set.stream_query(query, data, itersize)
+            logger.debug(f'Executed Query {query_set.query}')
+        except Exception as e:
+            logger.error(f'Error while executing {query}', exc_info=True)
+            raise e
+        yield result_set
+
+
 @tracelog(logger)
-def upsert_bulk_data(table: str, insert_data: list, chunk_size: int, conflict_fields: str = None, include=None, returning: bool = True, sql: str = None) -> Union[list, None]:
+def upsert_bulk_data(table: str, insert_data: list, chunk_size: int, conflict_fields: str = None, include=None, returning: bool = True, sql: str = None, schema: Schema = None) -> Union[list, None]:
     """Save given multiple data to li_db table.
 
-    Prepares insert Query with placeholders from insert_data keys
-    and inserts in a single transaction.
+    Without sql, data is copied into a staging table and upserted from it with a
+    single statement in one transaction, see `BulkLoader`. With sql, prepares insert
+    Query with placeholders from insert_data keys and inserts chunk by chunk.
 
     :params table: table to insert into.
     :type table: str
@@ -251,12 +325,22 @@ def upsert_bulk_data(table: str, insert_data: list, chunk_size: int, conflict_fi
     :params conflict_fields: fields that are primary key in table and are required for upsert on conflict
     :type conflict_fields: str
 
+    :params schema: schema of table, its loadable fields are the columns loaded without sql.
+    :type schema: marshmallow.Schema
+
     :returns: Inserted data points back from database in a list.
     :rtype: list
 
     :raises Exception: Raised when error occurs in insert transaction.
     """
 
+    if not sql:
+        loader = BulkLoader(table, schema)
+        loader.merge(insert_data, QUERY_MERGE_BULK_DATA, on_conflict=generate_on_conflict_sql(
+            loader.get_columns(insert_data[0]) if insert_data else [], returning, conflict_fields
+        ))
+        return None
+
     def chunks(lst, n):
         for i in range(0, len(lst), n):
             yield lst[i:i + n]
@@ -1,20 +1,32 @@
 from op_dispatcher.common.helpers import (
+    map_bounded,
+    OrderBatch,
     make_api_call,
+    get_rate_limiter,
+    RetryPolicy,
+    CircuitOpenError,
+    get_circuit_breaker,
+    PollingSchedule,
     xml_to_json_parser,
+    xml_to_flat_parser,
     prepare_config_files,
+    PathProjection,
 )
-from op_dispatcher.common.orm_handler.common_orm import execute_sql_query
+from op_dispatcher.common.orm_handler.common_orm import stream_sql_query
+from op_dispatcher.order_processing.fetcher.response_cache import ResponseCache
+from op_dispatcher.orm import VbPurchaseOrder
 from op_dispatcher.base_class import BaseFetcher
 from op_dispatcher.sql_queries import (
     QUERY_SELECT_PURCHASE_ORDER_AND_SALESORDER
 )
 from op_dispatcher.constants import (
     DEFAULT_CIPHERS,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_REQUEST_TIMEOUT,
     PURCHASE_ORDER_STATUS_FOR_VENDOR_BILLING
 )
 from flatten_dict import flatten
-from typing import Any
-import json
+from typing import Any, Dict, List, Union
 
 
 class XMLVendorOrderFetcher(BaseFetcher):
@@ -24,6 +36,19 @@ class XMLVendorOrderFetcher(BaseFetcher):
         self.is_serialized = None
         self.order_detail_list = []
         self.required_template = None
+        self.max_in_flight = DEFAULT_MAX_IN_FLIGHT
+        self.rate_limiter = None
+        self.retry_policy = None
+        self.circuit_breaker = None
+        self.deferred_orders = []
+        # purchase_order_id of orders which got a valid response from vendor
+        self.polled_orders = set()
+        self.compiled_template = None
+        self.response_cache = None
+        self.polling_schedule = None
+        self.batch = None
+        self.xml_flatten = None
+        self.projection = None
 
         # Check if all the mandatory parameters are present
         mandatory_params = ['vendor_id', 'config_file_path']
@@ -38,81 +63,292 @@ class XMLVendorOrderFetcher(BaseFetcher):
 
         self.logger.info("Prepare config files for API calls")
 
-        template_str = prepare_config_files(self)
-        self.config_template = json.loads(template_str)
+        self.config_template = prepare_config_files(self)
         return self
 
-    def extractor(self) -> Any:
-        # Fetch list of sales orders of a vendor for calling vendor api
-        sql = QUERY_SELECT_PURCHASE_ORDER_AND_SALESORDER % (
-            self.kwargs.get('vendor_id'),
-            PURCHASE_ORDER_STATUS_FOR_VENDOR_BILLING
+    def send_request(self, values: Dict, order_number: str = None) -> Any:
+        """
+        Renders the request from vendor config with values and sends it to vendor
+
+        :param values: values for placeholders of the request, an order or a batch of orders
+        :type values: dict
+
+        :param order_number: order whose conditional headers are sent, None for a batch
+        :type order_number: str
+        """
+
+        # Only the parts of config needed for the request are rendered with values of order
+        self.logger.info("Replacing template values for API request")
+        method = self.compiled_template.get(("api_request_template", "url", "method"), values)
+        url = self.compiled_template.get(("api_request_template", "url", "raw"), values)
+        headers = {
+            item.get("key"): item.get("value")
+            for item in self.compiled_template.get(("api_request_template", "header"), values, [])
+        }
+        if order_number is not None:
+            headers.update(self.response_cache.conditional_headers(order_number))
+        data = self.compiled_template.get(("data", "xml_payload"), values) if method == 'POST' else None
+        if self.config_template.get("data").get("x-www-form-urlencoded"):
+            data = self.compiled_template.get(("data", "x-www-form-urlencoded"), values)
+
+        self.logger.info("Sending request to vendor for order status")
+
+        return make_api_call(
+            url=url,
+            data=data,
+            method=method,
+            header=headers,
+            default_ciphers=DEFAULT_CIPHERS,
+            client_key=self.kwargs.get('vendor_id'),
+            pool_maxsize=self.max_in_flight,
+            rate_limiter=self.rate_limiter,
+            retry_policy=self.retry_policy,
+            deadline=self.deadline,
+            circuit_breaker=self.circuit_breaker,
+            timeout=self.config_template.get("api_request_template").get("timeout", DEFAULT_REQUEST_TIMEOUT)
         )
-        queryset = execute_sql_query(sql)
-
-        headers = { item.get("key"):item.get("value") for item in self.config_template.get("api_request_template").get("header") }
-        for po in queryset.to_list():
-            self.logger.debug("Processing for vendor {%s} and ponumber {%s}" % (self.kwargs.get('vendor_id'), po.get("po_number")))
-            self.logger.info("Processing for vendor {%s} and ponumber {%s}" % (self.kwargs.get('vendor_id'), po.get("po_number")))
-
-            self.is_serialized = po.get("need_serial_no")
-            del po['need_serial_no']
-
-            template_str = json.dumps(self.config_template)
-            self.logger.info("Replacing template values for API request")
-
-            for k, v in po.items():
-                if (
-                    self.config_template.get("data")
-                    and self.config_template.get("data").get("payload_value_to_upper")
-                    and k in self.config_template.get("data").get("payload_value_to_upper")
-                ):
-                    v = str(v).upper()
-                template_str = template_str.replace(f'<<{k}>>', str(v))
-
-            self.required_template = json.loads(template_str)
-
-            self.logger.info("Sending request to vendor for order status")
-            method = self.required_template.get("api_request_template").get("url").get("method")
-            url = self.required_template.get("api_request_template").get("url").get("raw")
-            data = self.required_template.get("data").get("xml_payload") if method == 'POST' else None
-            if self.required_template.get("data").get("x-www-form-urlencoded"):
-                data = self.required_template.get("data").get("x-www-form-urlencoded")
-
-            response = make_api_call(
-                url=url,
-                data=data,
-                method=method,
-                header=headers,
-                default_ciphers=DEFAULT_CIPHERS
+
+    def has_response_body(self, response_deserialize: Dict, po: Dict) -> bool:
+        """
+        Checks the field set as check_response_body in vendor config exists in response of order
+        """
+        check_response_body = self.compiled_template.get(("check_response_body",), po)
+        if check_response_body and self.xml_flatten is not None:
+            # Flat record has a key for every leaf. Field exists when it is a leaf with a value, or
+            # when any leaf is under it whatever its value (eg: Order of <Order><Lines/></Order>)
+            prefix = check_response_body + "."
+            return any(
+                value is not None if key == check_response_body else key.startswith(prefix)
+                for key, value in response_deserialize.items()
             )
+        if check_response_body:
+            flat_json = flatten(
+                response_deserialize,
+                reducer="dot",
+                max_flatten_depth=len(check_response_body.split("."))
+            )
+            if flat_json.get(check_response_body) is None:
+                return False
+        return True
 
-            if len(response.text) == 0:
-                self.logger.error("Response from vendor has no content")
-                self.logger.error(response.reason, exc_info=True)
-                continue
+    def fetch_order(self, po: Dict) -> Union[Dict, None]:
+        """
+        Sends request to vendor for a single purchase order and returns deserialized response
+        """
 
-            if response.status_code not in range(200, 210):
-                self.logger.error("The response from an API is not valid")
-                self.logger.error("Could not get data from an API. API returned HTTP Status code: {}".format(response.status_code), exc_info=True)
-                continue
+        self.logger.debug("Processing for vendor {%s} and ponumber {%s}" % (self.kwargs.get('vendor_id'), po.get("po_number")))
+        self.logger.info("Processing for vendor {%s} and ponumber {%s}" % (self.kwargs.get('vendor_id'), po.get("po_number")))
+
+        is_serialized = po.pop('need_serial_no', None)
+
+        try:
+            response = self.send_request(po, po.get('po_number'))
+        except CircuitOpenError:
+            # Order is polled again in next run, it is not rescheduled as failed
+            self.deferred_orders.append(po)
+            return None
+
+        # Not modified response has no body to validate, its content is the one cached
+        if response.status_code == 304 and self.response_cache.is_unchanged(po.get('po_number'), response):
+            self.logger.info("Response of order {%s} is unchanged since it was last sent" % po.get('po_number'))
+            self.polled_orders.add(po.get('purchase_order_id'))
+            return None
+
+        if len(response.text) == 0:
+            self.logger.error("Response from vendor has no content")
+            self.logger.error(response.reason, exc_info=True)
+            return None
 
+        if response.status_code not in range(200, 210):
+            self.logger.error("The response from an API is not valid")
+            self.logger.error("Could not get data from an API. API returned HTTP Status code: {}".format(response.status_code), exc_info=True)
+            return None
+
+        if self.xml_flatten is not None:
+            response_deserialize = xml_to_flat_parser(response, self.xml_flatten.get("prefixes"))
+        else:
             response_deserialize = xml_to_json_parser(response)
 
-            if self.required_template.get("check_response_body"):
-                flat_json = flatten(
-                    response_deserialize,
-                    reducer="dot",
-                    max_flatten_depth=len(self.required_template.get("check_response_body").split("."))
-                )
-                if flat_json.get(self.required_template.get("check_response_body")) is None:
-                    continue
-
-            response_deserialize.update({
-                "__need_serial_number__": self.is_serialized,
+        # Order is rescheduled only when vendor answered it, failed orders stay due
+        self.polled_orders.add(po.get('purchase_order_id'))
+
+        if not self.has_response_body(response_deserialize, po):
+            return None
+
+        # Only valid responses are cached, so an error repeated by vendor is not taken as unchanged
+        if self.response_cache.is_unchanged(po.get('po_number'), response):
+            self.logger.info("Response of order {%s} is unchanged since it was last sent" % po.get('po_number'))
+            return None
+
+        # Flat records are already filtered by xml_flatten prefixes
+        if self.projection is not None and self.xml_flatten is None:
+            response_deserialize = self.projection.apply(response_deserialize)
+
+        response_deserialize.update({
+            "__need_serial_number__": is_serialized,
+            "__sales_order_number__": po.get('so_number')
+        })
+        return response_deserialize
+
+    def fetch_batch(self, purchase_orders: List[Dict]) -> List[Dict]:
+        """
+        Sends one request to vendor for a batch of purchase orders and splits the
+        deserialized response into a record per purchase order
+        """
+
+        self.logger.info(
+            "Processing for vendor {%s} and batch of %s ponumbers" % (self.kwargs.get('vendor_id'), len(purchase_orders)))
+
+        try:
+            response = self.send_request(self.batch.values(purchase_orders))
+        except CircuitOpenError:
+            self.deferred_orders.extend(purchase_orders)
+            return []
+
+        if len(response.text) == 0:
+            self.logger.error("Response from vendor has no content")
+            self.logger.error(response.reason, exc_info=True)
+            return []
+
+        if response.status_code not in range(200, 210):
+            self.logger.error("The response from an API is not valid")
+            self.logger.error("Could not get data from an API. API returned HTTP Status code: {}".format(response.status_code), exc_info=True)
+            return []
+
+        response_deserialize = xml_to_json_parser(response)
+
+        # Orders not found in the response are answered as well
+        self.polled_orders.update(po.get('purchase_order_id') for po in purchase_orders)
+
+        order_details = []
+        records = self.batch.demultiplex(response_deserialize, purchase_orders)
+        for po, record in records:
+            if not self.has_response_body(record, po):
+                continue
+
+            if self.response_cache.is_record_unchanged(po.get('po_number'), record):
+                self.logger.info("Response of order {%s} is unchanged since it was last sent" % po.get('po_number'))
+                continue
+
+            if self.projection is not None:
+                record = self.projection.apply(record)
+            record.update({
+                "__need_serial_number__": po.get('need_serial_no'),
                 "__sales_order_number__": po.get('so_number')
             })
-            self.order_detail_list.append(response_deserialize)
+            order_details.append(record)
+
+        if len(records) < len(purchase_orders):
+            self.logger.info("%s order(s) of batch not found in response" % (len(purchase_orders) - len(records)))
+        return order_details
+
+    def reschedule_orders(self, orders: List[Dict]) -> None:
+        """
+        Sets when each polled order is due again. Failure is only logged since
+        orders which are not rescheduled stay due and are polled in next run
+        """
+        try:
+            VbPurchaseOrder().update_polling_schedule([
+                {
+                    "id": order.get('purchase_order_id'),
+                    "next_check_at": self.polling_schedule.next_check_at(order)
+                }
+                for order in orders
+            ])
+        except Exception:
+            self.logger.error("Couldnot update polling schedule of orders", exc_info=True)
+
+    def extractor(self) -> Any:
+        # Fetch list of sales orders of a vendor for calling vendor api. Only orders
+        # due for polling are fetched, oldest due first and capped per run
+        self.polling_schedule = PollingSchedule(self.config_template.get("polling_schedule"))
+        sql = QUERY_SELECT_PURCHASE_ORDER_AND_SALESORDER % (
+            self.kwargs.get('vendor_id'),
+            PURCHASE_ORDER_STATUS_FOR_VENDOR_BILLING,
+            self.polling_schedule.max_orders_per_run
+        )
+        # Orders are kept for rescheduling after vendor calls, so they are read into a list here,
+        # without holding the cursor open over the calls. Rows are fetched in batches as dicts
+        with stream_sql_query(sql) as rows:
+            orders = list(rows)
+        self.logger.info("%s order(s) due for polling" % len(orders))
+        self.meta['due_orders'] = len(orders)
+
+        self.max_in_flight = self.config_template.get("api_request_template").get(
+            "max_in_flight", DEFAULT_MAX_IN_FLIGHT
+        )
+        self.rate_limiter = get_rate_limiter(
+            self.kwargs.get('vendor_id'),
+            self.max_in_flight,
+            self.config_template.get("api_request_template").get("rate_limit")
+        )
+        self.retry_policy = RetryPolicy(self.config_template.get("api_request_template").get("retry"))
+        self.circuit_breaker = get_circuit_breaker(
+            self.kwargs.get('vendor_id'),
+            self.config_template.get("api_request_template").get("circuit_breaker")
+        )
+        self.response_cache = ResponseCache(
+            self.kwargs.get('vendor_id'),
+            self.config_template.get("api_request_template").get("response_cache")
+        ).load()
+        self.logger.info("Fetching order status with %s request(s) in flight" % self.max_in_flight)
+
+        # Records of single order requests can be written already flattened
+        self.xml_flatten = self.config_template.get("xml_flatten")
+        if self.xml_flatten is not None and self.config_template.get("multi_field"):
+            self.logger.warning("xml_flatten is ignored as vendor config has multi_field")
+            self.xml_flatten = None
+
+        # Responses are stored with only the paths the extractor maps, when opted in by vendor config
+        response_projection = self.config_template.get("response_projection") or {}
+        if response_projection.get("enabled", True) and response_projection.get("at_fetch"):
+            self.projection = PathProjection(self.config_template)
+
+        # Responses are kept in the order of the purchase orders from the query
+        batch_config = self.config_template.get("api_request_template").get("batch")
+        if batch_config:
+            self.batch = OrderBatch(
+                batch_config,
+                order_number_field='po_number',
+                upper_keys=self.compiled_template.upper_keys
+            )
+            batches = self.batch.split(orders)
+            self.logger.info("Fetching %s order(s) in %s batch request(s)" % (len(orders), len(batches)))
+            for responses in map_bounded(self.fetch_batch, batches, self.max_in_flight):
+                self.order_detail_list.extend(responses or [])
+        else:
+            responses = map_bounded(
+                self.fetch_order,
+                orders,
+                self.max_in_flight
+            )
+            self.order_detail_list.extend(
+                response for response in responses if response is not None
+            )
+
+        self.logger.info("Rate limiter state after fetching: %s" % self.rate_limiter.state)
+
+        self.response_cache.save()
+        self.logger.info("%s unchanged response(s) skipped" % self.response_cache.unchanged)
+        self.meta['unchanged_orders'] = self.response_cache.unchanged
+
+        if self.deferred_orders:
+            self.logger.warning(
+                "%s order(s) deferred as circuit of vendor is open: %s" % (len(self.deferred_orders), self.circuit_breaker.summary))
+        self.meta['deferred_orders'] = len(self.deferred_orders)
+        self.meta['circuit_breaker'] = self.circuit_breaker.summary
+
+        # Deferred orders and orders whose request failed (eg: deadline reached, connection or
+        # parse error) were not polled, they are not backed off and stay due
+        deferred = {order.get('purchase_order_id') for order in self.deferred_orders}
+        failed_orders = [
+            order for order in orders
+            if order.get('purchase_order_id') not in self.polled_orders and order.get('purchase_order_id') not in deferred
+        ]
+        if failed_orders:
+            self.logger.warning("%s order(s) got no valid response from vendor and stay due" % len(failed_orders))
+        self.meta['failed_orders'] = len(failed_orders)
+        self.reschedule_orders([order for order in orders if order.get('purchase_order_id') in self.polled_orders])
 
         self.data = self.order_detail_list
         return self
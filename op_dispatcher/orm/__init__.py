@@ -2,3 +2,5 @@ from op_dispatcher.orm.billing import *
 from op_dispatcher.orm.sales_order import *
 from op_dispatcher.orm.billing_items import *
 from op_dispatcher.orm.purchase_order import *
+from op_dispatcher.orm.response_cache import *
+from op_dispatcher.orm.netsuite_sync_state import *
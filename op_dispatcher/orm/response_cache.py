@@ -0,0 +1,96 @@
+from op_dispatcher.sql_queries import (
+    QUERY_SELECT_VENDOR_RESPONSE_CACHE,
+    QUERY_UPSERT_VENDOR_RESPONSE_CACHE,
+    QUERY_CONFIRM_VENDOR_RESPONSE_CACHE
+)
+from op_dispatcher.common.orm_handler.base_orm import VBOrmBase
+from op_dispatcher.schema import VendorResponseCacheSchema
+from op_dispatcher.conf import get_logger, li_db
+from typing import Iterable, List
+
+
+logger = get_logger()
+
+
+class VbVendorResponseCache(VBOrmBase):
+    __table_name__ = 'vendor_response_cache'
+    __schema__ = VendorResponseCacheSchema()
+
+    def get_entries_of_vendor(
+        self,
+        vendor_id: int
+    ) -> List:
+        """
+        Get cached etag, last_modified and content hash of responses for given vendor_id
+        """
+        try:
+            with li_db.transaction(auto_commit=True) as query_set:
+                result_set = query_set.execute_query(
+                    QUERY_SELECT_VENDOR_RESPONSE_CACHE,
+                    {
+                        "vendor_id": vendor_id
+                    }
+                )
+                logger.debug(f'Executed Query {query_set.query}')
+                result_set = result_set.to_list()
+                return result_set
+        except Exception as ex:
+            logger.error("error while fetching response cache of vendor", exc_info=True)
+            raise ex
+
+    def bulk_update_or_create(
+        self,
+        data: List
+    ) -> None:
+
+        if len(data) < 1:
+            logger.info("No response cache entries to load")
+            return
+
+        columns = ", ".join(data[0].keys())
+        placeholders = ", ".join(['%s'] * len(data))
+        sql = QUERY_UPSERT_VENDOR_RESPONSE_CACHE % (
+            self.__table_name__,
+            columns,
+            placeholders,
+        )
+
+        value_list = [tuple(obj.values()) for obj in data]
+
+        logger.info("Loading response cache of vendor into DB")
+        try:
+            with li_db.transaction(auto_commit=True) as query_set:
+                query_set.execute_query(sql, tuple(value_list))
+                logger.debug(f'Executed Query {sql}')
+        except Exception as e:
+            logger.error(f'Error while executing {sql}', exc_info=True)
+            raise e
+
+        return
+
+    def confirm_sent(
+        self,
+        vendor_id: int,
+        order_numbers: Iterable[str]
+    ) -> None:
+        """
+        Marks the pending responses of given orders of a vendor as sent, once
+        the dispatcher has committed them
+        """
+        order_numbers = sorted(set(order_numbers))
+        if not order_numbers:
+            return
+
+        try:
+            with li_db.transaction(auto_commit=True) as query_set:
+                query_set.execute_query(
+                    QUERY_CONFIRM_VENDOR_RESPONSE_CACHE,
+                    {
+                        "vendor_id": vendor_id,
+                        "order_numbers": order_numbers
+                    }
+                )
+                logger.debug(f'Executed Query {query_set.query}')
+        except Exception as ex:
+            logger.error("error while confirming response cache of vendor", exc_info=True)
+            raise ex
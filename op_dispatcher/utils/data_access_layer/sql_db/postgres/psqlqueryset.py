@@ -4,11 +4,14 @@
 DB query should happens through this
 """
 
-from typing import Optional, Sequence, Type
+import time
+import uuid
+from typing import Any, Optional, Sequence, Type, Union
 
 from psycopg2.extensions import cursor as c
 
-from op_dispatcher.utils.data_access_layer.sql_db.postgres.psqlresultset import PgSQlResultSet
+from op_dispatcher.utils.data_access_layer.sql_db.postgres.pgsqlstats import PgSQLInstrumentation, estimate_bytes
+from op_dispatcher.utils.data_access_layer.sql_db.postgres.psqlresultset import PgSQlResultSet, PgSQlStreamResultSet
 from op_dispatcher.utils.data_access_layer.sql_db.querysetbase import QuerySet
 
 
@@ -16,15 +19,49 @@ class PgSQlQuerySet(QuerySet):
     """Concrete `PgSQL Queryset` class for all query operations.
     :param:cursor: `psycopg2` cursor for query execution
     :type cursor: `<class 'psycopg2.extensions.cursor'>`
+
+    :param instrumentation: Records time, rows and fingerprint of every statement, optional
+    :type instrumentation: PgSQLInstrumentation
     """
 
-    def __init__(self, cursor: Type[c]) -> None:
+    def __init__(self, cursor: Type[c], instrumentation: Optional[PgSQLInstrumentation] = None) -> None:
         """Constructor for `PgSQlQuerySet`
         :param:cursor: `psycopg2` cursor for query execution
         :type cursor: `<class 'psycopg2.extensions.cursor'>`
+
+        :param instrumentation: Records time, rows and fingerprint of every statement, optional
+        :type instrumentation: PgSQLInstrumentation
         """
         super().__init__(cursor)
-        self.query = None
+        self.instrumentation = instrumentation
+        self._query = None
+        # Whether cursor.query holds the last statement, it is not set by COPY
+        self._bound = False
+        self._executed_by = cursor
+        self._streams = []
+
+    @property
+    def query(self) -> Union[None, str, bytes]:
+        """Last statement executed, with its parameters bound as it was sent
+        to the server. Parameters are not serialized again to build it.
+
+        :return: executed query
+        :rtype: bytes
+        """
+        if self._bound and self._executed_by.query is not None:
+            return self._executed_by.query
+        return self._query
+
+    def _record(self, started: float, rowcount: int, rows: Optional[Sequence] = None) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.record(
+                self.cursor,
+                self._query,
+                (time.perf_counter() - started) * 1000,
+                rowcount,
+                rows,
+                bound=self._bound
+            )
 
     def execute_non_query(self, query: str, data: Optional[Sequence] = None) -> None:
         """Method for executing result not returning query.
@@ -35,8 +72,10 @@ class PgSQlQuerySet(QuerySet):
         :param data: Data assocaited with the query. e.g: Data for delete statement.
         :type data: tuple, optional
         """
-        self.query = self.cursor.mogrify(query, data)
+        self._query, self._bound, self._executed_by = query, True, self.cursor
+        started = time.perf_counter()
         self.cursor.execute(query, data)
+        self._record(started, self.cursor.rowcount)
 
     def execute_query(self, query: str, data: Optional[Sequence] = None) -> PgSQlResultSet:
         """Method for executing result returning query.
@@ -50,6 +89,79 @@ class PgSQlQuerySet(QuerySet):
         :return: `PgSQlResultSet` query result.
         :rtype: PgSQlResultSet
         """
-        self.query = self.cursor.mogrify(query, data)
+        self._query, self._bound, self._executed_by = query, True, self.cursor
+        started = time.perf_counter()
         self.cursor.execute(query, data)
-        return PgSQlResultSet(self.cursor)
+        result_set = PgSQlResultSet(self.cursor)
+        if result_set.raw_data is not None:
+            self._record(started, len(result_set), result_set.raw_data[1])
+        else:
+            self._record(started, self.cursor.rowcount)
+        return result_set
+
+    def execute_copy(self, query: str, stream: Any, size: int = 65536) -> int:
+        """Method for executing `COPY ... FROM STDIN` with data read from a stream.
+
+        Rows are sent to the server as the stream is read, so they are never
+        held in memory as one statement.
+
+        :param query: `COPY ... FROM STDIN` statement to execute,
+        :type query: str
+
+        :param stream: Readable file like object with data in format of the `COPY` statement.
+        :type stream: file like object
+
+        :param size: Size of blocks read from stream, defaults to 65536
+        :type size: int, optional
+
+        :return: Number of rows copied.
+        :rtype: int
+        """
+        self._query, self._bound, self._executed_by = query, False, self.cursor
+        started = time.perf_counter()
+        self.cursor.copy_expert(query, stream, size)
+        self._record(started, self.cursor.rowcount)
+        return self.cursor.rowcount
+
+    def stream_query(self, query: str, data: Optional[Sequence] = None, itersize: int = None) -> PgSQlStreamResultSet:
+        """Method for executing result returning query on a server side cursor.
+        Rows are fetched as they are read, instead of all at once.
+
+        Rows must be read inside the transaction of this queryset, see `PgSQlStreamResultSet`.
+
+        :param query: Query string to execute,
+        :type query: str
+
+        :param data: Data assocaited with the query.
+        :type data: tuple, optional
+
+        :param itersize: Rows fetched in one round trip, defaults to `DEFAULT_ITERSIZE`
+        :type itersize: int, optional
+
+        :return: `PgSQlStreamResultSet` query result.
+        :rtype: PgSQlStreamResultSet
+        """
+        cursor = self.cursor.connection.cursor(name="stream_%s" % uuid.uuid4().hex)
+        self._query, self._bound, self._executed_by = query, True, cursor
+        started = time.perf_counter()
+        cursor.execute(query, data)
+        execute_ms = (time.perf_counter() - started) * 1000
+
+        on_close, estimate = None, None
+        if self.instrumentation is not None:
+            def on_close(rowcount: int, nbytes: int, fetch_ms: float) -> None:
+                # Time spent by the caller on the rows is not counted. DECLARE of
+                # a named cursor is logged without parameters and not explained
+                self.instrumentation.record(
+                    cursor, query, execute_ms + fetch_ms, rowcount, bound=False, nbytes=nbytes
+                )
+            estimate = estimate_bytes if self.instrumentation.measure_bytes else None
+
+        result_set = PgSQlStreamResultSet(cursor, itersize, on_close, estimate)
+        self._streams.append(result_set)
+        return result_set
+
+    def close(self) -> None:
+        """Closes server side cursors of `stream_query` which are still open."""
+        while self._streams:
+            self._streams.pop().close()
@@ -1,10 +1,14 @@
 
 """Concrete `PgSQL ResultSet` class for all query result processing.
 
-DB query results should be processed here.
+DB query results should be processed here. `PgSQlResultSet` fetches all
+rows when the query is executed, `PgSQlStreamResultSet` fetches them from a
+server side cursor as they are iterated.
 """
 
-from typing import Dict, List, Type, Any, Union
+from itertools import islice
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Type, Any, Union
 
 import pandas as pd
 import psycopg2
@@ -37,19 +41,8 @@ class PgSQlResultSet(ResultSet):
         # self._raw_data could be none if not result returning query is executed as result returning
         # this conditional is for fail safe.
         if self._raw_data is not None:
-            cursor_data = self._raw_data
-            columns = cursor_data[0]
-            rows_data = cursor_data[1]
-
-            result = [
-                {
-                    columns[index][0]:column for
-                    index, column in enumerate(value)
-                }
-                for value in rows_data
-            ]
-
-            return result
+            columns = self.columns
+            return [dict(zip(columns, row)) for row in self._raw_data[1]]
         else:
             return []
 
@@ -66,7 +59,45 @@ class PgSQlResultSet(ResultSet):
         :return: cursor data parsed to pandas dataframe.
         :rtype: pandas.DataFrame
         """
-        return pd.DataFrame(self.to_list())
+        if self._raw_data is None:
+            return pd.DataFrame([])
+        return pd.DataFrame.from_records(self._raw_data[1], columns=self.columns)
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Property to get column names of the result, empty when query returned no result.
+
+        :return: column names in order of the row tuples
+        :rtype: tuple
+        """
+        if self._raw_data is None:
+            return ()
+        return tuple(column[0] for column in self._raw_data[0])
+
+    def iter_tuples(self) -> Iterator[Tuple]:
+        """Method to iterate rows as tuples, values in order of `columns`.
+
+        :return: iterator over row tuples
+        :rtype: Iterator[tuple]
+        """
+        return iter(self._raw_data[1] if self._raw_data is not None else [])
+
+    def iter_batches(self, size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Method to iterate rows as lists of at most size dictionaries.
+
+        :param size: rows in a batch
+        :type size: int
+
+        :return: iterator over lists of dictionaries
+        :rtype: Iterator[list]
+        """
+        columns = self.columns
+        rows = self.iter_tuples()
+        while True:
+            batch = [dict(zip(columns, row)) for row in islice(rows, size)]
+            if not batch:
+                return
+            yield batch
 
     def fetch_data(self) -> Union[None, tuple]:
         """Private method to fetch cursor description (columns data) and cursor
@@ -100,6 +131,15 @@ class PgSQlResultSet(ResultSet):
         """
         return self.fetch_data()
 
+    @property
+    def raw_data(self) -> Union[None, tuple]:
+        """Property to get raw data already fetched from cursor, without fetching again.
+
+        :return: Same as `raw`, None when query returned no result.
+        :rtype: tuple
+        """
+        return self._raw_data
+
     @property
     def rowcount(self) -> int:
         """Property to get cursor row count.
@@ -144,3 +184,237 @@ class PgSQlResultSet(ResultSet):
         #noqa: DAR201:
         """
         return f'<PgSQlResultSet> for {self.query}'
+
+
+# Rows fetched from server side cursor in one round trip when not set
+DEFAULT_ITERSIZE = 2000
+
+
+class PgSQlStreamResultSet(ResultSet):
+    """`PgSQL ResultSet` over a named (server side) cursor. Rows are fetched
+    `itersize` at a time as they are iterated, so a large result is never
+    held in memory as a whole.
+
+    Rows can be read once, and only inside the transaction the query was
+    executed in. Cursor is closed when all rows are read, by `close()` or
+    at the end of the transaction.
+
+    E.g:
+        ```
+        with li_db.transaction() as query_set:
+            for row in query_set.stream_query('SELECT ...', itersize=5000):
+                ...
+        ```
+
+    :param cursor: Named `psycopg2` cursor through which query is executed.
+    :type cursor: psycopg2.cursor
+
+    :param itersize: Rows fetched in one round trip, defaults to `DEFAULT_ITERSIZE`
+    :type itersize: int, optional
+
+    :param on_close: Called with rows, approximate bytes read and milliseconds spent
+                     fetching them when cursor is closed
+    :type on_close: Callable, optional
+
+    :param estimate_bytes: Returns approximate size of fetched rows, bytes are
+                           not counted without it
+    :type estimate_bytes: Callable, optional
+    """
+
+    def __init__(
+        self,
+        cursor: Type[c],
+        itersize: int = None,
+        on_close: Optional[Callable[[int, int, float], None]] = None,
+        estimate_bytes: Optional[Callable[[List[Tuple]], int]] = None
+    ) -> None:
+        super().__init__(cursor)
+        self.itersize = itersize or DEFAULT_ITERSIZE
+        self.on_close = on_close
+        self.estimate_bytes = estimate_bytes
+        self.rows_read = 0
+        self.bytes_read = 0
+        self.fetch_seconds = 0.0
+        self.closed = False
+        self._columns = None
+        # Rows fetched by __bool__ which are not read yet
+        self._peeked = []
+
+    def _fetch(self, size: int) -> List[Tuple]:
+        if self._peeked:
+            rows, self._peeked = self._peeked[:size], self._peeked[size:]
+            return rows
+        if self.closed:
+            return []
+        started = time.perf_counter()
+        rows = self.cursor.fetchmany(size)
+        self.fetch_seconds += time.perf_counter() - started
+        self.rows_read += len(rows)
+        if self.estimate_bytes is not None:
+            self.bytes_read += self.estimate_bytes(rows)
+        if self._columns is None and self.cursor.description is not None:
+            # Description of a named cursor is known after first fetch
+            self._columns = tuple(column[0] for column in self.cursor.description)
+        if len(rows) < size:
+            self.close()
+        return rows
+
+    @property
+    def _exhausted(self) -> bool:
+        return self.closed and not self._peeked
+
+    def close(self) -> None:
+        """Closes the server side cursor, rows which are not read yet are discarded."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if not self.cursor.closed:
+                self.cursor.close()
+        except psycopg2.Error:
+            # Cursor is gone with its transaction
+            pass
+        if self.on_close is not None:
+            self.on_close(self.rows_read, self.bytes_read, self.fetch_seconds * 1000)
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Property to get column names of the result. Known once first rows
+        are fetched, empty before.
+
+        :return: column names in order of the row tuples
+        :rtype: tuple
+        """
+        return self._columns or ()
+
+    def iter_tuples(self) -> Iterator[Tuple]:
+        """Method to iterate rows as tuples, values in order of `columns`.
+        Column names are kept once in `columns` instead of in every row.
+
+        :return: iterator over row tuples
+        :rtype: Iterator[tuple]
+        """
+        while True:
+            rows = self._fetch(self.itersize)
+            yield from rows
+            if self._exhausted:
+                return
+
+    def iter_batches(self, size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Method to iterate rows as lists of at most size dictionaries, each
+        batch fetched in one round trip.
+
+        :param size: rows in a batch
+        :type size: int
+
+        :return: iterator over lists of dictionaries
+        :rtype: Iterator[list]
+        """
+        while True:
+            rows = self._fetch(size)
+            if rows:
+                columns = self.columns
+                yield [dict(zip(columns, row)) for row in rows]
+            if self._exhausted:
+                return
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterates rows as dictionaries, fetched itersize at a time."""
+        for batch in self.iter_batches(self.itersize):
+            yield from batch
+
+    def pre_process(self) -> List[Dict[str, Any]]:
+        """Method to read all remaining rows as list of dictionaries.
+
+        :return: list of dictionaries
+        :rtype: list
+        """
+        return list(self)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Method to read all remaining rows as list of dictionaries.
+
+        :return: list of dictionaries
+        :rtype: list
+        """
+        return self.pre_process()
+
+    def to_df(self, chunksize: int = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """Method to parse remaining rows to `pandas.DataFrame`, built from row
+        tuples without a dictionary per row.
+
+        :param chunksize: When set, returns iterator of dataframes of at most
+                          chunksize rows instead of one dataframe
+        :type chunksize: int, optional
+
+        :return: cursor data parsed to pandas dataframe, or iterator of them
+        :rtype: pandas.DataFrame
+        """
+        if chunksize:
+            return self._iter_df(chunksize)
+
+        # Columns are known once rows are fetched
+        rows = list(self.iter_tuples())
+        return pd.DataFrame.from_records(rows, columns=self.columns)
+
+    def _iter_df(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        while True:
+            rows = self._fetch(chunksize)
+            if rows:
+                yield pd.DataFrame.from_records(rows, columns=self.columns)
+            if self._exhausted:
+                return
+
+    @property
+    def raw(self) -> Union[None, tuple]:
+        """Property to get all remaining rows from cursor.
+
+        :return: cursor description with list of remaining row tuples.
+        :rtype: tuple
+        """
+        rows = list(self.iter_tuples())
+        return self.cursor.description, rows
+
+    @property
+    def rowcount(self) -> int:
+        """Property to get rows read so far from cursor.
+
+        :return: rows read
+        :rtype: int
+        """
+        return self.rows_read
+
+    @property
+    def query(self) -> str:
+        """Property to get query executed in the given cursor.
+
+        :return: executed query in the given cursor
+        :rtype: str
+        """
+        return self.cursor.query
+
+    def __len__(self) -> int:
+        """Rows read so far, total rows are known once all of them are read.
+
+        :return: row count in int
+        :rtype: int
+        """
+        return self.rows_read
+
+    def __bool__(self) -> bool:
+        """True when query returned any row. Before rows are read the first
+        `itersize` of them are fetched to know it, and are still iterated.
+
+        :return: whether result has rows
+        :rtype: bool
+        """
+        if not self.rows_read and not self.closed:
+            self._peeked = self._fetch(self.itersize)
+        return self.rows_read > 0
+
+    def __repr__(self):
+        """Repr.
+
+        #noqa: DAR201:
+        """
+        return f'<PgSQlStreamResultSet> for {self.query}'
@@ -6,14 +6,15 @@ DB query result are processed here.
 All concrete class should inherit this base class and override
 it public methods for implementation.
 
+Rows are iterated as dictionaries, as tuples or in batches, so a concrete
+class can stream them from the cursor instead of fetching all at once.
+
 TODO:
-    1. Refractor this abstract class to iterable/generator class
-    2. Introduce abstractmethods to iterate through cursor.
-    3. Provide more public method to interact with cursor.
+    1. Provide more public method to interact with cursor.
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Tuple
 
 import pandas as pd
 
@@ -46,6 +47,27 @@ class ResultSet(ABC):
         """Abstract method to parse cursor data to `pandas.DataFrame`"""
         pass
 
+    @abstractmethod
+    def iter_tuples(self) -> Iterator[Tuple]:
+        """Abstract method to iterate rows as tuples, in order of `columns`."""
+        pass
+
+    @abstractmethod
+    def iter_batches(self, size: int) -> Iterator[List[Dict]]:
+        """Abstract method to iterate rows as lists of at most size dictionaries."""
+        pass
+
+    @property
+    @abstractmethod
+    def columns(self) -> Tuple[str, ...]:
+        """Abstract property to get column names of the result."""
+        pass
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Iterates rows as dictionaries of column name and value."""
+        for batch in self.iter_batches(1000):
+            yield from batch
+
     @property
     @abstractmethod
     def raw(self) -> Any:
@@ -19,7 +19,10 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             "vendor_id": obj.get('vendor_id'),
             "template_values": obj.get('template_values'),
             "config_file_path": obj.get('config_file_path'),
-            "extractor_file_path": extractor.meta['extractor_data_file_path']
+            "extractor_file_path": extractor.meta.get('extractor_data_file_path'),
+            "deferred_orders": extractor.meta.get('deferred_orders', 0),
+            "circuit_breaker": extractor.meta.get('circuit_breaker'),
+            "query_stats": extractor.meta.get('query_stats')
            }
     except Exception as exe:
         logging.error(exe, exc_info=True)
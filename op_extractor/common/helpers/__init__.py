@@ -1,7 +1,19 @@
-from op_extractor.common.helpers.mapper_helpers import map_object_with_config
-from op_extractor.common.helpers.json_flattener import json_flattener
+from op_extractor.common.helpers.mapper_helpers import map_object_with_config, get_mapping_plan
+from op_extractor.common.helpers.json_flattener import json_flattener, unflatten
+from op_extractor.common.helpers.xml_flattener import xml_flattener
 from op_extractor.common.helpers.azure_blob import connect_blob
 from op_extractor.common.helpers.transform_helpers import *
 from op_extractor.common.helpers.extractor_helpers import *
 from op_extractor.common.helpers.common_helpers import *
 from op_extractor.common.helpers.http import *
+from op_extractor.common.helpers.concurrency import *
+from op_extractor.common.helpers.rate_limiter import *
+from op_extractor.common.helpers.template_helpers import *
+from op_extractor.common.helpers.polling_schedule import *
+from op_extractor.common.helpers.batch_helpers import *
+from op_extractor.common.helpers.artifacts import *
+from op_extractor.common.helpers.retry import *
+from op_extractor.common.helpers.circuit_breaker import *
+from op_extractor.common.helpers.projection import *
+from op_extractor.common.helpers.config_cache import *
+from op_extractor.common.helpers.storage import *
@@ -1,19 +1,143 @@
 import requests
-from typing import Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.ssl_ import create_urllib3_context
+from urllib.parse import urlsplit, urlencode
+from typing import Any, Dict, Tuple
 import oauthlib.oauth1
+import threading
+import time
+import os
 from flatten_dict import flatten
 from op_extractor.constants import (
     CONFIG,
     METHOD_URL,
     OAUTH1_ENV,
     NETSUITE_ENV,
+    HTTP_CLIENT,
     ConfigFields
 )
+from op_extractor.common.helpers.circuit_breaker import CircuitOpenError
 from op_extractor.conf import get_logger
 
 
 logger = get_logger()
 ENV = CONFIG.get(ConfigFields.ENVIRONMENT.value).title()
+HTTP_CLIENT_CONFIG = CONFIG.get(HTTP_CLIENT, {})
+
+
+class CipherAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that carries its own ssl context, so that vendor specific
+    ciphers (eg: Techdata) are applied only to the connections of that vendor
+    instead of overwriting urllib3 DEFAULT_CIPHERS for the whole process
+    """
+
+    def __init__(self, ciphers: str = None, **kwargs) -> None:
+        self.ciphers = ciphers
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        if self.ciphers:
+            kwargs['ssl_context'] = create_urllib3_context(ciphers=self.ciphers)
+        return super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, *args, **kwargs) -> Any:
+        if self.ciphers:
+            kwargs['ssl_context'] = create_urllib3_context(ciphers=self.ciphers)
+        return super().proxy_manager_for(*args, **kwargs)
+
+
+class HTTPClientRegistry:
+    """
+    Registry of long-lived requests.Session objects keyed by vendor/host.
+
+    Sessions live at module level, so they are shared by every fetcher and
+    extractor running inside a warm worker and keep their connections alive
+    between orders and between invocations.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10
+    ) -> None:
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def build_key(
+        url: str,
+        client_key: Any = None,
+        ciphers: str = None
+    ) -> Tuple[str, str, str]:
+        host = urlsplit(url).netloc.lower()
+        return (str(client_key) if client_key is not None else host, host, ciphers)
+
+    def create_session(
+        self,
+        url: str,
+        ciphers: str = None,
+        pool_maxsize: int = None
+    ) -> requests.Session:
+        session = requests.Session()
+
+        # Resolve proxy and CA bundle settings once per session instead of
+        # re-reading environment and netrc on every request
+        session.trust_env = False
+        session.proxies.update(requests.utils.get_environ_proxies(url))
+        ca_bundle = os.environ.get('REQUESTS_CA_BUNDLE') or os.environ.get('CURL_CA_BUNDLE')
+        if ca_bundle:
+            session.verify = ca_bundle
+
+        adapter = CipherAdapter(
+            ciphers=ciphers,
+            pool_connections=self.pool_connections,
+            pool_maxsize=max(pool_maxsize or 0, self.pool_maxsize)
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def get_session(
+        self,
+        url: str,
+        client_key: Any = None,
+        ciphers: str = None,
+        pool_maxsize: int = None
+    ) -> requests.Session:
+        key = self.build_key(url, client_key, ciphers)
+        session = self._sessions.get(key)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                logger.debug("Creating http session for %s" % (key,))
+                session = self.create_session(url, ciphers, pool_maxsize)
+                self._sessions[key] = session
+        return session
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self._sessions),
+            "keys": [key[0] for key in self._sessions.keys()]
+        }
+
+
+http_clients = HTTPClientRegistry(
+    pool_connections=HTTP_CLIENT_CONFIG.get('pool_connections', 10),
+    pool_maxsize=HTTP_CLIENT_CONFIG.get('pool_maxsize', 10)
+)
 
 
 def make_api_call(
@@ -22,29 +146,76 @@ def make_api_call(
     header: str,
     data: str = None,
     timeout: int = 10,
-    default_ciphers: str = None
+    default_ciphers: str = None,
+    client_key: Any = None,
+    pool_maxsize: int = None,
+    rate_limiter: Any = None,
+    retry_policy: Any = None,
+    deadline: Any = None,
+    circuit_breaker: Any = None
 ) -> requests.Response:
 
-    # For Techdata request add ciphers
-    if default_ciphers:
-        logger.debug("Adding ciphers in request")
-        requests.packages.urllib3.util.ssl_.DEFAULT_CIPHERS = default_ciphers
+    # For Techdata request the ciphers are scoped to the session of that vendor
+    session = http_clients.get_session(
+        url=url,
+        client_key=client_key,
+        ciphers=default_ciphers,
+        pool_maxsize=pool_maxsize
+    )
+
+    def send(attempt: int) -> requests.Response:
+        if deadline is not None and deadline.expired():
+            raise Exception("Invocation deadline reached before request to vendor")
+
+        # Request is not sent at all while vendor API is known to be failing
+        if circuit_breaker is not None and not circuit_breaker.allow():
+            raise CircuitOpenError("Circuit of {} is open".format(circuit_breaker.key))
+
+        try:
+            # Wait for a free slot of the vendor before sending request, not past the deadline
+            if rate_limiter:
+                rate_limiter.acquire(deadline)
+
+            # Deadline can be reached while waiting, then the request would get no time at all
+            if deadline is not None and deadline.expired():
+                if rate_limiter:
+                    rate_limiter.cancel()
+                raise Exception("Invocation deadline reached before request to vendor")
+        except BaseException:
+            # Request is not sent, trial request of a half open circuit is given back
+            if circuit_breaker is not None:
+                circuit_breaker.release_trial()
+            raise
+
+        response = None
+        started_at = time.monotonic()
+        try:
+            response = session.request(
+                url=url,
+                method=method,
+                headers=header,
+                timeout=deadline.clamp(timeout) if deadline is not None else timeout,
+                data=data if method == "POST" else None
+            )
+        finally:
+            if rate_limiter:
+                rate_limiter.release(response, time.monotonic() - started_at)
+            if circuit_breaker is not None:
+                circuit_breaker.record(response is not None and response.status_code < 500)
+        return response
 
     try:
-        response = requests.request(
-            url=url,
-            method=method,
-            headers=header,
-            timeout=timeout,
-            data=data if method == "POST" else None
-        )
+        if retry_policy:
+            return retry_policy.call(send, method, deadline)
+        return send(1)
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(
             "Error during request to vendor for order status",
             exc_info=True
         )
         raise Exception(e)
-    return response
 
 
 def setup_netsuite_api_config(self) -> Any:
@@ -97,7 +268,7 @@ def setup_netsuite_api_config(self) -> Any:
     return flat_request_config, client
 
 
-def create_oauth_authorization(self, method: str = 'GET'):
+def create_oauth_authorization(self, method: str = 'GET', params: Dict = None):
     logger.debug("Preparing Oauth1 Client")
     flat_request_config, client = setup_netsuite_api_config(
         self=self
@@ -111,5 +282,9 @@ def create_oauth_authorization(self, method: str = 'GET'):
         )
     )
 
+    # Query params (eg: page of saved search) are part of the signed url
+    if params:
+        req_url = req_url + ('&' if '?' in req_url else '?') + urlencode(params)
+
     url, headers, _ = client.sign(req_url)
     return url, headers, method
@@ -1,9 +1,18 @@
 from op_extractor.constants import SKIPPING_CONSTANTS, SYMBOLS_IN_TECH_DATA_MAPPINGS
 from op_extractor.common.helpers.common_helpers import get_index_from_string
-from typing import Dict
+from typing import Any, Dict, List, Tuple
+import threading
+import hashlib
+import json
 import re
 
 
+DIGIT_PATTERN = re.compile('[0-9]')
+
+# Routes of flattened keys kept per plan, cleared when a plan has seen more keys
+MAX_ROUTED_KEYS = 100000
+
+
 def first_type_mapper(
     self,
     fld: str,
@@ -54,16 +63,20 @@ def second_type_mapper(
     self,
     fld: str,
     item: Dict,
-    tmp_dict: Dict
+    tmp_dict: Dict,
+    keys: List[str] = None
 ):
     """
     Mapping specific sign to it a certain field.
     Special case for Techdata.
+
+    :param keys: keys of item ending with the field, all keys of item if not given
+    :type keys: list
     """
 
     sign = SYMBOLS_IN_TECH_DATA_MAPPINGS.get(fld)
     field_to_find = fld[:fld.find(f"['{sign}']")]
-    for k, _ in item.items():
+    for k in (item.keys() if keys is None else keys):
         if k.endswith(field_to_find) and item[k] == f'{sign}':
             req_fld = k[:-len(field_to_find)] + 'RefID'
             tmp_dict[self.field_mapping[fld]] = item.get(req_fld)
@@ -71,57 +84,214 @@ def second_type_mapper(
     return
 
 
-def check_is_last_index_digit_and_set_condition(
-    self,
-    key,
-    key_words,
-    field_to_endwith,
-    field_to_startwith,
-    is_last_index_digit
-):
+def insert_or_update(
+    tmp_list: List,
+    idx: int,
+    field: str,
+    value: Any
+) -> None:
     """
-    Sets condition for if statement on the basis of is_last_index_digit
+    Sets field of object at idx, object is inserted at idx if list is not that long
     """
+    if tmp_list and len(tmp_list) >= (idx+1):
+        tmp_list[idx].update({field: value})
+    else:
+        tmp_list.insert(idx, {field: value})
 
-    # Separating condition for items with field_to_endwith having last index digit and not.
-    key_first = key_words[0]
-    key_last = key_words[-1]
-    # If last index is digit then condition for if-statement will be according to second last index since our last index is digit
-    if (key_last.isdigit() or re.search('[0-9]', key_last)) and len(key_words) > 1:
-        key_last = key_words[-2]
-    if self.config_template.get("field_to_start_with_split_again"):
-        field_to_startwith = field_to_startwith.split('.')[0]
-    if_statement_condition = (key_first == field_to_startwith and key_last == field_to_endwith)
-    return if_statement_condition
-
-
-def set_is_last_index_digit(
-    field_to_endwith,
-    field_to_startwith
-) -> bool:
+
+class MappingPlan:
     """
-    Sets value of is_last_index_digit
+    `mapping.fulfillment_table` of a vendor compiled into the mapper of each
+    field and an index from flattened keys to the fields they are mapped to.
+
+    Fields whose source has `[i]`, or which are mapped into a list of the table
+    (eg: `items.itemno`), take their values from many keys of the flattened
+    response. They are matched by first and last word of the key (a last word
+    with a digit is skipped), or by start of the key. Each key of a response is
+    routed once, routes are remembered across orders of the vendor, then
+    fields are mapped in order of field_mapping from only their own keys.
+    Fields matched by start or end of the key are indexed by that start or
+    end, so a new key is checked only against fields it can match.
     """
 
-    # Check if field_to_startwith and field_to_endwith has '[i]'.
-    # If field_to_endwith has then last index will be digit
-    is_last_index_digit = False
-    if field_to_startwith.find('[i]') != -1:
-        field_to_startwith = field_to_startwith[:field_to_startwith.find('[i]')]
-    if field_to_endwith.find('[i]') != -1:
-        field_to_endwith = field_to_endwith[:field_to_endwith.find('[i]')]
-        is_last_index_digit = True
-    return is_last_index_digit
+    def __init__(self, field_mapping: Dict, config: Dict) -> None:
+        self.field_mapping = field_mapping
+        self.position_for_nesting = config.get("position_for_checking_idx_for_nesting")
+        self.position_for_deliveries = config.get("position_for_checking_idx_deliveries")
+        make_items_inside_items = config.get("make_items_inside_items")
+        self.field_to_nest = make_items_inside_items.get("field_to_nest") if make_items_inside_items else None
+
+        self.fields = []
+        self.by_words = {}
+        self.by_prefix = {}
+        self.prefix_lengths = set()
+        self.by_suffix = {}
+        self.suffix_lengths = set()
+        self.routes = {}
+        self.indexes = {}
+        self._lock = threading.Lock()
+
+        for fld, target in field_mapping.items():
+            if len(fld) == 0:
+                continue
+            self.compile_field(fld, target)
+
+    def compile_field(self, fld: str, target: str) -> None:
+        position = len(self.fields)
+        targets = target.split(".")
+        entry = {
+            "fld": fld,
+            "target": target,
+            "target_first": targets[0],
+            "target_second": targets[-1],
+            "kind": None
+        }
+        self.fields.append(entry)
+
+        # RefIDQual['IN'] & RefIDQual['ON'] --> For techdata
+        if fld in SYMBOLS_IN_TECH_DATA_MAPPINGS.keys():
+            sign = SYMBOLS_IN_TECH_DATA_MAPPINGS.get(fld)
+            self.add_suffix(-position - 1, fld[:fld.find(f"['{sign}']")])
+
+        fields = fld.split(".")
+        if_fld_has_multi = fld.find('[i]')
+        if if_fld_has_multi != -1:
+            field_to_startwith = fld[:if_fld_has_multi].split('.')[0]
+            field_to_endwith = fields[-1].split('.')[-1]
+
+            if len(fields) > 1 and len(targets) > 1:
+                entry["kind"] = "third"
+                self.by_words.setdefault((field_to_startwith, field_to_endwith), []).append(position)
+            elif len(targets) > 1 and len(fields) == 1:
+                entry["kind"] = "fourth"
+                self.add_prefix(position, field_to_startwith, None)
+            else:
+                entry["kind"] = "join"
+                entry["only_values"] = False
+                if field_to_endwith.find("[i]") != -1:
+                    self.add_prefix(position, field_to_startwith, None)
+                elif field_to_startwith.find("[i]") != -1:
+                    self.add_prefix(position, "", field_to_endwith)
+                else:
+                    entry["only_values"] = target == "ship_date"
+                    self.add_prefix(position, field_to_startwith, field_to_endwith)
+
+        elif len(targets) > 1:
+            entry["kind"] = "fifth"
+            self.by_words.setdefault((fields[0], fields[-1]), []).append(position)
+
+    def add_prefix(self, position: int, field_to_startwith: str, field_to_endwith: str = None) -> None:
+        self.by_prefix.setdefault(field_to_startwith, []).append((position, field_to_endwith))
+        self.prefix_lengths.add(len(field_to_startwith))
+
+    def add_suffix(self, position: int, field_to_find: str) -> None:
+        self.by_suffix.setdefault(field_to_find, []).append(position)
+        self.suffix_lengths.add(len(field_to_find))
+
+    def route(self, key: str) -> Tuple:
+        """
+        Returns positions of fields the key is mapped to. Negative positions
+        are techdata fields
+        """
+        key_words = key.split('.')
+        key_last = key_words[-1]
+        # If last index is digit then key is matched with second last index
+        if len(key_words) > 1 and DIGIT_PATTERN.search(key_last):
+            key_last = key_words[-2]
+
+        positions = list(self.by_words.get((key_words[0], key_last), ()))
+
+        # Only fields whose start or end is the start or end of the key are checked
+        for length in self.prefix_lengths:
+            if len(key) < length:
+                continue
+            for position, field_to_endwith in self.by_prefix.get(key[:length], ()):
+                if field_to_endwith is None or key.endswith(field_to_endwith):
+                    positions.append(position)
+        for length in self.suffix_lengths:
+            if len(key) < length:
+                continue
+            positions.extend(self.by_suffix.get(key[len(key) - length:], ()))
+        return tuple(positions)
+
+    def index(self, key: str, find_idx_position: int = None) -> int:
+        idx = self.indexes.get((key, find_idx_position))
+        if idx is None:
+            idx = get_index_from_string(key, find_idx_position)
+            self.indexes[(key, find_idx_position)] = idx
+        return idx
+
+    def match_keys(self, item: Dict) -> Dict:
+        """
+        Returns keys of item by position of the field they are mapped to, in order of item
+        """
+        routes = self.routes
+        if len(routes) > MAX_ROUTED_KEYS:
+            with self._lock:
+                routes.clear()
+                self.indexes.clear()
+
+        matched = {}
+        for key in item:
+            positions = routes.get(key)
+            if positions is None:
+                positions = routes[key] = self.route(key)
+            for position in positions:
+                matched.setdefault(position, []).append(key)
+        return matched
+
+    def map(self, obj: Any, item: Dict) -> Dict:
+        """
+        Maps flattened response of an order to fields of table
+
+        :param obj: extractor whose is_serialized is used for serial numbers
+        :type obj: Any
+
+        :param item: flattened response
+        :type item: dict
+        """
+        matched = self.match_keys(item)
+
+        tmp_dict = {}
+        for position, entry in enumerate(self.fields):
+            fld = entry["fld"]
+            if fld in item:
+                if (
+                    entry["target"] in SKIPPING_CONSTANTS
+                    and not item.get(fld)
+                ):
+                    pass
+                else:
+                    first_type_mapper(obj, fld, item, tmp_dict)
+                continue
+
+            if fld in SYMBOLS_IN_TECH_DATA_MAPPINGS.keys():
+                second_type_mapper(obj, fld, item, tmp_dict, matched.get(-position - 1, []))
+
+            kind = entry["kind"]
+            keys = matched.get(position, [])
+            if kind == "third":
+                third_type_mapper(self, entry, item, keys, tmp_dict)
+            elif kind == "fourth":
+                fourth_type_mapper(self, entry, item, keys, tmp_dict)
+            elif kind == "fifth":
+                fifth_type_mapper(self, entry, item, keys, tmp_dict)
+            elif kind == "join":
+                if entry["only_values"]:
+                    result = ", ".join(item[key] for key in keys if item[key])
+                else:
+                    result = ", ".join(item[key] for key in keys)
+                tmp_dict.update({entry["target"]: result})
+        return tmp_dict
 
 
 def third_type_mapper(
-    self,
-    fld,
-    item,
-    tmp_dict,
-    field_to_endwith,
-    field_to_startwith
-):
+    plan: MappingPlan,
+    entry: Dict,
+    item: Dict,
+    keys: List[str],
+    tmp_dict: Dict
+) -> Dict:
     """
     Maps those values whose key is a nested dict and target to be mapped in table is also a nested column
     eg:-
@@ -140,289 +310,125 @@ def third_type_mapper(
         }
     """
 
-    field_map_first = self.field_mapping[fld].split(".")[0]
-    field_map_second = self.field_mapping[fld].split(".")[-1]
-
-    is_last_index_digit = set_is_last_index_digit(
-        field_to_endwith=field_to_endwith,
-        field_to_startwith=field_to_startwith
-    )
+    field_map_first = entry["target_first"]
+    field_map_second = entry["target_second"]
 
     tmp_dict.setdefault(field_map_first, [])
 
-    for key, value in item.items():
-        key_words = key.split('.')
-
-        if_statement_condition = check_is_last_index_digit_and_set_condition(
-            key=key,
-            self=self,
-            key_words=key_words,
-            field_to_endwith=field_to_endwith,
-            field_to_startwith=field_to_startwith,
-            is_last_index_digit=is_last_index_digit
-        )
-
-        if if_statement_condition:
-            if field_map_first == 'items':
-                idx = get_index_from_string(
-                    key,
-                    self.config_template.get("position_for_checking_idx_for_nesting")
-                )
-            elif field_map_first == 'deliveries':
-                idx = get_index_from_string(
-                    key,
-                    self.config_template.get("position_for_checking_idx_deliveries")
-                )
-            else:
-                idx = get_index_from_string(key)
+    for key in keys:
+        value = item[key]
+        if field_map_first == 'items':
+            idx = plan.index(key, plan.position_for_nesting)
+        elif field_map_first == 'deliveries':
+            idx = plan.index(key, plan.position_for_deliveries)
+        else:
+            idx = plan.index(key)
 
-            if (
-                self.config_template.get('make_items_inside_items')
-                and
-                self.config_template.get(
-                    "make_items_inside_items"
-                ).get('field_to_nest') == field_map_first
-            ):
-                nested_idx = get_index_from_string(
-                    key,
-                    self.config_template.get(
-                        "position_for_checking_idx_for_nesting"
-                    )
-                )
+        if plan.field_to_nest == field_map_first:
+            nested_idx = plan.index(key, plan.position_for_nesting)
 
-                if len(tmp_dict[field_map_first]) >= (idx+1):
-                    if len(tmp_dict[field_map_first][idx]) >= (nested_idx+1):
-                        tmp_dict[field_map_first][idx][nested_idx].update({
-                            field_map_second: value
-                        })
-                    else:
-                        tmp_dict[field_map_first][idx].insert(
-                            nested_idx,
-                            {field_map_second: value}
-                        )
+            if len(tmp_dict[field_map_first]) >= (idx+1):
+                if len(tmp_dict[field_map_first][idx]) >= (nested_idx+1):
+                    tmp_dict[field_map_first][idx][nested_idx].update({
+                        field_map_second: value
+                    })
                 else:
-                    tmp_dict[field_map_first].insert(idx, [])
                     tmp_dict[field_map_first][idx].insert(
                         nested_idx,
                         {field_map_second: value}
                     )
-
-                if (
-                    field_map_first == "items"
-                    and "items" in tmp_dict
-                    and len(tmp_dict["items"]) < (idx+1)
-                ):
-                    tmp_dict[field_map_first].insert(idx, [])
             else:
-                if (
-                    tmp_dict[field_map_first]
-                    and len(tmp_dict[field_map_first]) >= (idx+1)
-                ):
-                    tmp_dict[field_map_first][idx].update({
-                        field_map_second: value
-                    })
-                else:
-                    tmp_dict[field_map_first].insert(
-                        idx,
-                        {field_map_second: value}
-                    )
+                tmp_dict[field_map_first].insert(idx, [])
+                tmp_dict[field_map_first][idx].insert(
+                    nested_idx,
+                    {field_map_second: value}
+                )
+
+            if (
+                field_map_first == "items"
+                and "items" in tmp_dict
+                and len(tmp_dict["items"]) < (idx+1)
+            ):
+                tmp_dict[field_map_first].insert(idx, [])
         else:
-            pass
+            insert_or_update(tmp_dict[field_map_first], idx, field_map_second, value)
     return tmp_dict
 
 
 def fourth_type_mapper(
-    item,
-    tmp_dict,
-    field_map_first,
-    field_map_second,
-    field_to_startwith
-):
+    plan: MappingPlan,
+    entry: Dict,
+    item: Dict,
+    keys: List[str],
+    tmp_dict: Dict
+) -> Dict:
     """
-
+    Maps values of keys starting with a field having `[i]` into a list of table
+    eg:- "SerialNumber[i]" mapped to "items.serial"
     """
 
-    for k, v in item.items():
-        if k.startswith(field_to_startwith):
-            idx = get_index_from_string(k)
-            tmp_dict.setdefault(field_map_first, [])
-
-            if (
-                tmp_dict.get(field_map_first)
-                and len(tmp_dict[field_map_first]) >= (idx+1)
-            ):
-                tmp_dict[field_map_first][idx].update({
-                    field_map_second: v
-                })
-            else:
-                tmp_dict[field_map_first].insert(
-                    idx,
-                    {field_map_second: v}
-                )
+    for key in keys:
+        idx = plan.index(key)
+        tmp_dict.setdefault(entry["target_first"], [])
+        insert_or_update(tmp_dict[entry["target_first"]], idx, entry["target_second"], item[key])
     return tmp_dict
 
 
 def fifth_type_mapper(
-    self,
-    fld,
-    item,
-    tmp_dict,
-    field_map_first,
-    field_to_endwith,
-    field_map_second,
-    field_to_startwith,
-    is_last_index_digit
-):
+    plan: MappingPlan,
+    entry: Dict,
+    item: Dict,
+    keys: List[str],
+    tmp_dict: Dict
+) -> Dict:
     """
-
+    Maps values of keys with same first and last word as field into a list of table
     """
-    for key, value in item.items():
-        key_words = key.split('.')
 
-        if_statement_condition = check_is_last_index_digit_and_set_condition(
-            key=key,
-            self=self,
-            key_words=key_words,
-            field_to_endwith=field_to_endwith,
-            field_to_startwith=field_to_startwith,
-            is_last_index_digit=is_last_index_digit
-        )
+    field_map_first = entry["target_first"]
+    for key in keys:
+        tmp_dict.setdefault(field_map_first, [])
 
-        if (
-            len(self.field_mapping[fld].split(".")) > 1
-            and if_statement_condition
-        ):
-            tmp_dict.setdefault(field_map_first, [])
-
-            if len(key_words) > 1:
-                if field_map_first == 'items':
-                    idx = get_index_from_string(
-                        key,
-                        self.config_template.get("position_for_checking_idx_for_nesting")
-                    )
-                else:
-                    idx = get_index_from_string(key)
+        if key.find('.') != -1:
+            if field_map_first == 'items':
+                idx = plan.index(key, plan.position_for_nesting)
+            else:
+                idx = plan.index(key)
 
-                if (
-                    tmp_dict[field_map_first]
-                    and len(tmp_dict[field_map_first]) >= (idx+1)
-                ):
-                    tmp_dict[field_map_first][idx].update({
-                        field_map_second: value
-                    })
-                else:
-                    tmp_dict[field_map_first].insert(
-                        idx,
-                        {field_map_second: value}
-                    )
+            insert_or_update(tmp_dict[field_map_first], idx, entry["target_second"], item[key])
     return tmp_dict
 
 
-def map_object_with_config(self, item):
-    """
+_mapping_plans = {}
+_mapping_plans_lock = threading.Lock()
 
-    """
-    tmp_dict = {}
-    for fld in self.field_mapping.keys():
-        if len(fld) == 0:
-            continue
-
-        if fld in item:
-            if (
-                self.field_mapping[fld] in SKIPPING_CONSTANTS
-                and not item.get(fld)
-            ):
-                pass
-            else:
-                first_type_mapper(self, fld, item, tmp_dict)
-            continue
 
-        # SYMBOLS_IN_TECH_DATA_MAPPINGS
-        # RefIDQual['IN'] & RefIDQual['ON'] --> For techdata
-        if fld in SYMBOLS_IN_TECH_DATA_MAPPINGS.keys():
-            second_type_mapper(self, fld, item, tmp_dict)
+def get_mapping_plan(field_mapping: Dict, config: Dict) -> MappingPlan:
+    """
+    Returns compiled mapping plan of a vendor, plans are shared by configs with
+    same field mapping and indexing options
+    """
 
-        if_fld_has_multi = fld.find('[i]')
-        if if_fld_has_multi != -1:
-            field_to_startwith = fld[:if_fld_has_multi]
-            fields = fld.split(".")
-            field_to_endwith = fields[-1]
+    signature = hashlib.sha1(json.dumps([
+        list(field_mapping.items()),
+        config.get("position_for_checking_idx_for_nesting"),
+        config.get("position_for_checking_idx_deliveries"),
+        config.get("make_items_inside_items")
+    ], default=str).encode()).hexdigest()
 
-            field_to_startwith = field_to_startwith.split('.')[0]
-            field_to_endwith = field_to_endwith.split('.')[-1]
+    with _mapping_plans_lock:
+        plan = _mapping_plans.get(signature)
+        if plan is None:
+            plan = _mapping_plans[signature] = MappingPlan(field_mapping, config)
+    return plan
 
-            if (
-                len(fields) > 1
-                and
-                len(self.field_mapping[fld].split(".")) > 1
-            ):
-                third_type_mapper(
-                    fld=fld,
-                    self=self,
-                    item=item,
-                    tmp_dict=tmp_dict,
-                    field_to_endwith=field_to_endwith,
-                    field_to_startwith=field_to_startwith
-                )
-            else:
-                if (
-                    len(self.field_mapping[fld].split('.')) > 1
-                    and len(fields) == 1
-                ):
-                    field_map_first = self.field_mapping[fld].split(".")[0]
-                    field_map_second = self.field_mapping[fld].split(".")[-1]
-
-                    fourth_type_mapper(
-                        item=item,
-                        tmp_dict=tmp_dict,
-                        field_map_first=field_map_first,
-                        field_map_second=field_map_second,
-                        field_to_startwith=field_to_startwith
-                    )
-                else:
-                    field_map_first = self.field_mapping[fld]
-                    result = None
-                    if field_to_endwith.find("[i]") != -1:
-                        field_to_endwith = field_to_startwith
-                        result = ", ".join(value for key, value in item.items() if key.startswith(field_to_endwith))
-                    elif field_to_startwith.find("[i]") != -1:
-                        field_to_startwith = field_to_endwith
-                        result = ", ".join(value for key, value in item.items() if key.endswith(field_to_startwith))
-                    elif field_map_first != "ship_date":
-                        result = ", ".join(value for key, value in item.items() if key.startswith(field_to_startwith) and key.endswith(field_to_endwith))
-                    else:
-                        result = ", ".join(value for key, value in item.items() if value if key.startswith(field_to_startwith) and key.endswith(field_to_endwith))
-
-                    if (
-                        result is None
-                        and field_map_first in SKIPPING_CONSTANTS
-                    ):
-                        continue
-
-                    tmp_dict.update({field_map_first: result})
 
-        else:
-            fields = fld.split(".")
-            field_to_startwith = fields[0]
-            field_to_endwith = fields[-1]
-
-            is_last_index_digit = set_is_last_index_digit(
-                field_to_endwith=field_to_endwith,
-                field_to_startwith=field_to_startwith
-            )
-
-            field_map_first = self.field_mapping[fld].split(".")[0]
-            field_map_second = self.field_mapping[fld].split(".")[-1]
-
-            fifth_type_mapper(
-                fld=fld,
-                self=self,
-                item=item,
-                tmp_dict=tmp_dict,
-                field_map_first=field_map_first,
-                field_to_endwith=field_to_endwith,
-                field_map_second=field_map_second,
-                field_to_startwith=field_to_startwith,
-                is_last_index_digit=is_last_index_digit
-            )
-    return tmp_dict
+def map_object_with_config(self, item):
+    """
+    Maps flattened response with field mapping of vendor config. Plan compiled
+    in fetch_config is used, otherwise it is looked up from config
+    """
+    plan = getattr(self, 'mapping_plan', None)
+    if plan is None:
+        plan = get_mapping_plan(self.field_mapping, self.config_template)
+    return plan.map(self, item)
@@ -0,0 +1,291 @@
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Dict, Union
+from op_extractor.conf import get_logger
+import threading
+import time
+import json
+
+
+logger = get_logger()
+
+# Status codes which tells us that vendor is throttling/overloaded
+THROTTLE_STATUS_CODES = (429, 503)
+
+# Longest pause asked by vendor which is honoured, when not set in vendor config
+DEFAULT_MAX_PAUSE_SECONDS = 60
+
+
+def parse_retry_after(value: Union[str, None]) -> Union[float, None]:
+    """
+    Returns seconds to wait from value of Retry-After header
+
+    :param value: Retry-After header. Either delay in seconds or a HTTP date
+    :type value: str
+
+    :return: seconds to wait, None if header is missing or invalid
+    :rtype: float
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing `rate` requests per second with bursts
+    upto `burst` requests. Without rate the bucket never blocks, except while
+    it is paused on behalf of vendor (eg: Retry-After)
+    """
+
+    def __init__(self, rate: float = None, burst: float = None) -> None:
+        self.rate = float(rate) if rate else None
+        self.capacity = float(burst or max(self.rate or 1, 1))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, deadline: Any = None) -> None:
+        """
+        Takes a token, waiting for it while the bucket is empty or paused
+
+        :param deadline: deadline of the invocation, the wait is not started if it would pass it
+        :type deadline: Deadline
+
+        :raises Exception: when the token is not available before deadline
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif not self.rate:
+                    return
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            if deadline is not None and wait >= deadline.remaining():
+                raise Exception("Invocation deadline reached while waiting %.2f seconds for rate limit" % wait)
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = 0.0
+            self.updated_at = max(now, self.paused_until)
+
+
+class AIMDController:
+    """
+    Additive-increase/multiplicative-decrease limit on requests in flight.
+
+    Every healthy response (not throttled and within latency_target) raises
+    the limit by increase_step per window of requests. A throttled, failed or
+    slow response multiplies it with decrease_factor, at most once per cooldown.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float,
+        min_limit: int = 1,
+        max_limit: int = 1,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_target: float = None,
+        cooldown: float = 1.0
+    ) -> None:
+        self.min_limit = max(int(min_limit), 1)
+        self.max_limit = max(int(max_limit), self.min_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.increase_step = float(increase_step)
+        self.decrease_factor = float(decrease_factor)
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.last_decrease_at = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self, deadline: Any = None) -> None:
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                if deadline is None:
+                    self._condition.wait()
+                elif deadline.expired() or not self._condition.wait(deadline.remaining()):
+                    if self.in_flight >= int(self.limit):
+                        raise Exception("Invocation deadline reached while waiting for a request slot")
+            self.in_flight += 1
+
+    def release(self, healthy: bool) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            if healthy:
+                self.limit = min(self.max_limit, self.limit + self.increase_step / self.limit)
+            else:
+                now = time.monotonic()
+                if now - self.last_decrease_at >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self.last_decrease_at = now
+            self._condition.notify_all()
+
+    def cancel(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+
+class VendorRateLimiter:
+    """
+    Per-vendor limiter combining a token bucket (requests per second) and an
+    AIMD controller (requests in flight).
+
+    Configured from `api_request_template.rate_limit` of vendor config eg:-
+        {
+            "requests_per_second": 5,
+            "burst": 10,
+            "initial_in_flight": 2,
+            "min_in_flight": 1,
+            "increase_step": 1,
+            "decrease_factor": 0.5,
+            "latency_target_ms": 3000,
+            "backoff_seconds": 1,
+            "max_pause_seconds": 60
+        }
+
+    A pause asked by vendor with Retry-After is capped at max_pause_seconds,
+    so a far away Retry-After does not hold requests past the invocation.
+    """
+
+    def __init__(self, key: Any, max_in_flight: int = 1, config: Dict = None) -> None:
+        config = config or {}
+        self.key = key
+        self.backoff_seconds = float(config.get('backoff_seconds', 1))
+        self.max_pause_seconds = float(config.get('max_pause_seconds', DEFAULT_MAX_PAUSE_SECONDS))
+
+        latency_target_ms = config.get('latency_target_ms')
+        self.bucket = TokenBucket(
+            rate=config.get('requests_per_second'),
+            burst=config.get('burst')
+        )
+        self.controller = AIMDController(
+            initial_limit=config.get('initial_in_flight', max_in_flight),
+            min_limit=config.get('min_in_flight', 1),
+            max_limit=max_in_flight,
+            increase_step=config.get('increase_step', 1),
+            decrease_factor=config.get('decrease_factor', 0.5),
+            latency_target=latency_target_ms / 1000 if latency_target_ms else None
+        )
+
+        self.requests = 0
+        self.throttled = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: Any = None) -> None:
+        """
+        Waits for a free slot and a token of the vendor. The slot must be given
+        back with release, or with cancel when no request is sent
+
+        :param deadline: deadline of the invocation, waiting past it raises
+        :type deadline: Deadline
+        """
+        self.controller.acquire(deadline)
+        try:
+            self.bucket.acquire(deadline)
+        except BaseException:
+            # No request is sent, so the limit is not adapted
+            self.controller.cancel()
+            raise
+
+    def release(self, response: Any = None, latency: float = 0.0) -> None:
+        """
+        Gives back the slot taken by acquire and adapts limits from the response.
+        Response is None when request failed without any response (eg: timeout)
+        """
+
+        if response is None:
+            healthy = False
+        elif response.status_code in THROTTLE_STATUS_CODES or response.status_code >= 500:
+            healthy = False
+        else:
+            latency_target = self.controller.latency_target
+            healthy = latency_target is None or latency <= latency_target
+
+        with self._lock:
+            self.requests += 1
+            if response is None:
+                self.failed += 1
+            elif not healthy and response.status_code >= 429:
+                self.throttled += 1
+
+        if response is not None and response.status_code in THROTTLE_STATUS_CODES:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            wait = retry_after if retry_after is not None else self.backoff_seconds
+            if wait > self.max_pause_seconds:
+                logger.warning(
+                    "Vendor %s asked to wait %s seconds, pausing only for max_pause_seconds" % (self.key, wait))
+                wait = self.max_pause_seconds
+            logger.info("Vendor %s is throttling requests. Pausing for %s seconds" % (self.key, wait))
+            self.bucket.pause(wait)
+
+        self.controller.release(healthy=healthy)
+
+    def cancel(self) -> None:
+        """
+        Gives back the slot taken by acquire when request was not sent, limits are not adapted
+        """
+        self.controller.cancel()
+
+    @property
+    def state(self) -> Dict:
+        return {
+            "key": self.key,
+            "limit": round(self.controller.limit, 2),
+            "in_flight": self.controller.in_flight,
+            "requests_per_second": self.bucket.rate,
+            "paused_for": round(max(self.bucket.paused_until - time.monotonic(), 0.0), 2),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "failed": self.failed
+        }
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(key: Any, max_in_flight: int = 1, config: Dict = None) -> VendorRateLimiter:
+    """
+    Returns rate limiter of a vendor. Limiters are kept for the lifetime of the
+    worker so that limits learned in one invocation are used in the next one,
+    and are rebuilt only when the vendor config changes.
+    """
+
+    signature = (max_in_flight, json.dumps(config, sort_keys=True, default=str))
+    with _rate_limiters_lock:
+        entry = _rate_limiters.get(key)
+        if entry is None or entry[0] != signature:
+            entry = (signature, VendorRateLimiter(key, max_in_flight, config))
+            _rate_limiters[key] = entry
+    return entry[1]
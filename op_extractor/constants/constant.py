@@ -7,6 +7,36 @@ PURCHASE_ORDER_TABLE_CONFLICT_FIELDS = "point_id"
 # For Techdata
 DEFAULT_CIPHERS = 'ALL:@SECLEVEL=1'
 
+# Section in config.toml for pooled http sessions
+HTTP_CLIENT = "HTTP_CLIENT"
+
+# Section in config.toml for retries of vendor requests
+RETRY = "RETRY"
+
+# Section in config.toml for format of artifacts passed between stages
+ARTIFACT = "ARTIFACT"
+
+# Section in config.toml for polling schedule of purchase orders
+POLLING_SCHEDULE = "POLLING_SCHEDULE"
+
+# Section in config.toml for pool of database connections
+DB_POOL = "DB_POOL"
+
+# Section in config.toml for timing and slow query log of database queries
+DB_INSTRUMENTATION = "DB_INSTRUMENTATION"
+
+# Section in config.toml for storage of artifacts passed between stages
+STORAGE = "STORAGE"
+
+# Section in config.toml for cache of vendor config files
+CONFIG_CACHE = "CONFIG_CACHE"
+
+# Number of vendor requests in flight at a time when not set in vendor config
+DEFAULT_MAX_IN_FLIGHT = 1
+
+# Seconds to wait for vendor response when not set in vendor config
+DEFAULT_REQUEST_TIMEOUT = 10
+
 # Order Status
 OPEN = "OPEN"
 BACKORDERED = "BACKORDERED"
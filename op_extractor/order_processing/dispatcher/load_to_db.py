@@ -1,5 +1,5 @@
 from op_extractor.common.helpers import data_to_be_inserted_into_table
-from op_extractor.orm import VbVendorInvoice, VbVendorInvoiceItems
+from op_extractor.orm import VbVendorInvoice, VbVendorInvoiceItems, VbVendorResponseCache
 from op_extractor.base_class import BaseDispatcher
 from collections import ChainMap
 from typing import Any
@@ -10,7 +10,8 @@ class OrderLoader(BaseDispatcher):
         super().__init__(**kwargs)
         self.items_list = []
         self._sonumber = None
-        self.invoice_list = []
+        self.invoice_numbers = {}
+        self.order_numbers = []
 
     def read_transformed(self) -> Any:
         self.logger.debug("Reading fetcher data")
@@ -18,42 +19,70 @@ class OrderLoader(BaseDispatcher):
         return self
 
     def loader(self) -> None:
+        so_numbers, po_numbers = [], []
         for obj in self.data:
             if obj.get('so_number'):
-                self.logger.info("Fetching object from fulfillment table which has invoice on the basis of vendor_id and sonumber")
-                # Get the order id from order table with given vendor_id, sonum
-                result = VbVendorInvoice().get_order_id_of_sonumber(
-                    vendor_id=self.kwargs.get("vendor_id"),
-                    so_number=obj.get('so_number')
-                )
+                so_numbers.append(str(obj.get('so_number')))
             elif obj.get('po_number'):
-                self.logger.info("Fetching object from fulfillment table which has invoice on the basis of vendor_id and ponumber")
-                result = VbVendorInvoice().get_order_id_of_ponumber(
-                    vendor_id=self.kwargs.get("vendor_id"),
-                    po_number=obj.get('po_number')
-                )
+                po_numbers.append(str(obj.get('po_number')))
             else:
                 self.logger.error("Couldnot fetch info from fulfillment since po_number or so_number are not provided")
                 raise Exception("Couldnot fetch info from fulfillment since po_number or so_number are not provided")
 
-            obj.setdefault('purchase_order_id', result[0].get('id'))
+        # Fetchers cache responses by so_number or po_number depending on vendor, both are confirmed
+        self.order_numbers = [
+            str(obj.get(number_type)) for obj in self.data
+            for number_type in ('so_number', 'po_number') if obj.get(number_type)
+        ]
 
-            # Get the invoice list from fulfillment table
-            invoice_list = set([item['invoice_number'] for item in VbVendorInvoice().get_invoice_numbers_of_purchase_order(obj.get('purchase_order_id'))])
-            self.logger.info("Discarding those orders that invoice in it")
-            self.invoice_list.extend(invoice_list)
+        # Orders of all objects are fetched at once on the basis of vendor_id and sonumber or ponumber
+        self.logger.info("Fetching purchase orders of %s sonumber(s) and %s ponumber(s)" % (
+            len(so_numbers), len(po_numbers)))
+        order_ids = VbVendorInvoice().get_order_ids_of_numbers(
+            vendor_id=self.kwargs.get("vendor_id"),
+            so_numbers=so_numbers,
+            po_numbers=po_numbers
+        )
+
+        not_found = []
+        for obj in self.data:
+            number_type = 'so_number' if obj.get('so_number') else 'po_number'
+            order_id = order_ids[number_type].get(str(obj.get(number_type)))
+            if order_id is None:
+                not_found.append(obj.get(number_type))
+                continue
+            obj.setdefault('purchase_order_id', order_id)
+
+        if not_found:
+            self.logger.error("Purchase order not found for %s" % not_found)
+            raise Exception("Couldnot find purchase order for %s" % not_found)
+
+        # Get the invoice numbers of all orders from fulfillment table
+        self.invoice_numbers = VbVendorInvoice().get_invoice_numbers_of_purchase_orders(
+            obj.get('purchase_order_id') for obj in self.data
+        )
+        self.logger.info("Discarding those orders that invoice in it")
 
         self.data = data_to_be_inserted_into_table(
             data=self.data,
-            invoice_list=self.invoice_list
+            invoice_numbers=self.invoice_numbers
         )
         return self
-    
+
     def db_dispatcher(self) -> Any:
         """
-        Loads data after transformation into Database
+        Loads data after transformation into Database and confirms the vendor
+        responses of the orders as sent
         """
+        self.load_bills()
+
+        # Responses become the sent ones of response cache only after their bills are committed
+        try:
+            VbVendorResponseCache().confirm_sent(self.kwargs.get("vendor_id"), self.order_numbers)
+        except Exception:
+            self.logger.error("Couldnot confirm response cache, orders are sent again by next run", exc_info=True)
 
+    def load_bills(self) -> None:
         if not self.data:
             self.logger.info("No bills to Load. Skipping loading part")
             return
@@ -2,3 +2,5 @@ from op_extractor.orm.billing import *
 from op_extractor.orm.sales_order import *
 from op_extractor.orm.billing_items import *
 from op_extractor.orm.purchase_order import *
+from op_extractor.orm.response_cache import *
+from op_extractor.orm.netsuite_sync_state import *
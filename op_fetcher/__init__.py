@@ -28,7 +28,12 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             "extractor_write_path": EXTRACTOR_WRITE_PATH,
             "template_values": obj.get('template_values'),
             "config_file_path": obj.get('config_file_path'),
-            "fetcher_file_path": fetcher.meta['fetcher_data_file_path']
+            "fetcher_file_path": fetcher.meta.get('fetcher_data_file_path'),
+            "due_orders": fetcher.meta.get('due_orders', 0),
+            "unchanged_orders": fetcher.meta.get('unchanged_orders', 0),
+            "deferred_orders": fetcher.meta.get('deferred_orders', 0),
+            "circuit_breaker": fetcher.meta.get('circuit_breaker'),
+            "query_stats": fetcher.meta.get('query_stats')
         }
     except Exception as exe:
         logging.error(exe, exc_info=True)
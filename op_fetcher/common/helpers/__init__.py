@@ -1,7 +1,19 @@
-from op_fetcher.common.helpers.mapper_helpers import map_object_with_config
-from op_fetcher.common.helpers.json_flattener import json_flattener
+from op_fetcher.common.helpers.mapper_helpers import map_object_with_config, get_mapping_plan
+from op_fetcher.common.helpers.json_flattener import json_flattener, unflatten
+from op_fetcher.common.helpers.xml_flattener import xml_flattener
 from op_fetcher.common.helpers.azure_blob import connect_blob
 from op_fetcher.common.helpers.transform_helpers import *
 from op_fetcher.common.helpers.extractor_helpers import *
 from op_fetcher.common.helpers.common_helpers import *
 from op_fetcher.common.helpers.http import *
+from op_fetcher.common.helpers.concurrency import *
+from op_fetcher.common.helpers.rate_limiter import *
+from op_fetcher.common.helpers.template_helpers import *
+from op_fetcher.common.helpers.polling_schedule import *
+from op_fetcher.common.helpers.batch_helpers import *
+from op_fetcher.common.helpers.artifacts import *
+from op_fetcher.common.helpers.retry import *
+from op_fetcher.common.helpers.circuit_breaker import *
+from op_fetcher.common.helpers.projection import *
+from op_fetcher.common.helpers.config_cache import *
+from op_fetcher.common.helpers.storage import *
@@ -2,20 +2,33 @@ from op_fetcher.constants import AZURE_STORAGE_CONNECTION_STRING
 from azure.storage.blob import BlobServiceClient
 from op_fetcher.conf import get_logger
 from typing import Union
+import threading
 
 
 logger = get_logger()
 
+_blob_service_client = None
+_blob_service_client_lock = threading.Lock()
+
 
 def connect_blob() -> Union[None, BlobServiceClient]:
-    blob_service_client = None
+    """
+    Returns blob service client of the process. Client is created once and
+    its connections are reused by every stage running in the worker
+    """
+    global _blob_service_client
+
+    if _blob_service_client is not None:
+        return _blob_service_client
 
-    try:
-        conn_str = AZURE_STORAGE_CONNECTION_STRING
-        blob_service_client = BlobServiceClient.from_connection_string(
-            conn_str
-        )
-    except Exception as e:
-        logger.error(e, exc_info=True)
+    with _blob_service_client_lock:
+        if _blob_service_client is None:
+            try:
+                conn_str = AZURE_STORAGE_CONNECTION_STRING
+                _blob_service_client = BlobServiceClient.from_connection_string(
+                    conn_str
+                )
+            except Exception as e:
+                logger.error(e, exc_info=True)
 
-    return blob_service_client
+    return _blob_service_client
@@ -0,0 +1,160 @@
+from op_fetcher.conf import get_logger
+from collections import deque
+from typing import Any, Dict
+import threading
+import time
+import json
+
+
+logger = get_logger()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request while circuit of the vendor is open
+    """
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a vendor whose API keeps failing.
+
+    Configured from `api_request_template.circuit_breaker` of vendor config eg:-
+        {
+            "failure_threshold": 5,
+            "error_rate_threshold": 0.5,
+            "window_size": 20,
+            "min_requests": 10,
+            "open_seconds": 60,
+            "half_open_max_calls": 1
+        }
+
+    Circuit opens after failure_threshold consecutive failures, or when the
+    share of failures among the last window_size requests reaches
+    error_rate_threshold (once min_requests are seen). An open circuit lets
+    no request through for open_seconds, then half_open_max_calls trial
+    requests decide whether it closes again or stays open.
+    """
+
+    def __init__(self, key: Any, config: Dict = None) -> None:
+        config = config or {}
+        self.key = key
+        self.failure_threshold = int(config.get('failure_threshold', 5))
+        self.error_rate_threshold = float(config.get('error_rate_threshold', 0.5))
+        self.min_requests = int(config.get('min_requests', 10))
+        self.open_seconds = float(config.get('open_seconds', 60))
+        self.half_open_max_calls = int(config.get('half_open_max_calls', 1))
+
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=int(config.get('window_size', 20)))
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.short_circuited = 0
+        self._lock = threading.Lock()
+
+    def _open(self, now: float) -> None:
+        logger.warning("Opening circuit of %s after %s consecutive failure(s)" % (self.key, self.consecutive_failures))
+        self.state = OPEN
+        self.opened_at = now
+        self.half_open_calls = 0
+
+    def allow(self) -> bool:
+        """
+        Returns True if a request can be sent. Every allowed request must be
+        followed by record, or by release_trial when it is not sent
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+                logger.info("Circuit of %s is half open, sending trial request" % self.key)
+                self.state = HALF_OPEN
+                self.half_open_calls = 0
+
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self.half_open_calls < self.half_open_max_calls:
+                self.half_open_calls += 1
+                return True
+
+            self.short_circuited += 1
+            return False
+
+    def release_trial(self) -> None:
+        """
+        Gives back the trial taken by allow when no request was sent after it
+        (eg: deadline reached while waiting for rate limit), so a half open
+        circuit is not left waiting for a result which never comes
+        """
+        with self._lock:
+            if self.state == HALF_OPEN and self.half_open_calls > 0:
+                self.half_open_calls -= 1
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.outcomes.append(success)
+            self.consecutive_failures = 0 if success else self.consecutive_failures + 1
+
+            if self.state == HALF_OPEN:
+                if success:
+                    logger.info("Closing circuit of %s after successful trial request" % self.key)
+                    self.state = CLOSED
+                    self.outcomes.clear()
+                else:
+                    self._open(now)
+                return
+
+            if self.state == CLOSED and not success:
+                failures = self.outcomes.count(False)
+                if (
+                    self.consecutive_failures >= self.failure_threshold
+                    or (
+                        len(self.outcomes) >= self.min_requests
+                        and failures / len(self.outcomes) >= self.error_rate_threshold
+                    )
+                ):
+                    self._open(now)
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != CLOSED
+
+    @property
+    def summary(self) -> Dict:
+        outcomes = list(self.outcomes)
+        return {
+            "key": self.key,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": round(outcomes.count(False) / len(outcomes), 2) if outcomes else 0.0,
+            "short_circuited": self.short_circuited,
+            "retry_after_seconds": round(
+                max(self.opened_at + self.open_seconds - time.monotonic(), 0.0), 2
+            ) if self.state == OPEN else 0.0
+        }
+
+
+_circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(key: Any, config: Dict = None) -> CircuitBreaker:
+    """
+    Returns circuit breaker of a vendor. Breakers are kept for the lifetime of
+    the worker so that an open circuit also short-circuits the next invocations
+    (eg: extractor after fetcher), and are rebuilt only when the config changes.
+    """
+
+    signature = json.dumps(config, sort_keys=True, default=str)
+    with _circuit_breakers_lock:
+        entry = _circuit_breakers.get(key)
+        if entry is None or entry[0] != signature:
+            entry = (signature, CircuitBreaker(key, config))
+            _circuit_breakers[key] = entry
+    return entry[1]
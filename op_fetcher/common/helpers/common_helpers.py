@@ -6,6 +6,8 @@ import re
 
 logger = get_logger()
 
+INDEX_PATTERN = re.compile(r"\.\d")
+
 
 def check_shipcost_and_extraitemprice(self: Any):
     """
@@ -130,7 +132,7 @@ def get_index_from_string(key: str, find_idx_position: int=None) -> int:
     :returns: index/position of digit found in given key if not 0 is returned
     :rtype: int
     """
-    idx_position = re.search("\.\d", key)
+    idx_position = INDEX_PATTERN.search(key)
     
     idx = 0
     if idx_position != None and find_idx_position and len(key.split('.')) > find_idx_position:
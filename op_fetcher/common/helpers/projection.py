@@ -0,0 +1,144 @@
+from op_fetcher.constants import SYMBOLS_IN_TECH_DATA_MAPPINGS
+from typing import Any, Dict, List
+
+
+# Whole subtree under the path is kept
+KEEP_ALL = "__keep_all__"
+
+# Value at the path is an object, or a list of objects, projected from the root
+# of the projection, eg: orders under multi_field are mapped like a response
+EACH = "__each__"
+
+
+class PathProjection:
+    """
+    Keeps only the parts of a vendor response that vendor config refers to.
+
+    Paths are taken from `mapping.fulfillment_table`, `multi_field`,
+    `check_response_body` and `response_projection.keep` of vendor config eg:-
+        "response_projection": {
+            "enabled": true,
+            "at_fetch": false,
+            "keep": ["OrderHeader.Notes"]
+        }
+    Fields are matched by the mappers as:
+        - exact flattened key eg:- `order.status`, only that path is kept
+        - first and last word of key, for fields with `[i]` or mapped into a
+          list of table eg:- `order.lines[i].sku`, whole `order` is kept
+        - start of key, for fields like `serial[i]`, every top level key
+          starting with `serial` is kept
+    A techdata field (`RefIDQual['IN']`) can match a key anywhere in the
+    response, so nothing is dropped for such vendors. Keys having a dot, eg:
+    keys of a record already flattened from xml, are always kept.
+
+    Keys of the projected response come in the same order as in the response,
+    so the flattened and mapped response is same as without projection.
+    """
+
+    def __init__(self, config: Dict) -> None:
+        self.tree = {}
+        self.top_level_prefixes = []
+        self.keep_everything = False
+
+        field_mapping_list = (config.get('mapping') or {}).get('fulfillment_table') or []
+        if not field_mapping_list:
+            self.keep_everything = True
+        for fld_map in field_mapping_list:
+            self.add_field(fld_map.get('destination_field') or '', fld_map.get('source_field') or '')
+
+        for path in [config.get('check_response_body')] + list((config.get('response_projection') or {}).get('keep', [])):
+            if path:
+                self.add_path(path.split('.'), KEEP_ALL)
+
+        if config.get('multi_field'):
+            self.add_path(config.get('multi_field').split('.'), EACH)
+
+    def add_path(self, keys: List[str], value: str) -> None:
+        """
+        Adds path to the projection, value is KEEP_ALL or EACH
+        """
+        node = self.tree
+        for key in keys[:-1]:
+            child = node.get(key)
+            if child == KEEP_ALL:
+                return
+            if not isinstance(child, dict):
+                child = node[key] = {}
+            node = child
+
+        if value == KEEP_ALL:
+            node[keys[-1]] = KEEP_ALL
+        elif node.get(keys[-1]) != KEEP_ALL:
+            node.setdefault(keys[-1], {})[EACH] = True
+
+    def add_field(self, fld: str, target: str) -> None:
+        if len(fld) == 0:
+            return
+
+        if fld in SYMBOLS_IN_TECH_DATA_MAPPINGS.keys():
+            self.keep_everything = True
+            return
+
+        fields = fld.split('.')
+        if_fld_has_multi = fld.find('[i]')
+        if if_fld_has_multi != -1:
+            field_to_startwith = fld[:if_fld_has_multi].split('.')[0]
+            if len(fields) > 1 and len(target.split('.')) > 1:
+                self.add_path([field_to_startwith], KEEP_ALL)
+            else:
+                # Matched by start of whole key
+                self.top_level_prefixes.append(field_to_startwith)
+        elif len(target.split('.')) > 1:
+            self.add_path([fields[0]], KEEP_ALL)
+
+        # Any field can be an exact key of the flattened response
+        self.add_path(fields, KEEP_ALL)
+
+    def _project(self, node: Any, value: Any, is_root: bool = False) -> Any:
+        if node == KEEP_ALL:
+            return value
+
+        if isinstance(node, dict) and node.get(EACH):
+            # Other paths under it are not merged with the projection of each object
+            if len(node) > 1:
+                return value
+            if isinstance(value, list):
+                return [self.apply(obj) for obj in value]
+            if isinstance(value, dict):
+                return self.apply(value)
+
+        if isinstance(value, dict):
+            projected = {}
+            for key, child_value in value.items():
+                child = node.get(key)
+                if "." in key or (is_root and (
+                    key.startswith("__")
+                    or any(key.startswith(prefix) for prefix in self.top_level_prefixes)
+                )):
+                    # Key with a dot is not split into the paths of the projection, eg: keys
+                    # of a record flattened from xml, so it is kept as it is
+                    child = KEEP_ALL
+                if child is not None:
+                    projected[key] = self._project(child, child_value)
+            return projected
+
+        if isinstance(value, list):
+            # Dropped items are left as empty objects, which have no flattened key,
+            # so that kept items keep their index
+            projected = []
+            for idx, child_value in enumerate(value):
+                child = node.get(str(idx))
+                if child is not None:
+                    projected.extend({} for _ in range(idx - len(projected)))
+                    projected.append(self._project(child, child_value))
+            return projected
+
+        return value
+
+    def apply(self, response: Any) -> Any:
+        """
+        Returns response with only the paths of the projection
+        """
+        if self.keep_everything or not isinstance(response, dict):
+            return response
+        return self._project(self.tree, response, is_root=True)
@@ -0,0 +1,150 @@
+from xml.parsers import expat
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Leaf nodes are tuples, so they are told apart from child lists
+LEAF = "leaf"
+
+# State of an element against the prefix filter
+INSIDE = 1
+ANCESTOR = 2
+
+
+def _compile_prefixes(prefixes: Iterable[str]) -> List[Tuple[str, ...]]:
+    # List indexes are dropped, an element is matched by the path of tag names
+    return [
+        tuple(key for key in prefix.split(".") if key and not key.isdigit())
+        for prefix in prefixes
+    ]
+
+
+def _match(path: Tuple[str, ...], prefixes: List[Tuple[str, ...]]) -> Union[int, None]:
+    state = None
+    for prefix in prefixes:
+        if path[:len(prefix)] == prefix:
+            return INSIDE
+        if prefix[:len(path)] == path:
+            state = ANCESTOR
+    return state
+
+
+def _emit(name: str, node: Any, result: Dict) -> None:
+    """
+    Writes keys of a closed element into result. A node is a list of
+    (key, node) pairs or LEAF with the value of key
+    """
+    stack = [(name, node)]
+    while stack:
+        key, node = stack.pop()
+        if isinstance(node, list):
+            stack.extend((key + "." + child_key, child) for child_key, child in reversed(node))
+        else:
+            result[key] = node[1]
+
+
+def xml_flattener(xml_input: Any, prefixes: Iterable[str] = None) -> Dict:
+    """
+    Flattens an xml document into dot separated keys straight from the events
+    of the parser. Output is same as
+    `json_flattener(json.loads(json.dumps(xmltodict.parse(xml_input))))`:
+    attributes are `@name`, text next to attributes or child elements is
+    `#text`, repeated elements are indexed from 0 and an empty element is None.
+
+    eg:-
+        <a x="1"><b>2</b><b>3</b></a>  ->  {'a.@x': '1', 'a.b.0': '2', 'a.b.1': '3'}
+
+    :param xml_input: xml document as str, bytes or file like object
+    :type xml_input: Any
+
+    :param prefixes: only keys under these dot separated paths of tag names are
+        returned, other elements are skipped while parsing. List indexes in
+        prefixes are ignored, eg: `Envelope.Body.OrderStatus`
+    :type prefixes: Iterable[str]
+    """
+
+    prefixes = _compile_prefixes(prefixes) if prefixes else None
+
+    # Frame of an open element: name, path, filter state, attributes, children by name, text
+    stack = []
+    result = {}
+    skip_depth = 0
+
+    def start_element(name: str, attrs: List[str]) -> None:
+        nonlocal skip_depth
+        if skip_depth:
+            skip_depth += 1
+            return
+
+        path = None
+        state = INSIDE
+        if prefixes is not None:
+            path = (stack[-1][1] if stack else ()) + (name,)
+            state = stack[-1][2] if stack else ANCESTOR
+            if state != INSIDE:
+                state = _match(path, prefixes)
+                if state is None:
+                    skip_depth = 1
+                    return
+
+        attr_pairs = [("@" + attrs[i], (LEAF, attrs[i + 1])) for i in range(0, len(attrs), 2)]
+        if state == ANCESTOR:
+            attr_pairs = [pair for pair in attr_pairs if _match(path + (pair[0],), prefixes) == INSIDE]
+        stack.append((name, path, state, attrs, attr_pairs, {}, []))
+
+    def end_element(name: str) -> None:
+        nonlocal skip_depth
+        if skip_depth:
+            skip_depth -= 1
+            return
+
+        name, path, state, attrs, attr_pairs, children, data = stack.pop()
+        text = "".join(data).strip() or None if data else None
+
+        if attrs or children:
+            node = attr_pairs
+            for child_name, child_nodes in children.items():
+                if len(child_nodes) == 1:
+                    node.append((child_name, child_nodes[0]))
+                else:
+                    node.extend((child_name + "." + str(idx), child) for idx, child in enumerate(child_nodes))
+            if text and (state == INSIDE or _match(path + ("#text",), prefixes) == INSIDE):
+                node.append(("#text", (LEAF, text)))
+        else:
+            node = (LEAF, text) if state == INSIDE else []
+
+        if stack:
+            stack[-1][5].setdefault(name, []).append(node)
+        else:
+            _emit(name, node, result)
+
+    def characters(text: str) -> None:
+        if not skip_depth and stack:
+            stack[-1][6].append(text)
+
+    # Parser is set up as xmltodict sets it up, so that names, entities and text are same
+    encoding = None
+    if isinstance(xml_input, str):
+        xml_input, encoding = xml_input.encode('utf-8'), 'utf-8'
+
+    parser = expat.ParserCreate(encoding, None)
+    parser.ordered_attributes = True
+    parser.buffer_text = True
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.CharacterDataHandler = characters
+    parser.DefaultHandler = lambda x: None
+    parser.ExternalEntityRefHandler = lambda *x: 1
+
+    if hasattr(xml_input, 'read'):
+        while True:
+            chunk = xml_input.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.Parse(chunk, False)
+        parser.Parse(b'', True)
+    else:
+        parser.Parse(xml_input, True)
+
+    return result
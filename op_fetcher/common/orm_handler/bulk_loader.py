@@ -0,0 +1,172 @@
+""" Bulk loading of rows into a table through a COPY staging table"""
+from op_fetcher.sql_queries import QUERY_CREATE_STAGING_TABLE, QUERY_COPY_INTO_STAGING_TABLE
+from op_fetcher.common.helpers.storage import ChunkReader
+from op_fetcher.conf import li_db, get_logger
+from marshmallow import Schema
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from datetime import date, datetime, time
+from itertools import chain, islice
+import json
+import io
+
+
+logger = get_logger()
+
+# Characters escaped in text format of COPY
+COPY_TEXT_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r'
+})
+
+
+def copy_text(value: Any) -> str:
+    """Returns value as a column of `COPY` text format.
+
+    dict and list are written as json, for json columns.
+
+    :params value: value of a column of loaded data.
+    :type value: Any
+
+    :returns: text of the column, `\\N` for None.
+    :rtype: str
+    """
+    value_type = type(value)
+    if value_type is str:
+        # Most of the columns have nothing to escape
+        if '\\' in value or not value.isprintable():
+            return value.translate(COPY_TEXT_ESCAPES)
+        return value
+    if value_type is int or value_type is float:
+        return str(value)
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    elif isinstance(value, (datetime, date, time)):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return value.translate(COPY_TEXT_ESCAPES)
+
+
+class BulkLoader:
+    """Loads rows into a table with one set based statement.
+
+    Rows are streamed with `COPY ... FROM STDIN` into a temporary staging
+    table having the columns of the target table, which is then merged into
+    the table by a single `INSERT ... SELECT` (eg:: with `ON CONFLICT` or after
+    a `DELETE`) run in the same transaction. Temporary tables are not written
+    to WAL and the staging table is dropped at commit.
+
+    eg::
+        loader = BulkLoader('sales_order', SalesOrderSchema())
+        loader.merge(rows, QUERY_MERGE_SALES_ORDER, conflict_fields='soint_id', ...)
+
+    :params table: table to load into.
+    :type table: str
+
+    :params schema: schema of the table. Columns are its loadable fields present in
+                    the first row, all keys of the first row without schema.
+    :type schema: marshmallow.Schema
+
+    :params rows_per_chunk: rows encoded at a time while streaming.
+    :type rows_per_chunk: int
+    """
+
+    def __init__(self, table: str, schema: Optional[Schema] = None, rows_per_chunk: int = 1000) -> None:
+        self.table = table
+        self.schema = schema
+        self.rows_per_chunk = rows_per_chunk
+        self.staging_table = f'staging_{table}'
+
+    def get_columns(self, first_row: Dict) -> List[str]:
+        """Return columns loaded for rows like the given row.
+
+        :params first_row: first row of the data.
+        :type first_row: dict
+
+        :returns: column names in order of the row.
+        :rtype: list
+        """
+        if self.schema is None:
+            return list(first_row.keys())
+        return [name for name in first_row if name in self.schema.load_fields]
+
+    def copy_chunks(self, rows: Iterable[Dict], columns: Sequence[str]) -> Iterator[bytes]:
+        """Yield rows encoded in `COPY` text format, rows_per_chunk rows at a time."""
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.rows_per_chunk))
+            if not chunk:
+                return
+            lines = ['\t'.join([copy_text(row.get(column)) for column in columns]) for row in chunk]
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+    def stage(self, query_set: Any, data: Iterable[Dict]) -> Optional[Dict[str, str]]:
+        """Create staging table and copy data into it in the transaction of query_set.
+
+        :params query_set: query set of an open transaction.
+        :type query_set: PgSQlQuerySet
+
+        :params data: rows to load, a list or any iterable of dict.
+        :type data: Iterable[dict]
+
+        :returns: names used in merge query i.e. table_name, staging_table and
+                  column_names, None when there is no row.
+        :rtype: dict
+        """
+        rows = iter(data)
+        first_row = next(rows, None)
+        if first_row is None:
+            return None
+
+        columns = self.get_columns(first_row)
+        names = {
+            "table_name": self.table,
+            "staging_table": self.staging_table,
+            "column_names": ", ".join(columns)
+        }
+
+        query_set.execute_non_query(QUERY_CREATE_STAGING_TABLE % names)
+        stream = io.BufferedReader(ChunkReader(self.copy_chunks(chain([first_row], rows), columns)))
+        copied = query_set.execute_copy(QUERY_COPY_INTO_STAGING_TABLE % names, stream)
+        logger.info(f'Copied {copied} rows into staging table of {self.table}')
+        return names
+
+    def merge(self, data: Iterable[Dict], sql: str, params: Optional[Dict] = None, **kwargs) -> List:
+        """Copy data into staging table and merge it into table with sql in one transaction.
+
+        :params data: rows to load, a list or any iterable of dict.
+        :type data: Iterable[dict]
+
+        :params sql: merge query, formatted with table_name, staging_table, column_names
+                     and kwargs. eg:: QUERY_MERGE_SALES_ORDER
+        :type sql: str
+
+        :params params: parameters of merge query, escape them as `%%(name)s` in sql.
+        :type params: dict
+
+        :returns: rows returned by merge query, empty list when there is no row.
+        :rtype: list
+
+        :raises Exception: Raised when error occurs in load transaction.
+        """
+        try:
+            with li_db.transaction(auto_commit=True) as query_set:
+                names = self.stage(query_set, data)
+                if names is None:
+                    logger.info(f'No rows to load into {self.table}')
+                    return []
+
+                result_set = query_set.execute_query(sql % dict(names, **kwargs), params)
+                logger.debug(f'Executed Query {query_set.query}')
+                return result_set.to_list()
+        except Exception as e:
+            logger.error(f'Error in bulk load of {self.table}', exc_info=True)
+            raise e
@@ -1,20 +1,26 @@
 from op_fetcher.common.helpers import (
     split_if_multi_invoice_else_remove_duplicates_from_certain_keys,
     json_flattener, get_mapped_order_status,
+    xml_flattener,
     calculate_amount_and_total_if_not_exists,
     check_quantity_diff_and_set_status,
     check_shipcost_and_extraitemprice,
     split_single_object_to_multiple,
     map_object_with_config,
+    get_mapping_plan,
+    PathProjection,
     prepare_config_files,
     make_api_call,
-    carrier_mapper
+    carrier_mapper,
+    get_rate_limiter,
+    RetryPolicy,
+    CircuitOpenError,
+    get_circuit_breaker
 )
 from op_fetcher.base_class import BaseExtractor
-from op_fetcher.constants import CANCELLED
+from op_fetcher.constants import CANCELLED, DEFAULT_REQUEST_TIMEOUT
 from flatten_dict import flatten
 from typing import Any, Dict
-import xmltodict
 import copy
 import json
 
@@ -25,7 +31,13 @@ class OrderTransformer(BaseExtractor):
 
         self._sonumber = None
         self.is_serialized = None
+        self.compiled_template = None
+        self.retry_policy = None
+        self.circuit_breaker = None
+        self.deferred_orders = 0
         self.mapped_order_details = []
+        self.mapping_plan = None
+        self.projection = None
 
         # Check if all the mandatory parameters are present
         mandatory_params = ['vendor_id', 'config_file_path']
@@ -40,16 +52,28 @@ class OrderTransformer(BaseExtractor):
 
         self.logger.info("Prepare config files for API calls")
 
-        template_str = prepare_config_files(self)
-        self.config_template = json.loads(template_str)
+        self.config_template = prepare_config_files(self)
+        self.retry_policy = RetryPolicy(self.config_template.get("api_request_template", {}).get("retry"))
+        self.circuit_breaker = get_circuit_breaker(
+            self.kwargs.get('vendor_id'),
+            self.config_template.get("api_request_template", {}).get("circuit_breaker")
+        )
 
         field_mapping_list = self.config_template.get('mapping').get('fulfillment_table')
         self.field_mapping = {
             fld_map.get('destination_field'): fld_map.get('source_field')
             for fld_map in field_mapping_list
         }
+        self.mapping_plan = get_mapping_plan(self.field_mapping, self.config_template)
+
+        # Parts of response which are not referred by the config are dropped before flattening
+        if (self.config_template.get("response_projection") or {}).get("enabled", True):
+            self.projection = PathProjection(self.config_template)
         return self
 
+    def project(self, response: Any) -> Any:
+        return self.projection.apply(response) if self.projection is not None else response
+
     def read_fetched_data(self) -> Any:
         self.logger.debug("Reading fetcher data")
         self.read_data()
@@ -93,11 +117,14 @@ class OrderTransformer(BaseExtractor):
             self.mapped_order_details.append(self.data)
 
         self.data = self.mapped_order_details
+        self.meta['deferred_orders'] = self.deferred_orders
+        if self.circuit_breaker is not None:
+            self.meta['circuit_breaker'] = self.circuit_breaker.summary
         return self
 
     def transformer(self) -> Any:
         self.logger.info("Deep flattening response")
-        flat_response = json_flattener(self.data)
+        flat_response = json_flattener(self.project(self.data))
         
         self.logger.info("Mapping objects from response to config file")
 
@@ -192,49 +219,52 @@ class OrderTransformer(BaseExtractor):
         return self
 
     def make_multi_api_call(self, order_obj: Dict, invoice_no: str = None) -> bool:
-        temp_config_template = copy.deepcopy(self.config_template)
-
-        template_str = json.dumps(temp_config_template)
         self.logger.info("Replacing template values for API request")
 
-        # template_str = template_str.replace(f"{'<<invoice_number>>'}", invoice_no)
-        # template_str = template_str.replace(f"{'<<so_number>>'}", self._sonumber)
         order_obj.setdefault('so_number', self._sonumber)
 
-        for k,v in order_obj.items():
-            if (
-                self.config_template.get("data")
-                and self.config_template.get("data").get("payload_value_to_upper")
-                and k in self.config_template.get("data").get("payload_value_to_upper")
-            ):
-                v = str(v).upper()
-            template_str = template_str.replace(f'<<{k}>>', str(v))
-
-        loaded_template_str = json.loads(template_str)
-
-        method = loaded_template_str.get("multi_api_call").get("url").get('method')
-        url = loaded_template_str.get("multi_api_call").get("url").get("raw")
+        # Only the parts of config needed for the second call are rendered with values of order
+        method = self.compiled_template.get(("multi_api_call", "url", "method"), order_obj)
+        url = self.compiled_template.get(("multi_api_call", "url", "raw"), order_obj)
         headers = { item.get("key"):item.get("value") for item in self.config_template.get("multi_api_call").get("header") }
-        data = loaded_template_str.get("data").get("xml_payload_second") if loaded_template_str.get("data") else None
+        data = self.compiled_template.get(("data", "xml_payload_second"), order_obj)
 
-        if loaded_template_str.get("data").get("x-www-form-urlencoded"):
-            data = loaded_template_str.get("data").get("x-www-form-urlencoded")
+        if self.config_template.get("data").get("x-www-form-urlencoded"):
+            data = self.compiled_template.get(("data", "x-www-form-urlencoded"), order_obj)
 
-        response = make_api_call(
-            url=url,
-            data=data,
-            method=method,
-            header=headers
-        )
+        try:
+            response = make_api_call(
+                url=url,
+                data=data,
+                method=method,
+                header=headers,
+                client_key=self.kwargs.get('vendor_id'),
+                rate_limiter=get_rate_limiter(
+                    self.kwargs.get('vendor_id'),
+                    config=self.config_template.get("api_request_template", {}).get("rate_limit")
+                ),
+                retry_policy=self.retry_policy,
+                deadline=self.deadline,
+                circuit_breaker=self.circuit_breaker,
+                timeout=self.config_template.get("api_request_template", {}).get("timeout", DEFAULT_REQUEST_TIMEOUT)
+            )
+        except CircuitOpenError:
+            self.logger.warning("Circuit of vendor is open. Deferring second api call of sonumber %s" % self._sonumber)
+            self.deferred_orders += 1
+            self.data = {}
+            return False
 
         if response.status_code in range(200, 210) and len(response.text) > 0:
             try:
-                response_content = response.text
                 if self.kwargs.get("vendor_type") == "xml":
-                    response_content = json.dumps(xmltodict.parse(response_content))
-
-                self.logger.info("Parsing xml response to python dictionary")
-                deserialized_response = json.loads(response_content)
+                    # Flattened straight from xml, same keys as flattening the parsed dictionary
+                    self.logger.info("Parsing xml response to flattened dictionary")
+                    flat_response = xml_flattener(
+                        response.text,
+                        (self.config_template.get("xml_flatten") or {}).get("multi_api_call_prefixes")
+                    )
+                else:
+                    flat_response = json_flattener(self.project(json.loads(response.text)))
             except Exception as e:
                 self.logger.error(
                     "Error during deserialization of response from vendor",
@@ -242,8 +272,6 @@ class OrderTransformer(BaseExtractor):
                 )
                 raise Exception(e)
 
-            flat_response = json_flattener(deserialized_response)
-
             try:
                 mapped_object = map_object_with_config(self, flat_response)
             except Exception as e:
@@ -254,7 +282,7 @@ class OrderTransformer(BaseExtractor):
                 self.logger.error(e, exc_info=True)
                 return
             
-            if loaded_template_str.get('use_items_from_first_api_call'):
+            if self.config_template.get('use_items_from_first_api_call'):
                 mapped_object.update({'items': order_obj.get('items')})
 
             mapped_object.update({
@@ -1,17 +1,29 @@
 from op_fetcher.common.helpers import (
+    map_bounded,
+    OrderBatch,
     make_api_call,
+    get_rate_limiter,
+    RetryPolicy,
+    CircuitOpenError,
+    get_circuit_breaker,
+    PollingSchedule,
     prepare_config_files,
-    get_mapped_order_status
+    get_mapped_order_status,
+    PathProjection
 )
-from op_fetcher.common.orm_handler.common_orm import execute_sql_query
+from op_fetcher.common.orm_handler.common_orm import stream_sql_query
+from op_fetcher.order_processing.fetcher.response_cache import ResponseCache
+from op_fetcher.orm import VbPurchaseOrder
 from op_fetcher.sql_queries import (
     QUERY_SELECT_SALESORDER
 )
 from op_fetcher.constants import (
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_REQUEST_TIMEOUT,
     PURCHASE_ORDER_STATUS_FOR_VENDOR_BILLING
 )
 from op_fetcher.base_class import BaseFetcher
-from typing import Any
+from typing import Any, Dict, List, Union
 import json
 
 
@@ -22,6 +34,18 @@ class JsonVendorOrderFetcher(BaseFetcher):
         self.required_template = None
         self.order_detail_list = []
         self.is_serialized = None
+        self.max_in_flight = DEFAULT_MAX_IN_FLIGHT
+        self.rate_limiter = None
+        self.retry_policy = None
+        self.circuit_breaker = None
+        self.deferred_orders = []
+        # purchase_order_id of orders which got a valid response from vendor
+        self.polled_orders = set()
+        self.compiled_template = None
+        self.response_cache = None
+        self.polling_schedule = None
+        self.batch = None
+        self.projection = None
 
         # Check if all the mandatory parameters are present
         mandatory_params = ['vendor_id', 'config_file_path']
@@ -36,11 +60,13 @@ class JsonVendorOrderFetcher(BaseFetcher):
 
         self.logger.info("Prepare config files for API calls")
 
-        template_str = prepare_config_files(self)
-        self.config_template = json.loads(template_str)
+        self.config_template = prepare_config_files(self)
         return self
 
-    def api_response_not_valid(self, flatten_response, response):
+    def api_response_not_valid(self, flatten_response, response, required_template=None):
+        if required_template is None:
+            required_template = self.required_template
+
         error_obj = {}
         error_obj.update({
             "status_from_vendor": "ERROR",
@@ -48,14 +74,14 @@ class JsonVendorOrderFetcher(BaseFetcher):
         })
 
         # error mapped to a status_vendor and vendor_message in db table to prevent re-ping to vendor for that order
-        if self.required_template.get("error_mapping"):
+        if required_template.get("error_mapping"):
             self.logger.info("Trying to map error from error_mapping field in vendor config file")
 
             error_status = flatten_response.get(
-                self.required_template.get("error_mapping").get("error_status")
+                required_template.get("error_mapping").get("error_status")
             )
             _mapped_status = get_mapped_order_status(
-                self.required_template.get("order_status_mapping"),
+                required_template.get("order_status_mapping"),
                 error_status
             )
 
@@ -63,10 +89,10 @@ class JsonVendorOrderFetcher(BaseFetcher):
                 "status_from_vendor": _mapped_status if _mapped_status else "ERROR"
             })
 
-            if flatten_response.get(self.required_template.get("error_mapping").get("error_message")):
+            if flatten_response.get(required_template.get("error_mapping").get("error_message")):
                 error_obj.update({
                     "vendor_message": flatten_response.get(
-                        self.required_template.get("error_mapping").get("error_message"))
+                        required_template.get("error_mapping").get("error_message"))
                 })
             else:
                 self.logger.info("Vendor Message Couldnot be updated for error mapping")
@@ -74,14 +100,14 @@ class JsonVendorOrderFetcher(BaseFetcher):
             self.logger.info("Field to map error not found in vendor config file. Moving onto next statement")
 
             ## fault error mapped to a status_vendor and vendor_message in db table to prevent re-ping to vendor for that order 
-            if self.required_template.get("fault_error_mapping"):
+            if required_template.get("fault_error_mapping"):
                 self.logger.info("Trying to map error from fault_error_mapping field in vendor config file")
 
                 error_status = flatten_response.get(
-                    self.required_template.get("fault_error_mapping").get("fault_error_status")
+                    required_template.get("fault_error_mapping").get("fault_error_status")
                 )
                 _mapped_status = get_mapped_order_status(
-                    self.required_template.get("order_status_mapping"),
+                    required_template.get("order_status_mapping"),
                     error_status
                 )
 
@@ -89,10 +115,10 @@ class JsonVendorOrderFetcher(BaseFetcher):
                     "status_from_vendor": _mapped_status if _mapped_status else "ERROR"
                 })
 
-                if flatten_response.get(self.required_template.get("fault_error_mapping").get("fault_error_message")):
+                if flatten_response.get(required_template.get("fault_error_mapping").get("fault_error_message")):
                     error_obj.update({
                         "vendor_message": flatten_response.get(
-                            self.required_template.get("fault_error_mapping").get("fault_error_message"))
+                            required_template.get("fault_error_mapping").get("fault_error_message"))
                     })
                 else:
                     self.logger.info("Vendor Message Couldnot be updated for fault error mapping")
@@ -101,67 +127,258 @@ class JsonVendorOrderFetcher(BaseFetcher):
 
         return error_obj
 
+    def send_request(self, values: Dict, order_number: str = None) -> Any:
+        """
+        Renders the request from vendor config with values and sends it to vendor
+
+        :param values: values for placeholders of the request, an order or a batch of orders
+        :type values: dict
+
+        :param order_number: order whose conditional headers are sent, None for a batch
+        :type order_number: str
+        """
+
+        # Only the parts of config needed for the request are rendered with values of order
+        self.logger.info("Replacing template values for API request")
+        method = self.compiled_template.get(("api_request_template", "url", "method"), values)
+        url = self.compiled_template.get(("api_request_template", "url", "raw"), values)
+        headers = {
+            item.get("key"): item.get("value")
+            for item in self.compiled_template.get(("api_request_template", "header"), values, [])
+        }
+        if order_number is not None:
+            headers.update(self.response_cache.conditional_headers(order_number))
+
+        self.logger.info("Sending request to vendor for order status")
+        return make_api_call(
+            method=method,
+            header=headers,
+            url=url,
+            client_key=self.kwargs.get('vendor_id'),
+            pool_maxsize=self.max_in_flight,
+            rate_limiter=self.rate_limiter,
+            retry_policy=self.retry_policy,
+            deadline=self.deadline,
+            circuit_breaker=self.circuit_breaker,
+            timeout=self.config_template.get("api_request_template").get("timeout", DEFAULT_REQUEST_TIMEOUT)
+        )
+
+    def fetch_order(self, so: Dict) -> Union[Dict, None]:
+        """
+        Sends request to vendor for a single sales order and returns deserialized response
+        """
+
+        self.logger.debug(
+            "Processing for vendor {%s} and sonumber {%s}" % (self.kwargs.get('vendor_id'), so.get('so_number')))
+        self.logger.info(
+            "Processing for vendor {%s} and sonumber {%s}" % (self.kwargs.get('vendor_id'), so.get('so_number')))
+
+        is_serialized = so.pop('need_serial_no', None)
+
+        try:
+            response = self.send_request(so, so.get('so_number'))
+        except CircuitOpenError:
+            # Order is polled again in next run, it is not rescheduled as failed
+            self.deferred_orders.append(so)
+            return None
+
+        # Not modified response has no body to validate, its content is the one cached
+        if response.status_code == 304 and self.response_cache.is_unchanged(so.get('so_number'), response):
+            self.logger.info("Response of order {%s} is unchanged since it was last sent" % so.get('so_number'))
+            self.polled_orders.add(so.get('purchase_order_id'))
+            return None
+
+        if len(response.text) == 0:
+            self.logger.error("Response from vendor has no content")
+            self.logger.error(response.reason, exc_info=True)
+            return None
+        else:
+            try:
+                response_deserialize = json.loads(response.text)
+            except Exception as e:
+                self.logger.error("Error during deserialization of response from vendor", exc_info=True)
+                raise Exception(e)
+
+        if response.status_code not in range(200, 210):
+            self.logger.error("The response from an API is not valid")
+            self.logger.error(
+                "Could not get data from an API. API returned HTTP Status code: {}".format(response.status_code),
+                exc_info=True)
+            return None
+
+        # Order is rescheduled only when vendor answered it, failed orders stay due
+        self.polled_orders.add(so.get('purchase_order_id'))
+
+        # Only valid responses are cached, so an error repeated by vendor is not taken as unchanged
+        if self.response_cache.is_unchanged(so.get('so_number'), response):
+            self.logger.info("Response of order {%s} is unchanged since it was last sent" % so.get('so_number'))
+            return None
+
+        if self.projection is not None:
+            response_deserialize = self.projection.apply(response_deserialize)
+
+        response_deserialize.update({
+            "__need_serial_number__": is_serialized,
+            "__sales_order_number__": so.get('so_number')
+        })
+        return response_deserialize
+
+    def fetch_batch(self, sales_orders: List[Dict]) -> List[Dict]:
+        """
+        Sends one request to vendor for a batch of sales orders and splits the
+        deserialized response into a record per sales order
+        """
+
+        self.logger.info(
+            "Processing for vendor {%s} and batch of %s sonumbers" % (self.kwargs.get('vendor_id'), len(sales_orders)))
+
+        try:
+            response = self.send_request(self.batch.values(sales_orders))
+        except CircuitOpenError:
+            self.deferred_orders.extend(sales_orders)
+            return []
+
+        if len(response.text) == 0:
+            self.logger.error("Response from vendor has no content")
+            self.logger.error(response.reason, exc_info=True)
+            return []
+        else:
+            try:
+                response_deserialize = json.loads(response.text)
+            except Exception as e:
+                self.logger.error("Error during deserialization of response from vendor", exc_info=True)
+                raise Exception(e)
+
+        if response.status_code not in range(200, 210):
+            self.logger.error("The response from an API is not valid")
+            self.logger.error(
+                "Could not get data from an API. API returned HTTP Status code: {}".format(response.status_code),
+                exc_info=True)
+            return []
+
+        # Orders not found in the response are answered as well
+        self.polled_orders.update(so.get('purchase_order_id') for so in sales_orders)
+
+        order_details = []
+        records = self.batch.demultiplex(response_deserialize, sales_orders)
+        for so, record in records:
+            if self.response_cache.is_record_unchanged(so.get('so_number'), record):
+                self.logger.info("Response of order {%s} is unchanged since it was last sent" % so.get('so_number'))
+                continue
+
+            if self.projection is not None:
+                record = self.projection.apply(record)
+            record.update({
+                "__need_serial_number__": so.get('need_serial_no'),
+                "__sales_order_number__": so.get('so_number')
+            })
+            order_details.append(record)
+
+        if len(records) < len(sales_orders):
+            self.logger.info("%s order(s) of batch not found in response" % (len(sales_orders) - len(records)))
+        return order_details
+
+    def reschedule_orders(self, orders: List[Dict]) -> None:
+        """
+        Sets when each polled order is due again. Failure is only logged since
+        orders which are not rescheduled stay due and are polled in next run
+        """
+        try:
+            VbPurchaseOrder().update_polling_schedule([
+                {
+                    "id": order.get('purchase_order_id'),
+                    "next_check_at": self.polling_schedule.next_check_at(order)
+                }
+                for order in orders
+            ])
+        except Exception:
+            self.logger.error("Couldnot update polling schedule of orders", exc_info=True)
+
     def extractor(self) -> Any:
-        # Fetch list of sales orders of a vendor for calling vendor api
+        # Fetch list of sales orders of a vendor for calling vendor api. Only orders
+        # due for polling are fetched, oldest due first and capped per run
+        self.polling_schedule = PollingSchedule(self.config_template.get("polling_schedule"))
         sql = QUERY_SELECT_SALESORDER % (
             self.kwargs.get('vendor_id'),
-            PURCHASE_ORDER_STATUS_FOR_VENDOR_BILLING
+            PURCHASE_ORDER_STATUS_FOR_VENDOR_BILLING,
+            self.polling_schedule.max_orders_per_run
         )
-        queryset = execute_sql_query(sql)
-
-        headers = {item.get("key"): item.get("value") for item in
-                   self.config_template.get("api_request_template").get("header")}
-        for so in queryset.to_list():
-            self.logger.debug(
-                "Processing for vendor {%s} and sonumber {%s}" % (self.kwargs.get('vendor_id'), so.get('so_number')))
-            self.logger.info(
-                "Processing for vendor {%s} and sonumber {%s}" % (self.kwargs.get('vendor_id'), so.get('so_number')))
-
-            self.is_serialized = so.get('need_serial_no')
-            del so['need_serial_no']
-
-            template_str = json.dumps(self.config_template)
-            self.logger.info("Replacing template values for API request")
-
-            for k, v in so.items():
-                if (
-                        self.config_template.get("data")
-                        and self.config_template.get("data").get("payload_value_to_upper")
-                        and k in self.config_template.get("data").get("payload_value_to_upper")
-                ):
-                    v = str(v).upper()
-                template_str = template_str.replace(f'<<{k}>>', v)
-
-            self.required_template = json.loads(template_str)
-
-            self.logger.info("Sending request to vendor for order status")
-            method = self.required_template.get("api_request_template").get("url").get("method")
-            url = self.required_template.get("api_request_template").get("url").get("raw")
-            response = make_api_call(method=method, header=headers, url=url)
-
-            if len(response.text) == 0:
-                self.logger.error("Response from vendor has no content")
-                self.logger.error(response.reason, exc_info=True)
-                continue
-            else:
-                try:
-                    response_deserialize = json.loads(response.text)
-                except Exception as e:
-                    self.logger.error("Error during deserialization of response from vendor", exc_info=True)
-                    raise Exception(e)
-
-            if response.status_code not in range(200, 210):
-                self.logger.error("The response from an API is not valid")
-                self.logger.error(
-                    "Could not get data from an API. API returned HTTP Status code: {}".format(response.status_code),
-                    exc_info=True)
-                continue
-            else:
-                response_deserialize.update({
-                    "__need_serial_number__": self.is_serialized,
-                    "__sales_order_number__": so.get('so_number')
-                })
-                self.order_detail_list.append(response_deserialize)
+        # Orders are kept for rescheduling after vendor calls, so they are read into a list here,
+        # without holding the cursor open over the calls. Rows are fetched in batches as dicts
+        with stream_sql_query(sql) as rows:
+            orders = list(rows)
+        self.logger.info("%s order(s) due for polling" % len(orders))
+        self.meta['due_orders'] = len(orders)
+
+        self.max_in_flight = self.config_template.get("api_request_template").get(
+            "max_in_flight", DEFAULT_MAX_IN_FLIGHT
+        )
+        self.rate_limiter = get_rate_limiter(
+            self.kwargs.get('vendor_id'),
+            self.max_in_flight,
+            self.config_template.get("api_request_template").get("rate_limit")
+        )
+        self.retry_policy = RetryPolicy(self.config_template.get("api_request_template").get("retry"))
+        self.circuit_breaker = get_circuit_breaker(
+            self.kwargs.get('vendor_id'),
+            self.config_template.get("api_request_template").get("circuit_breaker")
+        )
+        self.response_cache = ResponseCache(
+            self.kwargs.get('vendor_id'),
+            self.config_template.get("api_request_template").get("response_cache")
+        ).load()
+
+        # Responses are stored with only the paths the extractor maps, when opted in by vendor config
+        response_projection = self.config_template.get("response_projection") or {}
+        if response_projection.get("enabled", True) and response_projection.get("at_fetch"):
+            self.projection = PathProjection(self.config_template)
+        self.logger.info("Fetching order status with %s request(s) in flight" % self.max_in_flight)
+
+        # Responses are kept in the order of the sales orders from the query
+        batch_config = self.config_template.get("api_request_template").get("batch")
+        if batch_config:
+            self.batch = OrderBatch(
+                batch_config,
+                order_number_field='so_number',
+                upper_keys=self.compiled_template.upper_keys
+            )
+            batches = self.batch.split(orders)
+            self.logger.info("Fetching %s order(s) in %s batch request(s)" % (len(orders), len(batches)))
+            for responses in map_bounded(self.fetch_batch, batches, self.max_in_flight):
+                self.order_detail_list.extend(responses or [])
+        else:
+            responses = map_bounded(
+                self.fetch_order,
+                orders,
+                self.max_in_flight
+            )
+            self.order_detail_list.extend(
+                response for response in responses if response is not None
+            )
+
+        self.logger.info("Rate limiter state after fetching: %s" % self.rate_limiter.state)
+
+        self.response_cache.save()
+        self.logger.info("%s unchanged response(s) skipped" % self.response_cache.unchanged)
+        self.meta['unchanged_orders'] = self.response_cache.unchanged
+
+        if self.deferred_orders:
+            self.logger.warning(
+                "%s order(s) deferred as circuit of vendor is open: %s" % (len(self.deferred_orders), self.circuit_breaker.summary))
+        self.meta['deferred_orders'] = len(self.deferred_orders)
+        self.meta['circuit_breaker'] = self.circuit_breaker.summary
+
+        # Deferred orders and orders whose request failed (eg: deadline reached, connection or
+        # deserialization error) were not polled, they are not backed off and stay due
+        deferred = {order.get('purchase_order_id') for order in self.deferred_orders}
+        failed_orders = [
+            order for order in orders
+            if order.get('purchase_order_id') not in self.polled_orders and order.get('purchase_order_id') not in deferred
+        ]
+        if failed_orders:
+            self.logger.warning("%s order(s) got no valid response from vendor and stay due" % len(failed_orders))
+        self.meta['failed_orders'] = len(failed_orders)
+        self.reschedule_orders([order for order in orders if order.get('purchase_order_id') in self.polled_orders])
 
         self.data = self.order_detail_list
         return self
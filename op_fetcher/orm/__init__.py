@@ -2,3 +2,5 @@ from op_fetcher.orm.billing import *
 from op_fetcher.orm.sales_order import *
 from op_fetcher.orm.billing_items import *
 from op_fetcher.orm.purchase_order import *
+from op_fetcher.orm.response_cache import *
+from op_fetcher.orm.netsuite_sync_state import *
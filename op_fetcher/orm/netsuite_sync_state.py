@@ -0,0 +1,56 @@
+from op_fetcher.sql_queries import (
+    QUERY_SELECT_NETSUITE_SYNC_STATE,
+    QUERY_UPSERT_NETSUITE_SYNC_STATE
+)
+from op_fetcher.common.orm_handler.base_orm import VBOrmBase
+from op_fetcher.schema import NetsuiteSyncStateSchema
+from op_fetcher.conf import get_logger, li_db
+from typing import Dict, Union
+
+
+logger = get_logger()
+
+
+class VbNetsuiteSyncState(VBOrmBase):
+    __table_name__ = 'netsuite_sync_state'
+    __schema__ = NetsuiteSyncStateSchema()
+
+    def get_state(
+        self,
+        environment: str
+    ) -> Union[Dict, None]:
+        """
+        Get watermark and time of last full sync from netsuite for given environment
+        """
+        try:
+            with li_db.transaction(auto_commit=True) as query_set:
+                result_set = query_set.execute_query(
+                    QUERY_SELECT_NETSUITE_SYNC_STATE,
+                    {
+                        "environment": environment
+                    }
+                )
+                logger.debug(f'Executed Query {query_set.query}')
+                result_set = result_set.to_list()
+                return result_set[0] if result_set else None
+        except Exception as ex:
+            logger.error("error while fetching netsuite sync state", exc_info=True)
+            raise ex
+
+    def save_state(
+        self,
+        state: Dict
+    ) -> None:
+        """
+        Saves state of a successful sync. last_full_sync_at is kept as it is when None
+        """
+        logger.info("Saving netsuite sync state of %s" % state.get('environment'))
+        try:
+            with li_db.transaction(auto_commit=True) as query_set:
+                query_set.execute_query(QUERY_UPSERT_NETSUITE_SYNC_STATE, state)
+                logger.debug(f'Executed Query {query_set.query}')
+        except Exception as e:
+            logger.error('Error while saving netsuite sync state', exc_info=True)
+            raise e
+
+        return
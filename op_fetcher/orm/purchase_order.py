@@ -1,7 +1,11 @@
-from op_fetcher.sql_queries import QUERY_UPSERT_PURCHASE_ORDER
+from op_fetcher.sql_queries import (
+    QUERY_MERGE_PURCHASE_ORDER,
+    QUERY_UPDATE_PURCHASE_ORDER_POLLING_SCHEDULE
+)
 from op_fetcher.common.orm_handler.base_orm import VBOrmBase
 from op_fetcher.schema import PurchaseOrderSchema
 from op_fetcher.conf import get_logger, li_db
+from typing import List
 
 
 logger = get_logger()
@@ -18,20 +22,42 @@ class VbPurchaseOrder(VBOrmBase):
         on_conflict_update_fields: str
     ):
 
-        columns = ", ".join(data[0].keys())
+        logger.info("Loading purchase order details from netsuite into DB")
+
+        # point_id -> id of inserted or changed purchase orders
+        return self.bulk_merge(
+            data,
+            QUERY_MERGE_PURCHASE_ORDER,
+            conflict_fields=conflict_fields,
+            on_conflict_update_fields=on_conflict_update_fields
+        )
+
+    def update_polling_schedule(
+        self,
+        data: List
+    ) -> None:
+        """
+        Sets next_check_at and increments check_count of polled purchase orders
+
+        :param data: list of dict with id and next_check_at of purchase order
+        :type data: list
+        """
+
+        if len(data) < 1:
+            logger.info("No purchase orders to reschedule")
+            return
+
         placeholders = ", ".join(['%s'] * len(data))
-        sql = QUERY_UPSERT_PURCHASE_ORDER % (
+        sql = QUERY_UPDATE_PURCHASE_ORDER_POLLING_SCHEDULE % (
+            self.__table_name__,
             self.__table_name__,
-            columns,
             placeholders,
-            conflict_fields,
-            on_conflict_update_fields
+            self.__table_name__
         )
 
-        value_list = [tuple(obj.values()) for obj in data]
-
-        logger.info("Loading purchase order details from netsuite into DB")
+        value_list = [(obj.get('id'), obj.get('next_check_at')) for obj in data]
 
+        logger.info("Updating polling schedule of purchase orders")
         try:
             with li_db.transaction(auto_commit=True) as query_set:
                 query_set.execute_query(sql, tuple(value_list))
@@ -3,7 +3,13 @@ QUERY_FETCH_VENDORS_INFORMATION = ("""
         'vendor_id', vconfig.vendor_id,
         'config_file_path', %(config_file_path)s||vconfig.vendor_id::text||'.json',
         'template_values', jsonb_object_agg(key_name, value),
-        'connection_type', ven.connection_type
+        'connection_type', ven.connection_type,
+        'due_orders', (
+            SELECT count(*) FROM purchase_order po
+            WHERE po.vendor_id = vconfig.vendor_id
+            AND po.purchase_order_status in %(purchase_order_status)s
+            AND (po.next_check_at IS NULL OR po.next_check_at <= timezone('utc', now()))
+        )
     )
     FROM vendor_configs vconfig
     INNER JOIN purchase_order vo
@@ -13,26 +19,52 @@ QUERY_FETCH_VENDORS_INFORMATION = ("""
     group by vconfig.vendor_id, ven.connection_type;
 """)
 
-QUERY_UPSERT_SALES_ORDER = ("""
+QUERY_CREATE_STAGING_TABLE = ("""
+    CREATE TEMP TABLE %(staging_table)s ON COMMIT DROP AS
+    SELECT %(column_names)s FROM %(table_name)s WITH NO DATA;
+""")
+
+QUERY_COPY_INTO_STAGING_TABLE = ("""
+    COPY %(staging_table)s (%(column_names)s) FROM STDIN
+""")
+
+QUERY_MERGE_BULK_DATA = ("""
+    INSERT INTO %(table_name)s (%(column_names)s)
+    SELECT %(column_names)s FROM %(staging_table)s
+    %(on_conflict)s;
+""")
+
+QUERY_MERGE_SALES_ORDER = ("""
     WITH insert_salesorder AS (
-        INSERT INTO %s (%s)
-        VALUES %s
-        ON CONFLICT (%s) DO UPDATE SET %s
+        INSERT INTO %(table_name)s (%(column_names)s)
+        SELECT %(column_names)s FROM %(staging_table)s
+        ON CONFLICT (%(conflict_fields)s) DO UPDATE SET %(on_conflict_update_fields)s
         returning id, soint_id
     )
-    SELECT jsonb_agg(
-        json_build_object(
-            soint_id, id
-        )
+    SELECT jsonb_object_agg(
+        soint_id, id
     )
-    FROM insert_salesorder;
+    FROM (
+        SELECT id, soint_id FROM insert_salesorder
+        UNION
+        SELECT so.id, so.soint_id FROM %(table_name)s so
+        INNER JOIN %(staging_table)s staged
+        ON staged.soint_id = so.soint_id
+    ) sales_order_ids;
 """)
 
-QUERY_UPSERT_PURCHASE_ORDER = ("""
-    INSERT INTO %s (%s)
-    VALUES %s
-    ON CONFLICT (%s)
-    DO UPDATE SET %s;
+QUERY_MERGE_PURCHASE_ORDER = ("""
+    WITH insert_purchaseorder AS (
+        INSERT INTO %(table_name)s (%(column_names)s)
+        SELECT %(column_names)s FROM %(staging_table)s
+        ON CONFLICT (%(conflict_fields)s)
+        DO UPDATE SET %(on_conflict_update_fields)s
+        returning id, point_id
+    )
+    SELECT jsonb_object_agg(
+        point_id, id
+    )
+    FROM insert_purchaseorder;
 """)
 
 QUERY_UPDATE_SALESORDER_NUMBER_BY_CHECKING_SUBSTR = ("""
@@ -45,11 +77,20 @@ QUERY_UPDATE_SALESORDER_NUMBER_BY_CHECKING_SUBSTR = ("""
 """)
 
 QUERY_SELECT_SALESORDER = (""" 
-    SELECT o.vendor_so_number AS so_number, o.need_serial_number AS need_serial_no
+    SELECT o.vendor_so_number AS so_number, o.need_serial_number AS need_serial_no,
+    o.id AS purchase_order_id, o.check_count, COALESCE(o.tran_date, o.created_at::date) AS order_date,
+    f.invoice_status, f.ship_date
     FROM purchase_order o 
-    LEFT JOIN vendor_invoice f 
-    ON o.id = f.purchase_order_id
-    WHERE o.vendor_id=%s AND o.purchase_order_status in %s;
+    LEFT JOIN LATERAL (
+        SELECT invoice_status, ship_date FROM vendor_invoice
+        WHERE purchase_order_id = o.id
+        ORDER BY COALESCE(modified_at, created_at) DESC
+        LIMIT 1
+    ) f ON true
+    WHERE o.vendor_id=%s AND o.purchase_order_status in %s
+    AND (o.next_check_at IS NULL OR o.next_check_at <= timezone('utc', now()))
+    ORDER BY o.next_check_at NULLS FIRST, o.id
+    LIMIT %s;
 """)
 
 QUERY_SELECT_ORDER_ID = ("""
@@ -63,11 +104,20 @@ QUERY_FETCH_INVOICE_NUMBERS = ("""
 """)
 
 QUERY_SELECT_PURCHASE_ORDER_AND_SALESORDER = (""" 
-    SELECT o.vendor_po_number AS po_number, o.vendor_so_number AS so_number, o.need_serial_number AS need_serial_no
+    SELECT o.vendor_po_number AS po_number, o.vendor_so_number AS so_number, o.need_serial_number AS need_serial_no,
+    o.id AS purchase_order_id, o.check_count, COALESCE(o.tran_date, o.created_at::date) AS order_date,
+    f.invoice_status, f.ship_date
     FROM purchase_order o 
-    LEFT JOIN vendor_invoice f 
-    ON o.id = f.purchase_order_id 
-    WHERE o.vendor_id=%s AND o.purchase_order_status in %s;
+    LEFT JOIN LATERAL (
+        SELECT invoice_status, ship_date FROM vendor_invoice
+        WHERE purchase_order_id = o.id
+        ORDER BY COALESCE(modified_at, created_at) DESC
+        LIMIT 1
+    ) f ON true
+    WHERE o.vendor_id=%s AND o.purchase_order_status in %s
+    AND (o.next_check_at IS NULL OR o.next_check_at <= timezone('utc', now()))
+    ORDER BY o.next_check_at NULLS FIRST, o.id
+    LIMIT %s;
 """)
 
 QUERY_SELECT_ORDER_ID_FOR_GIVEN_SO_NUMBER = ("""
@@ -86,10 +136,35 @@ QUERY_FETCH_INVOICE_NUMBER_FOR_ORDER = ("""
     AND invoice_number IS NOT NULL;
 """)
 
-QUERY_UPSERT_INTO_ORDER_BILL = ("""
-    WITH insert_bill AS (              
-        INSERT INTO %s (%s)
-        VALUES %s
+QUERY_SELECT_ORDER_IDS_FOR_GIVEN_NUMBERS = ("""
+    SELECT DISTINCT ON (numbers.number_type, numbers.number)
+        numbers.number_type, numbers.number, numbers.id
+    FROM (
+        SELECT 'so_number' AS number_type, po.vendor_so_number AS number, po.id
+        FROM purchase_order po
+        INNER JOIN unnest(%(so_numbers)s::text[]) AS so(number)
+        ON po.vendor_so_number = so.number
+        WHERE po.vendor_id = %(vendor_id)s
+        UNION ALL
+        SELECT 'po_number' AS number_type, po.vendor_po_number AS number, po.id
+        FROM purchase_order po
+        INNER JOIN unnest(%(po_numbers)s::text[]) AS pn(number)
+        ON po.vendor_po_number = pn.number
+        WHERE po.vendor_id = %(vendor_id)s
+    ) numbers
+    ORDER BY numbers.number_type, numbers.number, numbers.id;
+""")
+
+QUERY_FETCH_INVOICE_NUMBERS_FOR_ORDERS = ("""
+    SELECT purchase_order_id, invoice_number FROM vendor_invoice
+    WHERE purchase_order_id = ANY(%(order_ids)s::int[])
+    AND invoice_number IS NOT NULL;
+""")
+
+QUERY_MERGE_INTO_ORDER_BILL = ("""
+    WITH insert_bill AS (
+        INSERT INTO %(table_name)s (%(column_names)s)
+        SELECT %(column_names)s FROM %(staging_table)s
         ON CONFLICT (purchase_order_id, COALESCE(invoice_number, '-1'))
         DO UPDATE SET invoice_status=EXCLUDED.invoice_status, deliveries=EXCLUDED.deliveries
         RETURNING purchase_order_id, id AS order_bill_id
@@ -102,9 +177,10 @@ QUERY_UPSERT_INTO_ORDER_BILL = ("""
     FROM insert_bill;
 """)
 
-QUERY_UPSERT_INTO_ORDER_BILL_ITEMS = ("""
-    DELETE FROM %(table_name)s WHERE vendor_invoice_id IN %(vendor_invoice_id)s;
-    INSERT INTO %(table_name)s (%(column_names)s) VALUES %(values)s;
+QUERY_MERGE_INTO_ORDER_BILL_ITEMS = ("""
+    DELETE FROM %(table_name)s WHERE vendor_invoice_id = ANY(%%(vendor_invoice_ids)s::int[]);
+    INSERT INTO %(table_name)s (%(column_names)s)
+    SELECT %(column_names)s FROM %(staging_table)s;
 """)
 
 QUERY_FETCH_VENDOR_BILL_OBJECT = ("""
@@ -200,3 +276,48 @@ QUERY_UPDATE_PURCHASE_ORDER_STATUS = (
     ) AS tmp_table
     WHERE %s;
 """)
+
+QUERY_SELECT_VENDOR_RESPONSE_CACHE = ("""
+    SELECT order_number, etag, last_modified, content_hash, pending_hash, sent_at
+    FROM vendor_response_cache
+    WHERE vendor_id = %(vendor_id)s;
+""")
+
+QUERY_UPSERT_VENDOR_RESPONSE_CACHE = ("""
+    INSERT INTO %s (%s)
+    VALUES %s
+    ON CONFLICT (vendor_id, order_number)
+    DO UPDATE SET etag=EXCLUDED.etag, last_modified=EXCLUDED.last_modified,
+    pending_hash=EXCLUDED.pending_hash;
+""")
+
+QUERY_CONFIRM_VENDOR_RESPONSE_CACHE = ("""
+    UPDATE vendor_response_cache
+    SET content_hash = pending_hash, pending_hash = NULL, sent_at = timezone('utc', now())
+    WHERE vendor_id = %(vendor_id)s
+    AND order_number = ANY(%(order_numbers)s::text[])
+    AND pending_hash IS NOT NULL;
+""")
+
+QUERY_UPDATE_PURCHASE_ORDER_POLLING_SCHEDULE = ("""
+    UPDATE %s
+    SET next_check_at = tmp_table.next_check_at,
+    check_count = %s.check_count + 1
+    FROM (VALUES %s) AS tmp_table (id, next_check_at)
+    WHERE %s.id = tmp_table.id;
+""")
+
+QUERY_SELECT_NETSUITE_SYNC_STATE = ("""
+    SELECT environment, last_modified_watermark, last_full_sync_at, last_synced_at, last_synced_rows
+    FROM netsuite_sync_state
+    WHERE environment = %(environment)s;
+""")
+
+QUERY_UPSERT_NETSUITE_SYNC_STATE = ("""
+    INSERT INTO netsuite_sync_state (environment, last_modified_watermark, last_full_sync_at, last_synced_at, last_synced_rows)
+    VALUES (%(environment)s, %(last_modified_watermark)s, %(last_full_sync_at)s, %(last_synced_at)s, %(last_synced_rows)s)
+    ON CONFLICT (environment)
+    DO UPDATE SET last_modified_watermark=EXCLUDED.last_modified_watermark,
+    last_full_sync_at=COALESCE(EXCLUDED.last_full_sync_at, netsuite_sync_state.last_full_sync_at),
+    last_synced_at=EXCLUDED.last_synced_at, last_synced_rows=EXCLUDED.last_synced_rows;
+""")
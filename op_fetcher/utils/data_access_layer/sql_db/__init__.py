@@ -27,7 +27,7 @@ class DBEngineFactory:
     POSTGRES: ClassVar[int] = 1
 
     @staticmethod
-    def get_db_engine(config, engine_type: int) -> DBDALBase:
+    def get_db_engine(config, engine_type: int, pool_config=None, instrumentation_config=None) -> DBDALBase:
         """Factory static method to get appropirate DB DAL accroding to
         supplied engine type.
 
@@ -35,9 +35,13 @@ class DBEngineFactory:
                          as per db server type.
         :param engine_type: value to denote which server to connect to. For now only
                              `DBEngineFactory.POSTGRES` is available.
+        :param pool_config: dict settings of the connection pool of the DAL, optional
+        :param instrumentation_config: dict settings of query instrumentation of the DAL, optional
 
         :type config: dict
         :type engine_type: int
+        :type pool_config: dict
+        :type instrumentation_config: dict
 
         :raises ValueError: Raised when `engine_type` isn't recognized
 
@@ -45,7 +49,7 @@ class DBEngineFactory:
         :rtype: DBDALBase
         """
         if engine_type == DBEngineFactory.POSTGRES:
-            return PgSQLDAL(config)
+            return PgSQLDAL(config, pool_config, instrumentation_config)
         else:
             raise ValueError(
                 'Only `DBEngineFactory.POSTGRES` is allowed as engine_type.')
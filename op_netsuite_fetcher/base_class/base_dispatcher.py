@@ -1,7 +1,8 @@
 from typing import Any
 from abc import abstractmethod
-from op_netsuite_fetcher.base_class.base import Base, requests, json
-from op_netsuite_fetcher.constants import ObjectType, CONFIG, ConfigFields, EXTRACTOR_WRITE_PATH
+from op_netsuite_fetcher.base_class.base import Base
+from op_netsuite_fetcher.common.helpers import read_artifact
+from op_netsuite_fetcher.constants import ObjectType, EXTRACTOR_WRITE_PATH
 
 
 class BaseDispatcher(Base):
@@ -11,25 +12,18 @@ class BaseDispatcher(Base):
         self.object_type = ObjectType.DISPATCHER
 
     def read_data(self) -> Any:
-        dir_path = EXTRACTOR_WRITE_PATH + "/" + self.kwargs.get('extractor_file_path')
+        if not self.kwargs.get('extractor_file_path'):
+            # Previous stage had no data to write
+            self.logger.info("No file to read. Continuing with empty data")
+            self.data = []
+            return
 
-        try:
-            if CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'blob':
-                self.logger.info("Reading files from azure blob")
-                with requests.get(
-                    CONFIG.get('CONFIG_DIRECTORY') + dir_path
-                ) as file:
-                    self.data = json.loads(file.text)
-            elif CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'local':
-                self.logger.info("Reading files from local directory")
-                with open(
-                    dir_path, 'r'
-                ) as file:
-                    self.data = json.load(file)
-            else:
-                self.logger.error("You need to pass fetcher_file_path")
-                raise Exception("Couldnot find fetcher_file_path")
+        key = EXTRACTOR_WRITE_PATH + "/" + self.kwargs.get('extractor_file_path')
 
+        try:
+            self.logger.info("Reading extracted data from %s" % key)
+            # Dispatcher iterates over records more than once, so they are kept in a list
+            self.data = list(read_artifact(key))
         except Exception as ex:
             self.logger.error(
                 "Error occured during reading fetched files",
@@ -46,4 +40,5 @@ class BaseDispatcher(Base):
         pass
 
     def execute(self) -> Any:
-        return self.read_transformed().loader().db_dispatcher()
+        with self.query_stats():
+            return self.read_transformed().loader().db_dispatcher()
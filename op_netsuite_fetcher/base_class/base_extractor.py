@@ -1,7 +1,8 @@
 from typing import Any
 from abc import abstractmethod
-from op_netsuite_fetcher.base_class.base import Base, requests, json
-from op_netsuite_fetcher.constants import ObjectType, CONFIG, ConfigFields, FETCHER_WRITE_PATH
+from op_netsuite_fetcher.base_class.base import Base
+from op_netsuite_fetcher.common.helpers import read_artifact
+from op_netsuite_fetcher.constants import ObjectType, FETCHER_WRITE_PATH
 
 
 class BaseExtractor(Base):
@@ -15,21 +16,18 @@ class BaseExtractor(Base):
         pass
 
     def read_data(self) -> Any:
-        dir_path = FETCHER_WRITE_PATH + "/" + self.kwargs.get('fetcher_file_path')
+        if not self.kwargs.get('fetcher_file_path'):
+            # Previous stage had no data to write
+            self.logger.info("No file to read. Continuing with empty data")
+            self.data = []
+            return
 
-        try:
-            if CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'blob':
-                self.logger.info("Reading files from azure blob")
-                with requests.get(CONFIG.get('CONFIG_DIRECTORY') + dir_path) as file:
-                    self.data = json.loads(file.text)
-            elif CONFIG.get(ConfigFields.CONFIG_FILE_TYPE.value) == 'local':
-                self.logger.info("Reading files from local directory")
-                with open(dir_path, 'r') as file:
-                    self.data = json.load(file)
-            else:
-                self.logger.error("You need to pass fetcher_file_path")
-                raise Exception("Couldnot find fetcher_file_path")
+        key = FETCHER_WRITE_PATH + "/" + self.kwargs.get('fetcher_file_path')
 
+        try:
+            self.logger.info("Reading fetched data from %s" % key)
+            # Records are read lazily while extractor iterates over them
+            self.data = read_artifact(key)
         except Exception as ex:
             self.logger.error(
                 "Error occured during reading fetched files",
@@ -42,6 +40,7 @@ class BaseExtractor(Base):
         pass
 
     def execute(self) -> Any:
-        return self.fetch_config().read_fetched_data().multi_field_handler().write(
-            data_file_dir=self.kwargs['extractor_write_path']
-        )
+        with self.query_stats():
+            return self.fetch_config().read_fetched_data().multi_field_handler().write(
+                data_file_dir=self.kwargs['extractor_write_path']
+            )
@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List
+import contextvars
+from op_netsuite_fetcher.conf import get_logger
+
+
+logger = get_logger()
+
+
+def map_bounded(
+    func: Callable,
+    items: Iterable,
+    max_in_flight: int = 1,
+    isolate_errors: bool = True
+) -> List[Any]:
+    """
+    Calls func for every item with at most max_in_flight calls running at a time
+
+    Results are returned in the same order as the given items. A failing call is
+    logged and its result is None, so one failure doesnot abort the whole batch.
+
+    :param func: callable to run for each item
+    :type func: Callable
+
+    :param items: items passed one by one to func
+    :type items: Iterable
+
+    :param max_in_flight: maximum number of concurrent calls. 1 runs sequentially
+    :type max_in_flight: int
+
+    :param isolate_errors: if False, exception of a failing call is raised instead
+    :type isolate_errors: bool
+
+    :return: results of func in the order of items
+    :rtype: list
+    """
+
+    def isolated(item: Any) -> Any:
+        try:
+            return func(item)
+        except Exception:
+            logger.error("Error occurred while processing %s" % (item,), exc_info=True)
+            if not isolate_errors:
+                raise
+            return None
+
+    max_in_flight = max(int(max_in_flight or 1), 1)
+    if max_in_flight == 1:
+        return [isolated(item) for item in items]
+
+    # Calls run in the context of the caller, eg: counted in query statistics of its invocation
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, isolated, item) for item in items]
+        return [future.result() for future in futures]
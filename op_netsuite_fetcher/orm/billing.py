@@ -1,13 +1,15 @@
 from op_netsuite_fetcher.sql_queries import (
-    QUERY_UPSERT_INTO_ORDER_BILL,
+    QUERY_MERGE_INTO_ORDER_BILL,
     QUERY_FETCH_INVOICE_NUMBER_FOR_ORDER,
     QUERY_SELECT_ORDER_ID_FOR_GIVEN_PO_NUMBER,
     QUERY_SELECT_ORDER_ID_FOR_GIVEN_SO_NUMBER,
+    QUERY_SELECT_ORDER_IDS_FOR_GIVEN_NUMBERS,
+    QUERY_FETCH_INVOICE_NUMBERS_FOR_ORDERS,
 )
 from op_netsuite_fetcher.common.orm_handler.base_orm import VBOrmBase
 from op_netsuite_fetcher.schema import VendorInvoiceSchema
 from op_netsuite_fetcher.conf import get_logger, li_db
-from typing import List
+from typing import Dict, Iterable, List, Set
 
 
 logger = get_logger()
@@ -87,6 +89,75 @@ class VbVendorInvoice(VBOrmBase):
             logger.error("error while getting the invoice list", exc_info=True)
             raise ex
 
+    def get_order_ids_of_numbers(
+        self,
+        vendor_id: int,
+        so_numbers: Iterable[str] = (),
+        po_numbers: Iterable[str] = ()
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Get ids of purchase orders for all given so_numbers and po_numbers of a
+        vendor in one query. A number matching more than one order gets the
+        lowest id
+
+        :return: id by number, for each type of number eg:-
+            {"so_number": {"SO1": 10}, "po_number": {"PO7": 12}}
+        :rtype: dict
+        """
+        order_ids = {"so_number": {}, "po_number": {}}
+        so_numbers, po_numbers = sorted(set(so_numbers)), sorted(set(po_numbers))
+        if not so_numbers and not po_numbers:
+            return order_ids
+
+        try:
+            with li_db.transaction(auto_commit=True) as query_set:
+                result_set = query_set.execute_query(
+                    QUERY_SELECT_ORDER_IDS_FOR_GIVEN_NUMBERS,
+                    {
+                        "vendor_id": vendor_id,
+                        "so_numbers": so_numbers,
+                        "po_numbers": po_numbers
+                    }
+                )
+                logger.debug(f'Executed Query {query_set.query}')
+                for row in result_set.to_list():
+                    order_ids[row.get('number_type')][row.get('number')] = row.get('id')
+                return order_ids
+        except Exception as ex:
+            logger.error("error while fetching ids of purchase orders", exc_info=True)
+            raise ex
+
+    def get_invoice_numbers_of_purchase_orders(
+        self,
+        order_ids: Iterable[int]
+    ) -> Dict[int, Set[str]]:
+        """
+        Get invoice numbers already in vendor_invoice for all given purchase_order_ids in one query
+
+        :return: set of invoice numbers by purchase_order_id, only for orders having an invoice
+        :rtype: dict
+        """
+        invoice_numbers = {}
+        order_ids = sorted(set(order_ids))
+        if not order_ids:
+            return invoice_numbers
+
+        try:
+            with li_db.transaction(auto_commit=True) as query_set:
+                result_set = query_set.execute_query(
+                    QUERY_FETCH_INVOICE_NUMBERS_FOR_ORDERS,
+                    {
+                        "order_ids": order_ids
+                    }
+                )
+                logger.debug(f'Executed Query {query_set.query}')
+                for row in result_set.to_list():
+                    invoice_numbers.setdefault(row.get('purchase_order_id'), set()).add(row.get('invoice_number'))
+                return invoice_numbers
+        except Exception as ex:
+            logger.error("error while getting the invoice list", exc_info=True)
+            raise ex
+
     def bulk_update_or_create(
         self,
         data: List
@@ -96,24 +167,7 @@ class VbVendorInvoice(VBOrmBase):
             logger.info("Not enough bills to load")
             return
 
-        columns = ", ".join(data[0].keys())
-        placeholders = ", ".join(['%s'] * len(data))
-        sql = QUERY_UPSERT_INTO_ORDER_BILL % (
-            self.__table_name__,
-            columns,
-            placeholders,
-        )
-
-        value_list = [tuple(obj.values()) for obj in data]
-
-        logger.info("Loading purchase order details from netsuite into DB")
-        try:
-            with li_db.transaction(auto_commit=True) as query_set:
-                order_bill_ids = query_set.execute_query(sql, tuple(value_list))
-                order_bill_ids = order_bill_ids.to_list()
-                logger.debug(f'Executed Query {sql}')
-        except Exception as e:
-            logger.error(f'Error while executing {sql}', exc_info=True)
-            raise e
+        logger.info("Loading vendor invoices into DB")
+        order_bill_ids = self.bulk_merge(data, QUERY_MERGE_INTO_ORDER_BILL)
 
         return order_bill_ids
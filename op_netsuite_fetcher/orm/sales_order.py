@@ -1,7 +1,7 @@
 from op_netsuite_fetcher.common.orm_handler.base_orm import VBOrmBase
-from op_netsuite_fetcher.sql_queries import QUERY_UPSERT_SALES_ORDER
+from op_netsuite_fetcher.sql_queries import QUERY_MERGE_SALES_ORDER
 from op_netsuite_fetcher.schema import SalesOrderSchema
-from op_netsuite_fetcher.conf import get_logger, li_db
+from op_netsuite_fetcher.conf import get_logger
 
 
 logger = get_logger()
@@ -18,26 +18,12 @@ class VbSalesOrder(VBOrmBase):
         on_conflict_update_fields: str
     ):
 
-        columns = ", ".join(data[0].keys())
-        placeholders = ", ".join(['%s'] * len(data))
-        sql = QUERY_UPSERT_SALES_ORDER % (
-            self.__table_name__,
-            columns,
-            placeholders,
-            conflict_fields,
-            on_conflict_update_fields
-        )
-
-        value_list = [tuple(obj.values()) for obj in data]
-
-        logger.info("Loading purchase order details from netsuite into DB")
+        logger.info("Loading sales order details from netsuite into DB")
 
-        try:
-            with li_db.transaction(auto_commit=True) as query_set:
-                query_list = query_set.execute_query(sql, tuple(value_list))
-                logger.debug(f'Executed Query {sql}')
-        except Exception as e:
-            logger.error(f'Error while executing {sql}', exc_info=True)
-            raise e
-
-        return query_list.to_list()
+        # soint_id -> id of sales order, rows are copied into a staging table and merged at once
+        return self.bulk_merge(
+            data,
+            QUERY_MERGE_SALES_ORDER,
+            conflict_fields=conflict_fields,
+            on_conflict_update_fields=on_conflict_update_fields
+        )
@@ -1,5 +1,7 @@
 BEGIN;
 
+DROP TABLE IF EXISTS netsuite_sync_state;
+DROP TABLE IF EXISTS vendor_response_cache;
 DROP TABLE IF EXISTS ns_customer_invoice;
 DROP TABLE IF EXISTS ns_vendor_bill;
 DROP TABLE IF EXISTS ns_item_fulfillment;
@@ -42,6 +44,8 @@ CREATE TABLE IF NOT EXISTS purchase_order (
 	vendor_so_number TEXT NULL,
 	vendor_name TEXT NULL,
 	need_serial_number BOOLEAN NULL,
+	next_check_at TIMESTAMP without time zone NULL,
+	check_count INT NOT NULL DEFAULT 0,
 	created_at TIMESTAMP without time zone NOT NULL default(current_timestamp),
 	modified_at timestamp without time zone,
 	PRIMARY KEY(id),
@@ -49,6 +53,21 @@ CREATE TABLE IF NOT EXISTS purchase_order (
 	CONSTRAINT fk_sales_order_id FOREIGN KEY(sales_order_id) REFERENCES sales_order(id)
 );
 
+CREATE INDEX index_purchase_order_next_check_at ON purchase_order (
+   vendor_id,
+   next_check_at
+);
+
+CREATE INDEX index_purchase_order_vendor_so_number ON purchase_order (
+   vendor_id,
+   vendor_so_number
+);
+
+CREATE INDEX index_purchase_order_vendor_po_number ON purchase_order (
+   vendor_id,
+   vendor_po_number
+);
+
 CREATE TRIGGER sync_modified_at_of_purchase_order_table BEFORE UPDATE ON purchase_order
 FOR EACH ROW EXECUTE FUNCTION sync_modified_at();
 
@@ -139,6 +158,42 @@ CREATE TABLE IF NOT EXISTS ns_customer_invoice (
 );
 
 
+CREATE TABLE IF NOT EXISTS vendor_response_cache (
+	id SERIAL,
+	vendor_id INT NOT NULL,
+	order_number TEXT NOT NULL,
+	etag TEXT NULL,
+	last_modified TEXT NULL,
+	content_hash TEXT NULL,
+	pending_hash TEXT NULL,
+	sent_at TIMESTAMP without time zone NULL,
+	created_at TIMESTAMP without time zone NOT NULL default(current_timestamp),
+	modified_at TIMESTAMP without time zone,
+	PRIMARY KEY(id),
+	CONSTRAINT uk_vendor_response_cache UNIQUE(vendor_id, order_number)
+);
+
+CREATE TRIGGER sync_modified_at_of_vendor_response_cache_table BEFORE UPDATE ON vendor_response_cache
+FOR EACH ROW EXECUTE FUNCTION sync_modified_at();
+
+
+CREATE TABLE IF NOT EXISTS netsuite_sync_state (
+	id SERIAL,
+	environment TEXT NOT NULL,
+	last_modified_watermark TIMESTAMP without time zone NULL,
+	last_full_sync_at TIMESTAMP without time zone NULL,
+	last_synced_at TIMESTAMP without time zone NULL,
+	last_synced_rows INT NOT NULL DEFAULT 0,
+	created_at TIMESTAMP without time zone NOT NULL default(current_timestamp),
+	modified_at TIMESTAMP without time zone,
+	PRIMARY KEY(id),
+	CONSTRAINT uk_netsuite_sync_state UNIQUE(environment)
+);
+
+CREATE TRIGGER sync_modified_at_of_netsuite_sync_state_table BEFORE UPDATE ON netsuite_sync_state
+FOR EACH ROW EXECUTE FUNCTION sync_modified_at();
+
+
 COMMIT;
 
 -- ROLLBACK;
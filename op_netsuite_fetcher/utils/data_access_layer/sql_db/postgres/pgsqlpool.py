@@ -0,0 +1,192 @@
+"""Thread safe pool of `psycopg2` connections kept for the lifetime of the
+process.
+
+Connections are checked out for a transaction and returned to the pool at
+its end, so warm invocations reuse connections instead of paying for
+connection setup (TLS, auth, backend fork) on every query.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+import psycopg2
+from psycopg2 import pool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, connection as psycopg2_connection
+
+
+# Connection parameters added to `dbparams` when they are not set
+DEFAULT_CONNECTION_PARAMS = {
+    "connect_timeout": 10,
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 5,
+}
+
+
+class PgSQLConnectionPool:
+    """Pool of `psycopg2` connections on top of `ThreadedConnectionPool`.
+
+    :param dbparams: Dictionary with connection parameters required by `psycopg2.connect()`
+    :type dbparams: dict
+
+    :param pool_config: Pool settings, all optional, example
+
+    ```    {
+                "min_size": 1,
+                "max_size": 10,
+                "max_lifetime_seconds": 1800,
+                "health_check_idle_seconds": 30,
+                "checkout_timeout_seconds": 30,
+                "keepalives_idle": 30,
+                "keepalives_interval": 10,
+                "keepalives_count": 5,
+                "connect_timeout": 10
+        } ````
+    :type pool_config: dict
+
+    Checkout waits up to `checkout_timeout_seconds` when `max_size`
+    connections are in use. A connection older than `max_lifetime_seconds`
+    is closed instead of being reused, and a connection idle for more than
+    `health_check_idle_seconds` is checked with `SELECT 1` before it is
+    handed out.
+    """
+
+    def __init__(self, dbparams: Dict[str, Any], pool_config: Dict[str, Any] = None) -> None:
+        pool_config = pool_config or {}
+        self.min_size = int(pool_config.get("min_size", 1))
+        self.max_size = max(int(pool_config.get("max_size", 10)), self.min_size, 1)
+        self.max_lifetime_seconds = float(pool_config.get("max_lifetime_seconds", 1800))
+        self.health_check_idle_seconds = float(pool_config.get("health_check_idle_seconds", 30))
+        self.checkout_timeout_seconds = float(pool_config.get("checkout_timeout_seconds", 30))
+
+        self.connection_params = dict(dbparams or {})
+        for key, value in DEFAULT_CONNECTION_PARAMS.items():
+            self.connection_params.setdefault(key, pool_config.get(key, value))
+
+        self._pool = pool.ThreadedConnectionPool(self.min_size, self.max_size, **self.connection_params)
+        # minconn of psycopg2 pool is also the number of idle connections it keeps, a connection
+        # returned above it is closed. Only min_size are opened upfront, up to max_size are kept
+        self._pool.minconn = self.max_size
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        # id of connection -> [created at, returned at]
+        self._times = {}
+        self.counters = {
+            "checkouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "health_check_failures": 0,
+        }
+
+    def _discard(self, connection: psycopg2_connection) -> None:
+        with self._lock:
+            self._times.pop(id(connection), None)
+            self.counters["discarded"] += 1
+        try:
+            self._pool.putconn(connection, close=True)
+        except Exception:
+            logging.debug("Error while closing pooled connection", exc_info=True)
+
+    def _is_healthy(self, connection: psycopg2_connection, now: float) -> bool:
+        if connection.closed:
+            return False
+
+        created_at, returned_at = self._times.get(id(connection)) or (now, now)
+        if now - created_at >= self.max_lifetime_seconds:
+            return False
+
+        if now - returned_at >= self.health_check_idle_seconds:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                connection.rollback()
+            except Exception:
+                logging.warning("Pooled connection failed health check, discarding it", exc_info=True)
+                with self._lock:
+                    self.counters["health_check_failures"] += 1
+                return False
+        return True
+
+    def getconn(self) -> psycopg2_connection:
+        """Checks out a healthy connection from the pool, waiting for one when
+        all connections are in use.
+
+        :raises Exception: Raised when no connection is free within `checkout_timeout_seconds`
+
+        :return: `psycopg2` connection which must be returned with `putconn`
+        :rtype: psycopg2.extensions.connection
+        """
+        if not self._slots.acquire(timeout=self.checkout_timeout_seconds):
+            raise Exception(
+                "No database connection free in pool of %s after %s seconds"
+                % (self.max_size, self.checkout_timeout_seconds)
+            )
+
+        try:
+            while True:
+                connection = self._pool.getconn()
+                now = time.monotonic()
+                with self._lock:
+                    if id(connection) not in self._times:
+                        self._times[id(connection)] = [now, now]
+                        self.counters["created"] += 1
+                if self._is_healthy(connection, now):
+                    break
+                self._discard(connection)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.counters["checkouts"] += 1
+        return connection
+
+    def putconn(self, connection: psycopg2_connection, close: bool = False) -> None:
+        """Returns connection to the pool. Transaction left open on it is
+        rolled back, and a closed or broken connection is discarded.
+
+        :param connection: Connection checked out with `getconn`
+        :type connection: psycopg2.extensions.connection
+
+        :param close: Close connection instead of keeping it in the pool, defaults to False
+        :type close: bool
+        """
+        try:
+            if not close and not connection.closed and connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    close = True
+
+            if close or connection.closed:
+                self._discard(connection)
+            else:
+                with self._lock:
+                    if id(connection) in self._times:
+                        self._times[id(connection)][1] = time.monotonic()
+                self._pool.putconn(connection)
+                if connection.closed:
+                    # Closed by psycopg2 pool as its server connection was lost
+                    with self._lock:
+                        self._times.pop(id(connection), None)
+        finally:
+            self._slots.release()
+
+    def closeall(self) -> None:
+        """Closes all connections of the pool."""
+        with self._lock:
+            self._times.clear()
+        self._pool.closeall()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(
+                self.counters,
+                open=len(self._times),
+                in_use=len(self._pool._used),
+                idle=len(self._pool._pool),
+            )
@@ -1,20 +1,33 @@
 import logging
 import json
-from op_schedular.common.orm_handler.common_orm import execute_sql_query
+from op_schedular.common.orm_handler.common_orm import stream_sql_query
+from op_schedular.conf import li_db
 import azure.functions as func
 from op_schedular.sql_queries import QUERY_FETCH_VENDORS_INFORMATION
-from op_schedular.constants import VENDOR_CONFIG_PATH, FETCHER_WRITE_PATH, EXTRACTOR_WRITE_PATH
+from op_schedular.constants import (
+    VENDOR_CONFIG_PATH,
+    FETCHER_WRITE_PATH,
+    EXTRACTOR_WRITE_PATH,
+    PURCHASE_ORDER_STATUS_FOR_VENDOR_BILLING
+)
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
     try:
         logging.info("----- Running Scheduler ------")
 
-        vendor_list = execute_sql_query(
+        # Only the vendor objects are kept, rows are read from server side cursor in batches
+        with li_db.instrumentation.invocation("SCHEDULER"), stream_sql_query(
             QUERY_FETCH_VENDORS_INFORMATION,
-            {'config_file_path': VENDOR_CONFIG_PATH}
-        )
-        vendor_list = [obj.get('jsonb_build_object') for obj in vendor_list.to_list()]
+            {
+                'config_file_path': VENDOR_CONFIG_PATH,
+                'purchase_order_status': PURCHASE_ORDER_STATUS_FOR_VENDOR_BILLING
+            }
+        ) as vendors:
+            vendor_list = [obj.get('jsonb_build_object') for obj in vendors]
+
+        for vendor in vendor_list:
+            logging.info("Vendor %s has %s order(s) due for polling" % (vendor.get('vendor_id'), vendor.get('due_orders')))
 
     except Exception as exe:
         logging.error(exe, exc_info=True)
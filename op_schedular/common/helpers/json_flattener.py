@@ -1,39 +1,70 @@
-from itertools import chain, starmap
+from typing import Any, Dict
 
 
-def json_flattener(dictionary):
-    """Flatten a nested json file"""
+def json_flattener(dictionary: Dict) -> Dict:
+    """
+    Flatten a nested json file into dot separated keys, list items are keyed
+    by their index eg:- {'a': [{'b': 1}]} -> {'a.0.b': 1}
 
-    def unpack(parent_key, parent_value):
-        """Unpack one level of nesting in json file"""
-        # Unpack one level only!!!
+    Walks the json once depth first with a stack of iterators, so keys come
+    out in the same order as the json. Empty dicts and lists have no key.
+    """
 
-        if isinstance(parent_value, dict):
-            for key, value in parent_value.items():
-                temp1 = parent_key + '.' + key
-                yield temp1, value
-        elif isinstance(parent_value, list):
-            for idx, value in enumerate(parent_value):
-                temp2 = parent_key + '.' + str(idx)
-                yield temp2, value
+    flat_dictionary = {}
+    stack = [(None, iter(dictionary.items()))]
+    while stack:
+        parent_key, items = stack[-1]
+        for key, value in items:
+            if parent_key is not None:
+                key = parent_key + '.' + key
+
+            # Descend into nested value, rest of this level continues after it
+            if isinstance(value, dict):
+                stack.append((key, iter(value.items())))
+                break
+            if isinstance(value, list):
+                stack.append((key, zip(map(str, range(len(value))), value)))
+                break
+            flat_dictionary[key] = value
         else:
-            yield parent_key, parent_value
-
-    # Keep iterating until the termination condition is satisfied
-    while True:
-        # Keep unpacking the json file until all values are atomic elements
-        # (not dictionary or list)
-        dictionary = dict(
-            chain.from_iterable(starmap(unpack, dictionary.items()))
-        )
-
-        # Terminate condition: not any value in json file dictionary or list
-        if not any(
-                isinstance(value, dict) for value in dictionary.values()
-            ) \
-                and not any(
-                    isinstance(value, list) for value in dictionary.values()
-                ):
-            break
+            stack.pop()
+
+    return flat_dictionary
+
+
+def _get_child(node: Any, key: str) -> Any:
+    if isinstance(node, list):
+        idx = int(key)
+        return node[idx] if idx < len(node) else None
+    return node.get(key)
+
+
+def _set_child(node: Any, key: str, value: Any) -> None:
+    if isinstance(node, list):
+        idx = int(key)
+        if idx >= len(node):
+            node.extend([None] * (idx + 1 - len(node)))
+        node[idx] = value
+    else:
+        node[key] = value
+
+
+def unflatten(flat_dictionary: Dict) -> Dict:
+    """
+    Builds nested json back from keys made by json_flattener. A key part made
+    of digits is taken as index of a list eg:- {'a.0.b': 1} -> {'a': [{'b': 1}]}
+    """
+
+    dictionary = {}
+    for key, value in flat_dictionary.items():
+        parts = key.split('.')
+        node = dictionary
+        for part, next_part in zip(parts, parts[1:]):
+            child = _get_child(node, part)
+            if not isinstance(child, (dict, list)):
+                child = [] if next_part.isdigit() else {}
+                _set_child(node, part, child)
+            node = child
+        _set_child(node, parts[-1], value)
 
     return dictionary
@@ -0,0 +1,94 @@
+from op_schedular.constants import (
+    CONFIG,
+    POLLING_SCHEDULE,
+    COMPLETED,
+    CANCELLED
+)
+from datetime import date, datetime, timedelta
+from typing import Any, Dict
+
+
+class PollingSchedule:
+    """
+    Decides when a purchase order is due to be polled from vendor again.
+
+    Defaults come from `[POLLING_SCHEDULE]` of config.toml and can be overridden
+    by `polling_schedule` of vendor config eg:-
+        {
+            "max_orders_per_run": 500,
+            "default_interval_minutes": 60,
+            "status_interval_minutes": {"BACKORDERED": 360},
+            "fresh_ship_date_days": 2,
+            "fresh_ship_date_interval_minutes": 15,
+            "stale_after_days": 14,
+            "stale_interval_minutes": 1440,
+            "backoff_factor": 1.5,
+            "backoff_every_checks": 24,
+            "max_interval_minutes": 1440
+        }
+
+    Interval is picked from the last known invoice status of the order. An order
+    older than stale_after_days is polled at most every stale_interval_minutes and
+    the interval grows by backoff_factor for every backoff_every_checks polls,
+    upto max_interval_minutes. An order with a recent ship date is polled soon.
+    """
+
+    def __init__(self, config: Dict = None) -> None:
+        defaults = CONFIG.get(POLLING_SCHEDULE, {})
+        config = config or {}
+
+        def option(key: str, default: Any) -> Any:
+            return config.get(key, defaults.get(key, default))
+
+        self.max_orders_per_run = int(option('max_orders_per_run', 500))
+        self.default_interval = float(option('default_interval_minutes', 60))
+        self.fresh_ship_date_days = int(option('fresh_ship_date_days', 2))
+        self.fresh_ship_date_interval = float(option('fresh_ship_date_interval_minutes', 15))
+        self.stale_after_days = int(option('stale_after_days', 14))
+        self.stale_interval = float(option('stale_interval_minutes', 1440))
+        self.backoff_factor = float(option('backoff_factor', 1.5))
+        self.backoff_every_checks = max(int(option('backoff_every_checks', 24)), 1)
+        self.max_interval = float(option('max_interval_minutes', 1440))
+
+        self.status_interval = {
+            str(status).upper(): float(minutes)
+            for status, minutes in {
+                **dict(defaults.get('status_interval_minutes', {})),
+                **config.get('status_interval_minutes', {})
+            }.items()
+        }
+
+    def interval(self, order: Dict, today: date = None) -> timedelta:
+        """
+        Returns time to wait before polling the order again
+
+        :param order: row of due orders query with invoice_status, ship_date,
+            order_date and check_count of the purchase order
+        :type order: dict
+        """
+        today = today or date.today()
+        status = (order.get('invoice_status') or '').upper()
+        minutes = self.status_interval.get(status, self.default_interval)
+
+        order_date = order.get('order_date')
+        if order_date and (today - order_date).days >= self.stale_after_days:
+            minutes = max(minutes, self.stale_interval)
+
+        check_count = order.get('check_count') or 0
+        minutes *= self.backoff_factor ** (check_count // self.backoff_every_checks)
+        minutes = min(minutes, max(self.max_interval, self.stale_interval))
+
+        # Shipment is about to be invoiced, so it is polled soon regardless of age
+        ship_date = order.get('ship_date')
+        if (
+            ship_date
+            and status not in (COMPLETED, CANCELLED)
+            and abs((today - ship_date).days) <= self.fresh_ship_date_days
+        ):
+            minutes = min(minutes, self.fresh_ship_date_interval)
+
+        return timedelta(minutes=minutes)
+
+    def next_check_at(self, order: Dict, now: datetime = None) -> datetime:
+        now = now or datetime.utcnow()
+        return now + self.interval(order, now.date())
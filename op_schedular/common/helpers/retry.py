@@ -0,0 +1,158 @@
+from op_schedular.common.helpers.rate_limiter import parse_retry_after
+from op_schedular.constants import CONFIG, RETRY
+from op_schedular.conf import get_logger
+from requests import exceptions as request_exceptions
+from typing import Any, Callable, Dict, Union
+import requests
+import random
+import json
+import time
+import os
+
+
+logger = get_logger()
+
+RETRY_CONFIG = CONFIG.get(RETRY, {})
+
+# Exceptions which can be retried, by the name used in config
+RETRYABLE_EXCEPTIONS = {
+    "connection_error": request_exceptions.ConnectionError,
+    "timeout": request_exceptions.Timeout,
+    "chunked_encoding_error": request_exceptions.ChunkedEncodingError
+}
+
+
+def function_timeout_seconds(host_file_path: str = "host.json") -> float:
+    """
+    Returns time budget of an invocation. HTTP triggered functions are cut off
+    by the load balancer after `function_timeout_seconds` of `[RETRY]` (230 by
+    default) even when `functionTimeout` of host.json is longer
+    """
+    timeout = float(RETRY_CONFIG.get('function_timeout_seconds', 230))
+    try:
+        if os.path.exists(host_file_path):
+            with open(host_file_path, 'r') as host_file:
+                function_timeout = json.load(host_file).get('functionTimeout')
+            if function_timeout and function_timeout != "-1":
+                hours, minutes, seconds = function_timeout.split(":")
+                timeout = min(timeout, int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+    except Exception:
+        logger.warning("Couldnot read functionTimeout from %s" % host_file_path, exc_info=True)
+    return timeout
+
+
+class Deadline:
+    """
+    Point in time by which the invocation has to finish its requests. Created
+    when the invocation starts, `deadline_margin_seconds` of `[RETRY]` is kept
+    aside for writing the output after the last request
+    """
+
+    def __init__(self, seconds: float = None) -> None:
+        if seconds is None:
+            seconds = function_timeout_seconds() - float(RETRY_CONFIG.get('deadline_margin_seconds', 20))
+        self.expires_at = time.monotonic() + max(seconds, 0)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def clamp(self, timeout: Union[float, None]) -> float:
+        """
+        Returns request timeout shortened to the time left before deadline
+        """
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+class RetryPolicy:
+    """
+    Retries failed vendor requests with exponential backoff and full jitter.
+
+    Defaults come from `[RETRY]` of config.toml and can be overridden by
+    `api_request_template.retry` of vendor config eg:-
+        {
+            "max_attempts": 3,
+            "backoff_base_seconds": 0.5,
+            "backoff_max_seconds": 10,
+            "retry_status_codes": [429, 502, 503, 504],
+            "retry_exceptions": ["connection_error", "timeout"],
+            "idempotent_methods": ["GET", "POST"]
+        }
+
+    Only requests with a method in idempotent_methods are retried. POST is
+    not in it by default, as a POST which timed out may have reached the
+    vendor. A vendor whose POST is a read only order status lookup (eg:
+    XML/SOAP) opts in by listing it. A retry is not started if the backoff
+    and a minimal request would not fit in the time left before the deadline
+    of the invocation.
+    """
+
+    def __init__(self, config: Dict = None) -> None:
+        config = config or {}
+
+        def option(key: str, default: Any) -> Any:
+            return config.get(key, RETRY_CONFIG.get(key, default))
+
+        self.max_attempts = max(int(option('max_attempts', 3)), 1)
+        self.backoff_base = float(option('backoff_base_seconds', 0.5))
+        self.backoff_max = float(option('backoff_max_seconds', 10))
+        self.min_request_seconds = float(option('min_request_seconds', 2))
+        self.retry_status_codes = {int(code) for code in option('retry_status_codes', [408, 429, 500, 502, 503, 504])}
+        self.idempotent_methods = {
+            method.upper() for method in option('idempotent_methods', ["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+        }
+        self.retry_exceptions = tuple(
+            RETRYABLE_EXCEPTIONS[name]
+            for name in option('retry_exceptions', list(RETRYABLE_EXCEPTIONS.keys()))
+            if name in RETRYABLE_EXCEPTIONS
+        )
+
+    def backoff(self, attempt: int, response: requests.Response = None) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+        return delay
+
+    def call(self, send: Callable, method: str, deadline: Deadline = None) -> requests.Response:
+        """
+        Calls send until it returns a response which is not retryable, attempts
+        are exhausted or deadline is near. Exception of the last attempt is raised
+
+        :param send: sends one request, called with the attempt number
+        :type send: callable
+        """
+        retryable_method = (method or "").upper() in self.idempotent_methods
+        attempt = 1
+        while True:
+            try:
+                response = send(attempt)
+            except self.retry_exceptions as e:
+                if not retryable_method or attempt >= self.max_attempts:
+                    raise
+                response, error = None, e
+            else:
+                if (
+                    not retryable_method
+                    or attempt >= self.max_attempts
+                    or response.status_code not in self.retry_status_codes
+                ):
+                    return response
+                error = "HTTP Status code: {}".format(response.status_code)
+
+            delay = self.backoff(attempt, response)
+            if deadline is not None and deadline.remaining() < delay + self.min_request_seconds:
+                logger.warning("Not retrying request after %s, invocation deadline is near" % error)
+                if response is None:
+                    raise error
+                return response
+
+            logger.info("Retrying request in %.2f seconds after attempt %s failed with %s" % (delay, attempt, error))
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+            attempt += 1
@@ -1,10 +1,17 @@
 from op_schedular.utils.data_access_layer.sql_db import DBEngineFactory
-from op_schedular.constants import DB_CONFIG
+from op_schedular.constants import DB_CONFIG, DB_POOL, DB_INSTRUMENTATION, CONFIG
 import logging
 
 
 # TODO for ops monitoring pg_stat statement
-li_db = DBEngineFactory.get_db_engine(DB_CONFIG, DBEngineFactory.POSTGRES)
+# Connections are pooled for the lifetime of the worker, see [DB_POOL] of config.toml
+# Queries are timed and slow ones logged, see [DB_INSTRUMENTATION] of config.toml
+li_db = DBEngineFactory.get_db_engine(
+    DB_CONFIG,
+    DBEngineFactory.POSTGRES,
+    CONFIG.get(DB_POOL, {}),
+    CONFIG.get(DB_INSTRUMENTATION, {})
+)
 
 
 def get_logger():
@@ -1,16 +1,27 @@
-from op_schedular.common.helpers import make_api_call, create_oauth_authorization
-from op_schedular.orm import VbSalesOrder, VbPurchaseOrder
+from op_schedular.common.helpers import (
+    chunk_list,
+    get_by_path,
+    map_bounded,
+    make_api_call,
+    compile_config_template,
+    create_oauth_authorization
+)
+from op_schedular.orm import VbSalesOrder, VbPurchaseOrder, VbNetsuiteSyncState
 from op_schedular.base_class import BaseNetsuiteFetcher
-from collections import ChainMap
 from op_schedular.sql_queries.queries import (
     QUERY_UPDATE_SALESORDER_NUMBER_BY_CHECKING_SUBSTR
 )
 from op_schedular.conf import get_logger
 from op_schedular.constants import (
+    CONFIG,
+    ConfigFields,
+    DEFAULT_MAX_IN_FLIGHT,
     SALES_ORDER_TABLE_CONFLICT_FIELDS,
     PURCHASE_ORDER_TABLE_CONFLICT_FIELDS
 )
-from typing import Any
+from typing import Any, Dict, Iterable, Iterator, List
+from datetime import datetime, timedelta
+from operator import itemgetter
 import json
 
 
@@ -21,32 +32,113 @@ class NetsuiteFetcher(BaseNetsuiteFetcher):
     def __init__(self, **kwargs) -> None:
         super().__init__(**kwargs)
         self.order_mapper = None
+        self.pagination = None
+        self.max_in_flight = DEFAULT_MAX_IN_FLIGHT
+        self.delta_sync = None
+        self.sync_state = None
+        self.full_sync = True
+        self.sync_started_at = None
+        self.request_params = {}
 
     def fetch_config(self) -> Any:
         # Read the config template
         self.read_config()
 
         self.order_mapper = self.config_template.get('order_info_mapping')
+        self.pagination = self.config_template.get('pagination')
+        if self.pagination:
+            self.max_in_flight = self.pagination.get('max_in_flight', DEFAULT_MAX_IN_FLIGHT)
+        self.delta_sync = self.config_template.get('delta_sync')
         vendor = self.kwargs.get('vendor_name')
-        template_str = json.dumps(self.config_template)
 
         # Load vendor name in endpoint
         logger.info("Replacing template values")
-        template_str = template_str.replace(
-            f"{'<<vendor>>'}", vendor if vendor else 'all'
+        self.request_config = compile_config_template(self.config_template).render(
+            {'vendor': vendor if vendor else 'all'}
         )
-        self.request_config = json.loads(template_str)
+
+        if self.delta_sync and not vendor:
+            self.prepare_sync()
 
         return self
 
-    def extractor(self) -> Any:
+    def prepare_sync(self) -> None:
+        """
+        Decides between a delta and a full sync from the sync state of the environment.
+
+        Configured from `delta_sync` of netsuite.json eg:-
+            {
+                "modified_since_param": "lastModifiedSince",
+                "watermark_format": "%Y-%m-%dT%H:%M:%SZ",
+                "overlap_minutes": 10,
+                "full_sync_every_hours": 24
+            }
+
+        A delta sync requests only purchase orders modified since the watermark
+        of the last successful sync. Watermark is the time that sync started,
+        moved back by overlap_minutes so that orders modified while it was
+        running are requested again. A full sync is run when there is no
+        watermark yet or the last one is older than full_sync_every_hours.
+        """
+        environment = CONFIG.get(ConfigFields.ENVIRONMENT.value)
+        self.sync_started_at = datetime.utcnow()
+        self.sync_state = VbNetsuiteSyncState().get_state(environment) or {'environment': environment}
+
+        watermark = self.sync_state.get('last_modified_watermark')
+        last_full_sync_at = self.sync_state.get('last_full_sync_at')
+        full_sync_every = timedelta(hours=float(self.delta_sync.get('full_sync_every_hours', 24)))
+
+        self.full_sync = (
+            watermark is None
+            or last_full_sync_at is None
+            or self.sync_started_at - last_full_sync_at >= full_sync_every
+        )
+        if self.full_sync:
+            logger.info("Running full sync of purchase orders from netsuite for %s" % environment)
+            return
+
+        logger.info("Running delta sync of purchase orders modified since %s" % watermark)
+        self.request_params = {
+            self.delta_sync.get('modified_since_param', 'lastModifiedSince'): watermark.strftime(
+                self.delta_sync.get('watermark_format', '%Y-%m-%dT%H:%M:%SZ')
+            )
+        }
+
+    def save_sync_state(self, loaded: int) -> None:
+        if not self.sync_started_at:
+            return
+
+        overlap = timedelta(minutes=float(self.delta_sync.get('overlap_minutes', 10)))
+        VbNetsuiteSyncState().save_state({
+            'environment': self.sync_state.get('environment'),
+            'last_modified_watermark': self.sync_started_at - overlap,
+            'last_full_sync_at': self.sync_started_at if self.full_sync else None,
+            'last_synced_at': self.sync_started_at,
+            'last_synced_rows': loaded
+        })
+
+    def fetch_page(self, page: int = None) -> Dict:
+        """
+        Requests a page of purchase orders from netsuite and returns the parsed page.
+        Without pagination in netsuite.json whole response is a single page
+        """
+        params = dict(self.request_params)
+        if self.pagination and page is not None:
+            params.update({
+                self.pagination.get('page_param', 'page'): page,
+                self.pagination.get('page_size_param', 'pageSize'): self.pagination.get('page_size', 1000)
+            })
+
         url, headers, req_method = create_oauth_authorization(
-            self=self
+            self=self,
+            params=params
         )
         response = make_api_call(
             url=url,
             header=headers,
-            method=req_method
+            method=req_method,
+            client_key='netsuite',
+            pool_maxsize=self.max_in_flight
         )
 
         if (response.status_code not in range(200, 210)):
@@ -62,84 +154,150 @@ class NetsuiteFetcher(BaseNetsuiteFetcher):
                 ), exc_info=True
             )
             raise Exception('Data not found. API returned error status code')
-        else:
-            logger.info("Data loaded for transformation")
-            self.data = response.text
-
-        return self
 
-
-    def transformer(self) -> Any:
         logger.info("Checking if the response is valid JSON")
-
         try:
-            tmp = json.loads(self.data)
-            tmp_flat_data = tmp['data']
-        except ValueError as ex:
+            page_data = json.loads(response.content)
+            page_data['data']
+        except (ValueError, KeyError, TypeError) as ex:
             logger.error(
                 "The response is not a valid JSON",
                 exc_info=True
             )
             raise Exception("The received response is not a valid JSON ", ex)
 
+        logger.info("Fetched page %s with %s rows" % (page, len(page_data['data'])))
+        return page_data
+
+    def iter_pages(self) -> Iterator[List[Dict]]:
+        """
+        Yields rows of netsuite response page by page. When netsuite returns the
+        number of pages, pages after the first one are fetched max_in_flight at a
+        time, otherwise pages are fetched one by one until a page is not full.
+        """
+        if not self.pagination:
+            yield self.fetch_page()['data']
+            return
+
+        start_page = self.pagination.get('start_page', 0)
+        page_size = self.pagination.get('page_size', 1000)
+
+        first_page = self.fetch_page(start_page)
+        yield first_page['data']
+
+        total_pages_path = self.pagination.get('total_pages_path')
+        total_pages = get_by_path(first_page, total_pages_path) if total_pages_path else None
+        if total_pages is not None:
+            pages = list(range(start_page + 1, start_page + int(total_pages)))
+            for pages_in_flight in chunk_list(pages, self.max_in_flight):
+                for page_data in map_bounded(self.fetch_page, pages_in_flight, self.max_in_flight, isolate_errors=False):
+                    yield page_data['data']
+            return
+
+        page, rows = start_page, first_page['data']
+        while len(rows) >= page_size:
+            page += 1
+            rows = self.fetch_page(page)['data']
+            yield rows
+
+    def extractor(self) -> Any:
+        # Rows are fetched lazily while they are transformed and loaded
+        logger.info("Data loaded for transformation")
+        self.data = (row for rows in self.iter_pages() for row in rows)
+        return self
+
+    def transform_rows(self, rows: Iterable[Dict]) -> Iterator[Dict]:
+        # Mapping is resolved once instead of for every row
+        order_keys = list(self.order_mapper.keys())
+        response_keys = list(self.order_mapper.values())
+        get_values = itemgetter(*response_keys) if len(response_keys) > 1 else (lambda obj: (obj[response_keys[0]],))
+        allowed_status = set(self.config_template.get("purchase_order_status"))
+
+        seen = set()
+        for obj in rows:
+            key = f"{obj.get('internalid')}, {obj.get('createdfrom')}"
+            if key in seen:
+                continue
+            seen.add(key)
+
+            final_order = dict(zip(order_keys, get_values(obj)))
+
+            if final_order['purchase_order_status'] not in allowed_status:
+                logger.error("Unknown Purchase Order Status. Status of purchase order doesnot match with pre-defined status")
+                logger.debug("The purchase order whose status doesnot match is %s" % final_order)
+                continue
+            yield final_order
+
+    def transformer(self) -> Any:
         if self.order_mapper is None:
             raise Exception(
                 "Mapper for netsuite response is missing. \
                 Check config file for missing mappings"
             )
-        
-        tmp_data = []
-        _ = [tmp_data.append(x) for x in tmp_flat_data if f"{x.get('internalid')}, {x.get('createdfrom')}" not in [f"{y.get('internalid')}, {y.get('createdfrom')}" for y in tmp_data]]
-
-        order_object_list = []
-        for obj in tmp_data:
-            final_order = dict()
-            for k, v in self.order_mapper.items():
-                final_order.update({k: obj[v]})
-            
-            if final_order['purchase_order_status'] not in self.config_template.get("purchase_order_status"):
-                logger.error("Unknown Purchase Order Status. Status of purchase order doesnot match with pre-defined status")
-                logger.debug("The purchase order whose status doesnot match is %s" % final_order)
-                continue
-            order_object_list.append(final_order)
-        self.data = order_object_list
 
+        self.data = self.transform_rows(self.data)
         return self
 
+    def load_batch(self, orders: List[Dict]) -> None:
+        # First order of every sales order is kept
+        sales_orders = {}
+        for x in orders:
+            sales_orders.setdefault(f"{x.get('soint_id')}", x)
 
-    def loader(self) -> Any:
-        logger.info("Dispatching data from request to Sales Order Table")
-
-        sales_order_list = []
-        _ = [sales_order_list.append(x) for x in self.data if f"{x.get('soint_id')}" not in [f"{y.get('soint_id')}" for y in sales_order_list]]
-
-        sales_order = VbSalesOrder(sales_order_list)
+        sales_order = VbSalesOrder(list(sales_orders.values()))
         sales_order.load()
 
-        on_conflict_update_fields = 'sales_order_status=EXCLUDED.sales_order_status'
+        # Unchanged sales orders are not rewritten, their ids are still read back by the merge query
+        on_conflict_update_fields = (
+            'sales_order_status=EXCLUDED.sales_order_status '
+            'WHERE sales_order.sales_order_status IS DISTINCT FROM EXCLUDED.sales_order_status'
+        )
         sales_order_ids = sales_order.bulk_update_or_create(
             data=sales_order.loaded_data,
             conflict_fields=SALES_ORDER_TABLE_CONFLICT_FIELDS,
             on_conflict_update_fields=on_conflict_update_fields
         )
 
-        sales_order_ids = dict(ChainMap(*sales_order_ids[0]['jsonb_agg']))
+        # soint_id -> id of sales order, keys are text as in any json object
+        sales_order_ids = sales_order_ids[0]['jsonb_object_agg'] or {}
 
-        for obj in self.data:
-            obj["sales_order_id"] = sales_order_ids.get(obj["soint_id"])
-            del obj["soint_id"]
+        for obj in orders:
+            obj["sales_order_id"] = sales_order_ids.get(f"{obj.pop('soint_id')}")
 
-        purchase_order = VbPurchaseOrder(self.data)
+        purchase_order = VbPurchaseOrder(orders)
         purchase_order.load()
 
-        on_conflict_update_fields = 'purchase_order_status=EXCLUDED.purchase_order_status'
+        # Unchanged purchase orders are not rewritten, so neither trigger nor WAL is hit for them
+        on_conflict_update_fields = (
+            'purchase_order_status=EXCLUDED.purchase_order_status '
+            'WHERE purchase_order.purchase_order_status IS DISTINCT FROM EXCLUDED.purchase_order_status'
+        )
         purchase_order_ids = purchase_order.bulk_update_or_create(
             data=purchase_order.loaded_data,
             conflict_fields=PURCHASE_ORDER_TABLE_CONFLICT_FIELDS,
             on_conflict_update_fields=on_conflict_update_fields
         )
 
-        logger.info("Successfully dispatched data to Order table")
+    def loader(self) -> Any:
+        logger.info("Dispatching data from request to Sales Order Table")
+
+        # Orders are committed batch by batch so memory depends on batch size, not on total orders
+        batch_size = self.pagination.get('batch_size', 1000) if self.pagination else None
+        loaded, batch = 0, []
+        for order in self.data:
+            batch.append(order)
+            if batch_size and len(batch) >= batch_size:
+                self.load_batch(batch)
+                loaded, batch = loaded + len(batch), []
+
+        if batch:
+            self.load_batch(batch)
+            loaded += len(batch)
+
+        logger.info("Successfully dispatched %s orders to Order table" % loaded)
+
+        # Watermark moves only after every order of the sync is loaded
+        self.save_sync_state(loaded)
         return self
 
 
@@ -0,0 +1,157 @@
+from op_schedular.orm import VbVendorResponseCache
+from op_schedular.conf import get_logger
+from datetime import datetime, timedelta
+from typing import Any, Dict
+import threading
+import hashlib
+import json
+
+
+logger = get_logger()
+
+
+class ResponseCache:
+    """
+    Remembers etag, last_modified and content hash of the last response of each
+    order of a vendor, so that responses which did not change since the last
+    run are not sent to extractor and dispatcher again.
+
+    Configured from `api_request_template.response_cache` of vendor config eg:-
+        {
+            "enabled": true,
+            "conditional_request": true,
+            "resend_after_hours": 24
+        }
+
+    `conditional_request` sends If-None-Match/If-Modified-Since headers and
+    should only be set for vendors that support them.
+
+    A response passed downstream is kept as pending, it becomes the sent one
+    (content_hash, sent_at) only when the dispatcher confirms it after its
+    bills are committed. Until then the order is sent again by every run, so a
+    failed extraction or dispatch does not lose a status change. A confirmed
+    response is still sent again once `resend_after_hours` passed.
+    """
+
+    def __init__(self, vendor_id: int, config: Dict = None) -> None:
+        config = config or {}
+        self.vendor_id = vendor_id
+        self.enabled = config.get('enabled', True)
+        self.conditional_request = config.get('conditional_request', False)
+        self.resend_after = timedelta(hours=config.get('resend_after_hours', 24))
+
+        self.entries = {}
+        self.updates = []
+        self.unchanged = 0
+        self._lock = threading.Lock()
+
+    def load(self) -> Any:
+        if not self.enabled:
+            return self
+
+        try:
+            entries = VbVendorResponseCache().get_entries_of_vendor(self.vendor_id)
+        except Exception:
+            logger.error("Couldnot load response cache. Fetching without it", exc_info=True)
+            self.enabled = False
+            return self
+
+        self.entries = {entry.get('order_number'): entry for entry in entries}
+        logger.info("Loaded %s response cache entries for vendor %s" % (len(self.entries), self.vendor_id))
+        return self
+
+    def conditional_headers(self, order_number: str) -> Dict:
+        entry = self.entries.get(str(order_number))
+        if not (self.enabled and self.conditional_request and entry):
+            return {}
+
+        # Vendor answers 304 without body, so a response which is due to be
+        # sent again, or is not confirmed yet, must be requested unconditionally
+        if not (
+            not entry.get('pending_hash')
+            and entry.get('content_hash')
+            and entry.get('sent_at')
+            and datetime.utcnow() - entry.get('sent_at') < self.resend_after
+        ):
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry.get('etag')
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry.get('last_modified')
+        return headers
+
+    def is_unchanged(self, order_number: str, response: Any) -> bool:
+        """
+        Records response of an order and returns True if it is same as the one
+        confirmed as sent downstream within resend_after_hours
+        """
+        if not self.enabled or order_number is None:
+            return False
+
+        if response.status_code != 304 and response.status_code not in range(200, 210):
+            return False
+
+        entry = self.entries.get(str(order_number)) or {}
+        if response.status_code == 304:
+            # Not modified since the last response, which may not be confirmed yet
+            content_hash = entry.get('pending_hash') or entry.get('content_hash')
+        else:
+            content_hash = hashlib.sha256(response.content).hexdigest()
+
+        return self._record(
+            order_number,
+            content_hash,
+            response.headers.get('ETag') or entry.get('etag'),
+            response.headers.get('Last-Modified') or entry.get('last_modified')
+        )
+
+    def is_record_unchanged(self, order_number: str, record: Any) -> bool:
+        """
+        Same as is_unchanged for the part of a batch response belonging to an order
+        """
+        if not self.enabled or order_number is None:
+            return False
+
+        content = json.dumps(record, sort_keys=True, default=str).encode()
+        return self._record(order_number, hashlib.sha256(content).hexdigest())
+
+    def _record(self, order_number: str, content_hash: str, etag: str = None, last_modified: str = None) -> bool:
+        entry = self.entries.get(str(order_number)) or {}
+        now = datetime.utcnow()
+        sent_at = entry.get('sent_at')
+        unchanged = (
+            content_hash is not None
+            and content_hash == entry.get('content_hash')
+            and sent_at is not None
+            and now - sent_at < self.resend_after
+        )
+
+        with self._lock:
+            self.updates.append({
+                'vendor_id': self.vendor_id,
+                'order_number': str(order_number),
+                'etag': etag,
+                'last_modified': last_modified,
+                # Unchanged response leaves nothing to confirm
+                'pending_hash': None if unchanged else content_hash
+            })
+            if unchanged:
+                self.unchanged += 1
+        return unchanged
+
+    def save(self) -> None:
+        if not self.enabled or not self.updates:
+            return
+
+        # Same order can be fetched more than once in a run, last response wins
+        updates = list({obj['order_number']: obj for obj in self.updates}.values())
+
+        try:
+            response_cache = VbVendorResponseCache(updates)
+            response_cache.load()
+            response_cache.bulk_update_or_create(response_cache.loaded_data)
+        except Exception:
+            logger.error("Couldnot save response cache of vendor %s" % self.vendor_id, exc_info=True)
+        return
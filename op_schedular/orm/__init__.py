@@ -2,3 +2,5 @@ from op_schedular.orm.billing import *
 from op_schedular.orm.sales_order import *
 from op_schedular.orm.billing_items import *
 from op_schedular.orm.purchase_order import *
+from op_schedular.orm.response_cache import *
+from op_schedular.orm.netsuite_sync_state import *
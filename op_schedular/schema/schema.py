@@ -182,3 +182,27 @@ class NsCustomerInvoiceSchema(Schema):
     success = fields.Bool(allow_none=True) 
     message = fields.Str(allow_none=True) 
     created_at = fields.AwareDateTime(dump_only=True)
+
+
+class VendorResponseCacheSchema(Schema):
+    id = fields.Int(dump_only=True)
+    vendor_id = fields.Int(allow_none=False)
+    order_number = fields.Str(allow_none=False)
+    etag = fields.Str(allow_none=True)
+    last_modified = fields.Str(allow_none=True)
+    content_hash = fields.Str(allow_none=True)
+    pending_hash = fields.Str(allow_none=True)
+    sent_at = fields.DateTime(allow_none=True)
+    created_at = fields.AwareDateTime(dump_only=True)
+    modified_at = fields.DateTime(dump_only=True)
+
+
+class NetsuiteSyncStateSchema(Schema):
+    id = fields.Int(dump_only=True)
+    environment = fields.Str(allow_none=False)
+    last_modified_watermark = fields.DateTime(allow_none=True)
+    last_full_sync_at = fields.DateTime(allow_none=True)
+    last_synced_at = fields.DateTime(allow_none=True)
+    last_synced_rows = fields.Int(allow_none=False)
+    created_at = fields.AwareDateTime(dump_only=True)
+    modified_at = fields.DateTime(dump_only=True)
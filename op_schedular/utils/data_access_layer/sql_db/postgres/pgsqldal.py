@@ -1,16 +1,19 @@
-
 """Concrete `PgSQL DAL` class for all Postgres db operations.
 
 Connection management and transaction is handled in this class with
-appropriate appropriate `QuerySet`.
+appropriate appropriate `QuerySet`. Connections are taken from a pool
+shared by all threads of the process.
 """
 
 from contextlib import contextmanager
-from typing import Any, Dict, Generator
+import threading
+from typing import Any, Dict, Generator, Optional
 
 import psycopg2
 
 from op_schedular.utils.data_access_layer.sql_db.dbdalbase import DBDALBase
+from op_schedular.utils.data_access_layer.sql_db.postgres.pgsqlpool import PgSQLConnectionPool
+from op_schedular.utils.data_access_layer.sql_db.postgres.pgsqlstats import PgSQLInstrumentation
 from op_schedular.utils.data_access_layer.sql_db.postgres.psqlqueryset import PgSQlQuerySet
 
 
@@ -29,9 +32,24 @@ class PgSQLDAL(DBDALBase):
                         "password": "database_password",
                         "dbname" : "database_name",
             } ````
+
+    :param pool_config: Settings of the connection pool, see `PgSQLConnectionPool`
+    :type pool_config: dict, optional
+
+    :param instrumentation_config: Settings of query instrumentation, see `PgSQLInstrumentation`
+    :type instrumentation_config: dict, optional
+
+    Every `transaction()` checks out its own connection and cursor from the
+    pool, so transactions of different threads don't share a cursor. Pool is
+    created on first transaction and kept for the lifetime of the process.
     """
 
-    def __init__(self, dbparams: Dict[str, Any]) -> None:
+    def __init__(
+        self,
+        dbparams: Dict[str, Any],
+        pool_config: Dict[str, Any] = None,
+        instrumentation_config: Dict[str, Any] = None
+    ) -> None:
         """Concrete `PgSQL DAL` class for all Postgres db operations.
         Connection management and transaction is handled in this class with
         appropriate appropriate `QuerySet`.
@@ -46,35 +64,58 @@ class PgSQLDAL(DBDALBase):
                         "password": "database_password",
                         "dbname" : "database_name",
                     } ````
+
+        :param pool_config: Settings of the connection pool, see `PgSQLConnectionPool`
+        :type pool_config: dict, optional
+
+        :param instrumentation_config: Settings of query instrumentation, see `PgSQLInstrumentation`
+        :type instrumentation_config: dict, optional
         """
         super().__init__(dbparams)
-        self.cursor = None
-        self.connection = None
+        self.pool_config = pool_config
+        self.instrumentation = PgSQLInstrumentation(instrumentation_config)
+        self.pool = None
+        self._pool_lock = threading.Lock()
+        # Connections and cursors of the open transactions of each thread, innermost last
+        self._local = threading.local()
 
-    def connect(self) -> None:
-        """Connects postgresql db server with given dbparams through `psycopg2`
-        driver."""
-        if not self.is_connection_active:
-            # Creating new connection if closed.
-            self.connection = psycopg2.connect(**self.dbparams)
+    @property
+    def _transactions(self) -> list:
+        if not hasattr(self._local, "transactions"):
+            self._local.transactions = []
+        return self._local.transactions
 
-        if not self.is_cursor_active:
-            # Creating new cursor if closed.
-            self.connection.cursor()  # type: ignore
+    @property
+    def connection(self) -> Any:
+        """Connection of the innermost open transaction of the calling thread."""
+        return self._transactions[-1][0] if self._transactions else None
 
-        self.connection = psycopg2.connect(**self.dbparams)  # type: ignore
-        self.cursor = self.connection.cursor()  # type: ignore
+    @property
+    def cursor(self) -> Any:
+        """Cursor of the innermost open transaction of the calling thread."""
+        return self._transactions[-1][1] if self._transactions else None
+
+    def connect(self) -> None:
+        """Creates pool of connections to postgresql db server with given
+        dbparams through `psycopg2` driver, if it is not created yet."""
+        if self.pool is None:
+            with self._pool_lock:
+                if self.pool is None:
+                    self.pool = PgSQLConnectionPool(self.dbparams, self.pool_config)
 
     @property
     def queryset(self) -> PgSQlQuerySet:
-        """Makes database connection and returns `PgSQlQuerySet` as an
-        interface for all queries operations.
+        """Returns `PgSQlQuerySet` on the cursor of the open transaction of
+        the calling thread.
+
+        :raises Exception: Raised when called outside of `transaction()`
 
         :return: Returns`PgSQlQuerySet` through which queries are executed.
         :rtype: PgSQlQuerySet
         """
-        self.connect()
-        return PgSQlQuerySet(self.cursor)  # type: ignore
+        if not self.is_cursor_active:
+            raise Exception("queryset is only available inside transaction()")
+        return PgSQlQuerySet(self.cursor, self._queryset_instrumentation)  # type: ignore
 
     @property
     def is_connection_active(self) -> bool:
@@ -91,12 +132,12 @@ class PgSQLDAL(DBDALBase):
             return False
 
     def disconnect(self) -> None:
-        """Closes database cursor and connection channel."""
-        if self.is_cursor_active:
-            self.cursor.close()  # type: ignore
-
-        if self.connection:
-            self.connection.close()
+        """Closes all connections of the pool. Pool is created again on next
+        transaction."""
+        with self._pool_lock:
+            if self.pool is not None:
+                self.pool.closeall()
+                self.pool = None
 
     def reconnect(self) -> None:
         """Re-connects to `PostgreSQL` by first disconnecting and then
@@ -108,15 +149,31 @@ class PgSQLDAL(DBDALBase):
         self.connect()
 
     def commit(self) -> None:
-        """Perfroms database commit."""
+        """Perfroms database commit of the open transaction of the calling thread."""
         if self.connection:
             self.connection.commit()
 
     def rollback(self) -> None:
-        """Performs database rollback."""
+        """Performs database rollback of the open transaction of the calling thread."""
         if self.connection:
             self.connection.rollback()
 
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Counters of the connection pool."""
+        return self.pool.stats if self.pool is not None else {}
+
+    @property
+    def _queryset_instrumentation(self) -> Optional[PgSQLInstrumentation]:
+        return self.instrumentation if self.instrumentation.enabled else None
+
+    @property
+    def query_stats(self) -> Dict[str, Any]:
+        """Count, time, rows and top fingerprints of the queries of the current
+        invocation, see `PgSQLInstrumentation.invocation()`, or of the process
+        outside of one."""
+        return self.instrumentation.summary()
+
     @contextmanager
     def transaction(self, auto_commit: bool = True) -> Generator[PgSQlQuerySet, bool, None]:
         """DB transaction contextlib. This should be used with `with
@@ -140,18 +197,37 @@ class PgSQLDAL(DBDALBase):
                 ```
 
         You don't have to manage connection open and close while using transaction.
+        Connection is returned to the pool at the end, work which is not
+        committed by then is rolled back.
         """
 
-        queryset = self.queryset
+        self.connect()
+        connection = self.pool.getconn()
+        broken = False
+        try:
+            cursor = connection.cursor()
+        except Exception:
+            self.pool.putconn(connection, close=True)
+            raise
+
+        self._transactions.append((connection, cursor))
+        queryset = PgSQlQuerySet(cursor, self._queryset_instrumentation)
         try:
             yield queryset
-        except Exception as e:
+            # Server side cursors are closed while their transaction is open
+            queryset.close()
             if auto_commit:
-                self.rollback()
+                connection.commit()
+        except Exception as e:
+            # Connection lost midway is not given back to the pool
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)) or bool(connection.closed)
+            if auto_commit and not broken:
+                connection.rollback()
 
             del queryset
             raise e
         finally:
-            if auto_commit:
-                self.commit()
-            self.disconnect()
+            self._transactions.pop()
+            if not cursor.closed:
+                cursor.close()
+            self.pool.putconn(connection, close=broken)
@@ -0,0 +1,313 @@
+"""Instrumentation of queries executed through `PgSQlQuerySet`.
+
+Every statement is timed and aggregated by a fingerprint of its query, i.e.
+the query with literals, placeholders and lists of values replaced by `?`,
+so statements differing only by their parameters count as one. Statements
+slower than a threshold are logged, optionally with a sample of their plan
+from `EXPLAIN (ANALYZE, BUFFERS)`.
+
+Statistics are kept for the process and for the invocation open in the
+calling context, see `PgSQLInstrumentation.invocation()`.
+"""
+
+from contextlib import contextmanager
+import contextvars
+from functools import lru_cache
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+from typing import Any, Dict, Generator, List, Optional, Sequence, Tuple
+
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+_ROWS = re.compile(r"\(\?(?:, \.\.\.)?\)(?:\s*,\s*\(\?(?:, \.\.\.)?\))+")
+_SPACES = re.compile(r"\s+")
+# Statements which change data when they are run by EXPLAIN ANALYZE
+_WRITES = re.compile(r"\b(?:insert|update|delete|merge|copy|create|drop|alter|truncate|lock|call)\b", re.I)
+
+
+@lru_cache(maxsize=512)
+def fingerprint(query: Any) -> Tuple[str, str]:
+    """Returns normalized query and its fingerprint.
+
+    eg: `SELECT * FROM t WHERE id IN %s AND name = 'a'` and `... IN (1, 2)`
+    both give `SELECT * FROM t WHERE id IN ? AND name = ?`.
+
+    :param query: Query string as passed to execute, before parameters are bound
+    :type query: str
+
+    :return: Normalized query and first 12 characters of its sha1
+    :rtype: tuple
+    """
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    normalized = _COMMENTS.sub(" ", str(query))
+    normalized = _STRINGS.sub("?", normalized)
+    normalized = _PLACEHOLDERS.sub("?", normalized)
+    normalized = _NUMBERS.sub("?", normalized)
+    normalized = _LISTS.sub("?, ...", normalized)
+    normalized = _ROWS.sub("(...), ...", normalized)
+    normalized = _SPACES.sub(" ", normalized).strip()
+    return normalized, hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+def estimate_bytes(rows: Sequence[Sequence[Any]]) -> int:
+    """Returns approximate size of fetched rows, length of text and json
+    values and 8 bytes for any other value."""
+    size = 0
+    for row in rows:
+        for value in row:
+            if value is None:
+                continue
+            if isinstance(value, (str, bytes, bytearray, memoryview)):
+                size += len(value)
+            elif isinstance(value, (dict, list)):
+                size += len(json.dumps(value, default=str))
+            else:
+                size += 8
+    return size
+
+
+class QueryStats:
+    """Aggregates of executed statements, in total and by fingerprint."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.slow = 0
+        self.explained = 0
+        self.fingerprints = {}
+
+    def add(self, key: str, query: str, elapsed_ms: float, rowcount: int, nbytes: int, slow: bool) -> None:
+        rowcount = max(rowcount or 0, 0)
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.rows += rowcount
+            self.bytes += nbytes
+            self.slow += int(slow)
+
+            entry = self.fingerprints.get(key)
+            if entry is None:
+                entry = self.fingerprints[key] = {
+                    "query": query,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "rows": 0,
+                    "bytes": 0,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["rows"] += rowcount
+            entry["bytes"] += nbytes
+
+    def take_explain(self, limit: int) -> bool:
+        """Counts a plan sample, False when limit of samples is reached."""
+        with self._lock:
+            if self.explained >= limit:
+                return False
+            self.explained += 1
+            return True
+
+    def top(self, n: int = 10) -> List[Dict[str, Any]]:
+        """Fingerprints taking most of the time, slowest first."""
+        with self._lock:
+            entries = [dict(entry, fingerprint=key) for key, entry in self.fingerprints.items()]
+        entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        for entry in entries[:n]:
+            entry["total_ms"] = round(entry["total_ms"], 2)
+            entry["max_ms"] = round(entry["max_ms"], 2)
+        return entries[:n]
+
+    def summary(self, top: int = 10) -> Dict[str, Any]:
+        """Totals with the top fingerprints, for reporting at the end of a stage."""
+        with self._lock:
+            totals = {
+                "count": self.count,
+                "total_ms": round(self.total_ms, 2),
+                "rows": self.rows,
+                "bytes": self.bytes,
+                "slow": self.slow,
+            }
+        totals["top"] = self.top(top)
+        return totals
+
+
+class PgSQLInstrumentation:
+    """Times and aggregates statements executed by `PgSQlQuerySet`.
+
+    :param config: Instrumentation settings, all optional, example
+
+    ```    {
+                "enabled": true,
+                "slow_query_ms": 500,
+                "explain_slow": false,
+                "explain_sample_rate": 1.0,
+                "explain_max_per_invocation": 3,
+                "measure_bytes": true,
+                "top_fingerprints": 10,
+                "max_query_chars": 2000
+        } ````
+    :type config: dict
+
+    A statement taking `slow_query_ms` or more is logged with its bound
+    parameters. With `explain_slow`, a sample of slow read only statements
+    (`explain_sample_rate` of them, at most `explain_max_per_invocation`) is
+    run again with `EXPLAIN (ANALYZE, BUFFERS)` in a savepoint and its plan
+    is logged.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None) -> None:
+        config = config or {}
+        self.enabled = bool(config.get("enabled", True))
+        self.slow_query_ms = float(config.get("slow_query_ms", 500))
+        self.explain_slow = bool(config.get("explain_slow", False))
+        self.explain_sample_rate = float(config.get("explain_sample_rate", 1.0))
+        self.explain_max_per_invocation = int(config.get("explain_max_per_invocation", 3))
+        self.measure_bytes = bool(config.get("measure_bytes", True))
+        self.top_fingerprints = int(config.get("top_fingerprints", 10))
+        self.max_query_chars = int(config.get("max_query_chars", 2000))
+
+        self.totals = QueryStats()
+        self._current = contextvars.ContextVar("query_stats", default=None)
+
+    @property
+    def current(self) -> Optional[QueryStats]:
+        """Statistics of the invocation open in the calling context, if any."""
+        return self._current.get()
+
+    @contextmanager
+    def invocation(self, name: str = "") -> Generator[QueryStats, None, None]:
+        """Collects statistics of statements executed within it, logged at
+        its end. Threads started through `map_bounded` inside it are counted
+        in it as well.
+
+        :param name: Name of the invocation in the log, eg: stage name
+        :type name: str
+
+        :yields: `QueryStats` of the invocation
+        """
+        stats = QueryStats()
+        token = self._current.set(stats)
+        try:
+            yield stats
+        finally:
+            self._current.reset(token)
+            if stats.count:
+                logging.info(
+                    "Database queries of %s: %s"
+                    % (name or "invocation", json.dumps(stats.summary(self.top_fingerprints)))
+                )
+
+    def _statement(self, cursor: Any, query: Any) -> str:
+        statement = getattr(cursor, "query", None) or query
+        if isinstance(statement, bytes):
+            statement = statement.decode("utf-8", "replace")
+        statement = str(statement)
+        if len(statement) > self.max_query_chars:
+            statement = statement[:self.max_query_chars] + "... (%s chars)" % len(statement)
+        return statement
+
+    def record(
+        self,
+        cursor: Any,
+        query: Any,
+        elapsed_ms: float,
+        rowcount: int,
+        rows: Optional[Sequence[Sequence[Any]]] = None,
+        bound: bool = True,
+        nbytes: Optional[int] = None
+    ) -> None:
+        """Adds an executed statement to the statistics of the process and
+        of the current invocation, and logs it when it is slow.
+
+        :param cursor: Cursor which executed the statement
+        :type cursor: psycopg2.extensions.cursor
+
+        :param query: Query string as passed to execute
+        :type query: str
+
+        :param elapsed_ms: Wall time of the statement, with fetching of its rows
+        :type elapsed_ms: float
+
+        :param rowcount: Rows returned or affected
+        :type rowcount: int
+
+        :param rows: Fetched rows, for the bytes returned
+        :type rows: list, optional
+
+        :param bound: Whether `cursor.query` holds this statement, False for `COPY`
+        :type bound: bool
+
+        :param nbytes: Bytes returned, when already counted instead of rows, eg: while streaming
+        :type nbytes: int, optional
+        """
+        normalized, key = fingerprint(query)
+        if nbytes is None:
+            nbytes = estimate_bytes(rows) if rows and self.measure_bytes else 0
+        slow = elapsed_ms >= self.slow_query_ms
+
+        stats = self.current
+        self.totals.add(key, normalized, elapsed_ms, rowcount, nbytes, slow)
+        if stats is not None:
+            stats.add(key, normalized, elapsed_ms, rowcount, nbytes, slow)
+
+        if not slow:
+            return
+
+        logging.warning(
+            "Slow query %s took %.1f ms, %s row(s): %s"
+            % (key, elapsed_ms, rowcount, self._statement(cursor if bound else None, query))
+        )
+        if (
+            self.explain_slow
+            and bound
+            and not _WRITES.search(normalized)
+            and random.random() < self.explain_sample_rate
+            and (stats or self.totals).take_explain(self.explain_max_per_invocation)
+        ):
+            plan = self.explain(cursor)
+            if plan:
+                logging.warning("Plan of slow query %s:\n%s" % (key, plan))
+
+    def explain(self, cursor: Any) -> Optional[str]:
+        """Runs last statement of cursor again with `EXPLAIN (ANALYZE, BUFFERS)`
+        in a savepoint of its transaction, on a separate cursor.
+
+        :return: Plan of the statement, None when it could not be explained
+        :rtype: str
+        """
+        statement = getattr(cursor, "query", None)
+        if not statement:
+            return None
+        if isinstance(statement, str):
+            statement = statement.encode("utf-8")
+
+        try:
+            with cursor.connection.cursor() as explain_cursor:
+                explain_cursor.execute("SAVEPOINT query_explain")
+                try:
+                    explain_cursor.execute(b"EXPLAIN (ANALYZE, BUFFERS) " + statement)
+                    return "\n".join(row[0] for row in explain_cursor.fetchall())
+                finally:
+                    explain_cursor.execute("ROLLBACK TO SAVEPOINT query_explain")
+                    explain_cursor.execute("RELEASE SAVEPOINT query_explain")
+        except Exception:
+            logging.debug("Could not explain slow query", exc_info=True)
+            return None
+
+    def summary(self) -> Dict[str, Any]:
+        """Statistics of the current invocation, or of the process outside of one."""
+        return (self.current or self.totals).summary(self.top_fingerprints)
@@ -0,0 +1,98 @@
+"""
+Tests of the circuit breaker around vendor requests, a trial request of a half
+open circuit which is never sent must not keep the circuit half open.
+"""
+from op_fetcher.common.helpers.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, HALF_OPEN, OPEN
+from op_fetcher.common.helpers.rate_limiter import VendorRateLimiter
+from op_fetcher.common.helpers.retry import Deadline
+from op_fetcher.common.helpers.http import make_api_call
+import unittest
+
+
+URL = "https://vendor.invalid/orders"
+
+
+class ExpiringDeadline(Deadline):
+    """Deadline which expires after it is checked `checks` times"""
+
+    def __init__(self, checks: int) -> None:
+        super().__init__(seconds=100)
+        self.checks = checks
+
+    def expired(self) -> bool:
+        self.checks -= 1
+        return self.checks < 0
+
+
+def open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("vendor", {"failure_threshold": 1, "open_seconds": 0})
+    breaker.record(False)
+    return breaker
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_and_closes_after_trial_request(self):
+        breaker = open_breaker()
+        self.assertEqual(breaker.state, OPEN)
+
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())
+
+        breaker.record(True)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_released_trial_can_be_taken_again(self):
+        breaker = open_breaker()
+        self.assertTrue(breaker.allow())
+        breaker.release_trial()
+        self.assertTrue(breaker.allow())
+
+    def test_release_trial_of_closed_circuit_changes_nothing(self):
+        breaker = CircuitBreaker("vendor")
+        self.assertTrue(breaker.allow())
+        breaker.release_trial()
+        self.assertEqual((breaker.state, breaker.half_open_calls), (CLOSED, 0))
+
+
+class TestMakeApiCallWithCircuitBreaker(unittest.TestCase):
+
+    def assertTrialGivenBack(self, breaker: CircuitBreaker) -> None:
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertEqual(breaker.half_open_calls, 0)
+        self.assertTrue(breaker.allow())
+
+    def test_deadline_reached_while_waiting_for_rate_limit(self):
+        breaker = open_breaker()
+        limiter = VendorRateLimiter("vendor", config={"requests_per_second": 1})
+        limiter.bucket.pause(30)
+
+        with self.assertRaises(Exception):
+            make_api_call(URL, "GET", {}, rate_limiter=limiter, deadline=Deadline(seconds=1), circuit_breaker=breaker)
+
+        self.assertTrialGivenBack(breaker)
+        self.assertEqual(limiter.controller.in_flight, 0)
+
+    def test_deadline_reached_after_waiting_for_rate_limit(self):
+        breaker = open_breaker()
+        limiter = VendorRateLimiter("vendor")
+
+        # Deadline is not reached before the wait, but is after it
+        with self.assertRaises(Exception):
+            make_api_call(URL, "GET", {}, rate_limiter=limiter, deadline=ExpiringDeadline(1), circuit_breaker=breaker)
+
+        self.assertTrialGivenBack(breaker)
+        self.assertEqual(limiter.controller.in_flight, 0)
+
+    def test_open_circuit_short_circuits_request(self):
+        breaker = CircuitBreaker("vendor", {"failure_threshold": 1, "open_seconds": 60})
+        breaker.record(False)
+
+        with self.assertRaises(CircuitOpenError):
+            make_api_call(URL, "GET", {}, circuit_breaker=breaker)
+        self.assertEqual(breaker.short_circuited, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
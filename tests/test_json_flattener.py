@@ -0,0 +1,80 @@
+"""
+Tests of json_flattener against the flattener it replaced, and of unflatten
+building the flattened json back.
+"""
+from op_extractor.common.helpers import json_flattener, unflatten
+from tests.fixtures.legacy_json_flattener import json_flattener as legacy_json_flattener
+from typing import Any
+import unittest
+import random
+
+
+def generate_json(depth: int, rand: random.Random, empty: bool = True) -> Any:
+    """Random json of dicts and lists, with empty dicts and lists when empty is set"""
+    leaves = [None, 1, 'x', 2.5, True, 'a.b'] + ([{}, []] if empty else [])
+    if depth == 0 or rand.random() < 0.25:
+        return rand.choice(leaves)
+    if rand.random() < 0.5:
+        size = rand.randint(0 if empty else 1, 4)
+        return {rand.choice('abcdef') + str(i): generate_json(depth - 1, rand, empty) for i in range(size)}
+    return [generate_json(depth - 1, rand, empty) for _ in range(rand.randint(0 if empty else 1, 4))]
+
+
+class TestJsonFlattener(unittest.TestCase):
+
+    def test_flattens_nested_dicts_and_lists(self):
+        self.assertEqual(
+            json_flattener({'a': [{'b': 1}, {'c': [2, 3]}], 'd': {'e': None}, 'f': 'x'}),
+            {'a.0.b': 1, 'a.1.c.0': 2, 'a.1.c.1': 3, 'd.e': None, 'f': 'x'}
+        )
+
+    def test_empty_dicts_and_lists_have_no_key(self):
+        self.assertEqual(json_flattener({'a': {}, 'b': [], 'c': {'d': []}, 'e': 1}), {'e': 1})
+
+    def test_same_keys_values_and_order_as_legacy_flattener(self):
+        rand = random.Random(7)
+        for _ in range(2000):
+            document = {key: generate_json(6, rand) for key in ('x', 'y', 'z')[:rand.randint(1, 3)]}
+            self.assertEqual(
+                list(json_flattener(document).items()),
+                list(legacy_json_flattener(dict(document)).items()),
+                document
+            )
+
+
+class TestUnflatten(unittest.TestCase):
+
+    def test_digit_parts_are_list_indexes(self):
+        self.assertEqual(
+            unflatten({'a.0.b': 1, 'a.1.c.0': 2, 'a.1.c.1': 3, 'd.e': None, 'f': 'x'}),
+            {'a': [{'b': 1}, {'c': [2, 3]}], 'd': {'e': None}, 'f': 'x'}
+        )
+
+    def test_round_trip(self):
+        # Empty dicts and lists are not kept by json_flattener, so they are not generated
+        rand = random.Random(11)
+        for _ in range(2000):
+            document = {key: generate_json(6, rand, empty=False) for key in ('x', 'y', 'z')[:rand.randint(1, 3)]}
+            self.assertEqual(unflatten(json_flattener(document)), document)
+
+    def test_round_trip_of_vendor_payload(self):
+        document = {
+            'Envelope': {'Body': {'Response': {'Orders': [
+                {
+                    'Header': {'PO': 'PO-1', 'Status': 'Shipped'},
+                    'Lines': [
+                        {'Sku': 'S%d' % line, 'Qty': line, 'Serials': ['SN%d' % serial for serial in range(3)]}
+                        for line in range(12)
+                    ]
+                }
+                for _ in range(3)
+            ]}}}
+        }
+        self.assertEqual(unflatten(json_flattener(document)), document)
+
+    def test_sparse_list_indexes_are_filled_with_none(self):
+        self.assertEqual(unflatten({'a.2': 'x'}), {'a': [None, None, 'x']})
+
+
+if __name__ == '__main__':
+    unittest.main()
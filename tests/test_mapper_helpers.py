@@ -0,0 +1,156 @@
+"""
+Differential test of MappingPlan against the mapper it replaced.
+
+Vendor responses under fixtures/vendor_responses are mapped with the mapping
+of their vendor by both mappers, output must be identical. Responses are kept
+one directory per vendor, with the vendor config part used by the mapper in
+mapping.json and responses as they are returned by vendor (json or xml).
+"""
+from op_extractor.common.helpers import json_flattener, xml_to_json_parser
+from op_extractor.common.helpers import mapper_helpers
+from tests.fixtures import legacy_mapper_helpers
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+import unittest
+import random
+import copy
+import json
+import os
+
+
+VENDOR_RESPONSES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "vendor_responses")
+
+
+def load_vendor_responses() -> List[Tuple[str, Dict, str, Dict]]:
+    """
+    Returns (vendor, config, response name, flattened response) of every recorded response
+    """
+    cases = []
+    for vendor in sorted(os.listdir(VENDOR_RESPONSES_DIR)):
+        vendor_dir = os.path.join(VENDOR_RESPONSES_DIR, vendor)
+        with open(os.path.join(vendor_dir, "mapping.json")) as config_file:
+            config = json.load(config_file)
+
+        for name in sorted(os.listdir(vendor_dir)):
+            if name == "mapping.json":
+                continue
+            with open(os.path.join(vendor_dir, name)) as response_file:
+                text = response_file.read()
+            if name.endswith(".xml"):
+                response = xml_to_json_parser(SimpleNamespace(text=text))
+            else:
+                response = json.loads(text)
+            cases.append((vendor, config, name, json_flattener(response)))
+    return cases
+
+
+def field_mapping_of(config: Dict) -> Dict:
+    """Field mapping built the same way as OrderTransformer.fetch_config"""
+    return {
+        fld_map.get('destination_field'): fld_map.get('source_field')
+        for fld_map in config.get('mapping').get('fulfillment_table')
+    }
+
+
+def run_mapper(mapper: Any, field_mapping: Dict, config: Dict, item: Dict, is_serialized: Any) -> Tuple[str, Any]:
+    transformer = SimpleNamespace(
+        field_mapping=field_mapping,
+        config_template=config,
+        is_serialized=is_serialized
+    )
+    try:
+        return 'ok', mapper.map_object_with_config(transformer, copy.deepcopy(item))
+    except Exception as e:
+        return 'error', type(e).__name__
+
+
+class TestMappingPlanOnVendorResponses(unittest.TestCase):
+
+    def test_recorded_responses_map_same_as_legacy_mapper(self):
+        cases = load_vendor_responses()
+        self.assertTrue(cases)
+
+        for vendor, config, name, item in cases:
+            field_mapping = field_mapping_of(config)
+            for is_serialized in (None, True, False):
+                with self.subTest(vendor=vendor, response=name, is_serialized=is_serialized):
+                    expected = run_mapper(legacy_mapper_helpers, field_mapping, config, item, is_serialized)
+                    mapped = run_mapper(mapper_helpers, field_mapping, config, item, is_serialized)
+                    self.assertEqual(expected[0], 'ok', expected)
+                    self.assertEqual(mapped, expected)
+
+    def test_plan_is_reused_across_orders_of_vendor(self):
+        # Routes learned from one order must not change mapping of the next one
+        for vendor, config, name, item in load_vendor_responses():
+            field_mapping = field_mapping_of(config)
+            plan = mapper_helpers.get_mapping_plan(field_mapping, config)
+            self.assertIs(plan, mapper_helpers.get_mapping_plan(dict(field_mapping), copy.deepcopy(config)))
+            for _ in range(2):
+                with self.subTest(vendor=vendor, response=name):
+                    self.assertEqual(
+                        run_mapper(mapper_helpers, field_mapping, config, item, True),
+                        run_mapper(legacy_mapper_helpers, field_mapping, config, item, True)
+                    )
+
+
+# Fields and words generated responses are built from, covering every type of mapper
+GENERATED_FIELDS = [
+    ("Order.PO", "po_number"), ("Order.Memo", "memo"), ("Order.Status", "invoice_status"),
+    ("Order.Lines.0.Sku", "items.itemno"), ("Order.Lines.0.SN", "items.item_details"),
+    ("RefIDQual['IN']", "invoice_number"), ("RefIDQual['ON']", "order_number"),
+    ("Order.Lines[i].Sku", "items.itemno"), ("Order.Lines[i].Qty", "items.quantity"),
+    ("Order.Pkgs[i].Track", "deliveries.tracking"), ("Order.Other[i].X", "misc.x"),
+    ("Serial[i]", "items.serial"), ("Track[i]", "tracking_numbers"),
+    ("Order.Ship[i].Date", "ship_date"), ("Order.Ship[i].Via", "carrier"),
+    ("Order.Lines.Price", "items.price"), ("Order.Qty", "deliveries.qty"), ("Order.Lines.Desc", "description"),
+    ("", "nothing"), ("Order.Lines[i].Serials[i]", "items.serials"),
+]
+GENERATED_WORDS = [
+    'Order', 'Lines', 'Sku', 'Qty', 'Pkgs', 'Track', 'Ship', 'Date', 'Via', 'Price', 'SN', 'Other', 'X',
+    'Desc', 'Serials', 'Serial0', 'Memo', 'PO', 'Status', 'RefIDQual', 'RefID', 'Item2'
+]
+GENERATED_VALUES = ['v1', 'IN', 'ON', '', 'A', 'B22']
+
+
+def generate_value(rand: random.Random) -> Any:
+    return None if rand.random() < 0.01 else rand.choice(GENERATED_VALUES)
+
+
+def generate_json(depth: int, rand: random.Random) -> Any:
+    if depth == 0 or rand.random() < 0.3:
+        return generate_value(rand)
+    if rand.random() < 0.6:
+        return {rand.choice(GENERATED_WORDS): generate_json(depth - 1, rand) for _ in range(rand.randint(1, 4))}
+    return [generate_json(depth - 1, rand) for _ in range(rand.randint(1, 4))]
+
+
+class TestMappingPlanOnGeneratedResponses(unittest.TestCase):
+
+    def test_generated_responses_map_same_as_legacy_mapper(self):
+        rand = random.Random(3)
+        for case in range(1000):
+            field_mapping = dict(rand.sample(GENERATED_FIELDS, rand.randint(3, len(GENERATED_FIELDS))))
+            config = {}
+            if rand.random() < 0.5:
+                config['position_for_checking_idx_for_nesting'] = rand.choice([0, 2, 3, 4])
+            if rand.random() < 0.3:
+                config['position_for_checking_idx_deliveries'] = rand.choice([2, 3])
+            if rand.random() < 0.3:
+                config['make_items_inside_items'] = {'field_to_nest': rand.choice(['items', 'deliveries'])}
+            if rand.random() < 0.2:
+                config['field_to_start_with_split_again'] = True
+
+            for _ in range(3):
+                item = json_flattener({
+                    'Order': generate_json(4, rand),
+                    rand.choice(GENERATED_WORDS): generate_json(3, rand)
+                })
+                is_serialized = rand.choice([None, True, False])
+                # Inputs the legacy mapper raises on must raise the same error
+                expected = run_mapper(legacy_mapper_helpers, field_mapping, config, item, is_serialized)
+                mapped = run_mapper(mapper_helpers, field_mapping, config, item, is_serialized)
+                self.assertEqual(mapped, expected, (case, field_mapping, config, item))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Tests of the streamed result set over a server side cursor, truthiness must
+tell whether the query returned rows before any of them are read.
+"""
+from op_fetcher.utils.data_access_layer.sql_db.postgres.psqlresultset import PgSQlStreamResultSet
+from typing import List, Tuple
+import unittest
+
+
+class FakeNamedCursor:
+    """Returns rows fetchmany at a time, description is known after first fetch"""
+
+    def __init__(self, rows: List[Tuple]) -> None:
+        self.rows = list(rows)
+        self.description = None
+        self.closed = False
+        self.query = "SELECT id, name FROM purchase_order"
+        self.fetches = 0
+
+    def fetchmany(self, size: int) -> List[Tuple]:
+        self.fetches += 1
+        self.description = (("id",), ("name",))
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def stream(count: int, itersize: int = 3) -> PgSQlStreamResultSet:
+    return PgSQlStreamResultSet(FakeNamedCursor([(i, "PO%d" % i) for i in range(count)]), itersize=itersize)
+
+
+class TestPgSQlStreamResultSet(unittest.TestCase):
+
+    def test_empty_result_is_false(self):
+        self.assertFalse(stream(0))
+
+    def test_result_with_rows_is_true_before_iteration(self):
+        for count in (1, 3, 7):
+            with self.subTest(count=count):
+                result_set = stream(count)
+                self.assertTrue(result_set)
+                self.assertEqual([row["id"] for row in result_set], list(range(count)))
+
+    def test_peeked_rows_are_read_in_batches_of_asked_size(self):
+        result_set = stream(7, itersize=5)
+        self.assertTrue(result_set)
+        batches = list(result_set.iter_batches(2))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1, 2])
+        self.assertEqual([row["name"] for batch in batches for row in batch], ["PO%d" % i for i in range(7)])
+
+    def test_truth_is_checked_with_one_fetch(self):
+        result_set = stream(7)
+        self.assertTrue(result_set)
+        self.assertTrue(result_set)
+        self.assertEqual(result_set.cursor.fetches, 1)
+
+    def test_result_stays_true_after_iteration(self):
+        result_set = stream(4)
+        self.assertEqual(len(result_set.to_list()), 4)
+        self.assertTrue(result_set)
+        self.assertEqual(len(result_set), 4)
+
+    def test_tuples_and_dataframe_include_peeked_rows(self):
+        result_set = stream(4)
+        self.assertTrue(result_set)
+        self.assertEqual(list(result_set.iter_tuples()), [(i, "PO%d" % i) for i in range(4)])
+
+        result_set = stream(4)
+        self.assertTrue(result_set)
+        self.assertEqual(list(result_set.to_df()["id"]), list(range(4)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Tests of the per-vendor rate limiter, a request which is never sent must give
+its slot back without adapting the limit.
+"""
+from op_fetcher.common.helpers.rate_limiter import VendorRateLimiter, parse_retry_after
+from op_fetcher.common.helpers.retry import Deadline
+from types import SimpleNamespace
+import unittest
+
+
+def vendor_limiter(**config) -> VendorRateLimiter:
+    config.setdefault("initial_in_flight", 2)
+    return VendorRateLimiter("vendor", max_in_flight=10, config=config)
+
+
+class TestVendorRateLimiter(unittest.TestCase):
+
+    def test_acquire_timeout_does_not_change_limit(self):
+        limiter = vendor_limiter(requests_per_second=1)
+        limiter.bucket.pause(30)
+        limit = limiter.controller.limit
+
+        for _ in range(5):
+            with self.assertRaises(Exception):
+                limiter.acquire(Deadline(seconds=1))
+
+        self.assertEqual(limiter.controller.limit, limit)
+        self.assertEqual(limiter.controller.in_flight, 0)
+
+    def test_healthy_response_raises_limit(self):
+        limiter = vendor_limiter()
+        limit = limiter.controller.limit
+
+        limiter.acquire()
+        limiter.release(SimpleNamespace(status_code=200, headers={}), latency=0.1)
+
+        self.assertGreater(limiter.controller.limit, limit)
+        self.assertEqual(limiter.controller.in_flight, 0)
+
+    def test_throttled_response_pauses_at_most_max_pause_seconds(self):
+        limiter = vendor_limiter(max_pause_seconds=5)
+
+        limiter.acquire()
+        limiter.release(SimpleNamespace(status_code=429, headers={"Retry-After": "3600"}))
+
+        with self.assertRaises(Exception):
+            limiter.acquire(Deadline(seconds=4))
+        self.assertEqual(limiter.throttled, 1)
+        self.assertEqual(limiter.controller.in_flight, 0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("120"), 120.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Tests of the response cache of fetchers, a response is unchanged only against
+the one the dispatcher confirmed as sent.
+"""
+from op_fetcher.order_processing.fetcher.response_cache import ResponseCache
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict
+import unittest
+import hashlib
+
+
+BODY = b'{"status": "shipped"}'
+CONFIG = {"enabled": True, "conditional_request": True, "resend_after_hours": 24}
+
+
+def response(status_code: int = 200, content: bytes = BODY, headers: Dict = None) -> SimpleNamespace:
+    return SimpleNamespace(status_code=status_code, content=content, headers=headers or {})
+
+
+def cache_with(**entry) -> ResponseCache:
+    cache = ResponseCache(vendor_id=1, config=CONFIG)
+    cache.entries = {"PO1": dict(order_number="PO1", **entry)}
+    return cache
+
+
+def confirmed(content: bytes = BODY, hours_ago: float = 1, **entry) -> ResponseCache:
+    return cache_with(
+        content_hash=hashlib.sha256(content).hexdigest(),
+        sent_at=datetime.utcnow() - timedelta(hours=hours_ago),
+        **entry
+    )
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_new_response_is_pending(self):
+        cache = cache_with()
+        self.assertFalse(cache.is_unchanged("PO1", response()))
+        self.assertEqual(cache.updates[-1]["pending_hash"], hashlib.sha256(BODY).hexdigest())
+        self.assertNotIn("sent_at", cache.updates[-1])
+        self.assertNotIn("content_hash", cache.updates[-1])
+
+    def test_response_same_as_confirmed_is_unchanged(self):
+        cache = confirmed()
+        self.assertTrue(cache.is_unchanged("PO1", response()))
+        self.assertIsNone(cache.updates[-1]["pending_hash"])
+        self.assertEqual(cache.unchanged, 1)
+
+    def test_unconfirmed_response_is_sent_again(self):
+        # Fetched before, but extractor or dispatcher did not confirm it
+        cache = cache_with(pending_hash=hashlib.sha256(BODY).hexdigest())
+        self.assertFalse(cache.is_unchanged("PO1", response()))
+
+    def test_changed_response_is_sent(self):
+        cache = confirmed(content=b'{"status": "open"}')
+        self.assertFalse(cache.is_unchanged("PO1", response()))
+
+    def test_confirmed_response_is_sent_again_after_resend_window(self):
+        cache = confirmed(hours_ago=25)
+        self.assertFalse(cache.is_unchanged("PO1", response()))
+
+    def test_conditional_headers_only_for_confirmed_response(self):
+        self.assertEqual(confirmed(etag='"v1"').conditional_headers("PO1"), {"If-None-Match": '"v1"'})
+        self.assertEqual(
+            confirmed(etag='"v2"', pending_hash="other").conditional_headers("PO1"),
+            {}
+        )
+
+    def test_not_modified_response_is_unchanged(self):
+        cache = confirmed(etag='"v1"')
+        self.assertTrue(cache.is_unchanged("PO1", response(status_code=304, content=b"")))
+
+
+if __name__ == '__main__':
+    unittest.main()
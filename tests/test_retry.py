@@ -0,0 +1,47 @@
+"""
+Tests of the retry policy of vendor requests, POST is retried only when the
+vendor config lists it in idempotent_methods.
+"""
+from op_fetcher.common.helpers.retry import RetryPolicy
+from requests import exceptions as request_exceptions
+import unittest
+
+
+class FailingSend:
+    """Send raising a connection error on every attempt"""
+
+    def __init__(self) -> None:
+        self.attempts = 0
+
+    def __call__(self, attempt: int) -> None:
+        self.attempts += 1
+        raise request_exceptions.ConnectionError("connection reset")
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def policy(self, **config) -> RetryPolicy:
+        config.setdefault("backoff_base_seconds", 0)
+        return RetryPolicy(config)
+
+    def test_post_is_not_retried_by_default(self):
+        send = FailingSend()
+        with self.assertRaises(request_exceptions.ConnectionError):
+            self.policy().call(send, "POST")
+        self.assertEqual(send.attempts, 1)
+
+    def test_get_is_retried_by_default(self):
+        send = FailingSend()
+        with self.assertRaises(request_exceptions.ConnectionError):
+            self.policy(max_attempts=3).call(send, "GET")
+        self.assertEqual(send.attempts, 3)
+
+    def test_post_is_retried_when_vendor_opts_in(self):
+        send = FailingSend()
+        with self.assertRaises(request_exceptions.ConnectionError):
+            self.policy(max_attempts=3, idempotent_methods=["GET", "POST"]).call(send, "post")
+        self.assertEqual(send.attempts, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Tests of xml_flattener against flattening the output of xml_to_json_parser,
+which it replaced, on the recorded xml vendor responses under
+fixtures/vendor_responses. Keys, values and their order must be identical.
+"""
+from op_fetcher.common.helpers import json_flattener, xml_to_json_parser
+from op_fetcher.common.helpers.xml_flattener import xml_flattener
+from op_fetcher.common.helpers.template_helpers import compile_config_template
+from op_fetcher.order_processing.fetcher.xml_vendor_fetcher import XMLVendorOrderFetcher
+from flatten_dict import flatten
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+import unittest
+import glob
+import os
+
+
+VENDOR_RESPONSES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "vendor_responses")
+
+# Shapes of xml which xmltodict turns into something else than nested elements
+EDGE_DOCUMENTS = [
+    '<Order><Lines/></Order>',
+    '<Order/>',
+    '<Order id="7"><Line>1</Line><Line>2</Line><Line/></Order>',
+    '<Order><Line n="1">A</Line><Line n="2"/></Order>',
+    '<Order>text<Line>1</Line>tail</Order>',
+    '<Order xmlns:s="urn:s"><s:Line>1</s:Line></Order>',
+    '<Order><Lines><Line><Serial>1</Serial><Serial>2</Serial></Line><Line/></Lines></Order>',
+]
+
+
+def recorded_xml_responses() -> List[Tuple[str, str]]:
+    responses = []
+    for path in sorted(glob.glob(os.path.join(VENDOR_RESPONSES_DIR, "*_xml", "*.xml"))):
+        with open(path) as response_file:
+            responses.append((os.path.relpath(path, VENDOR_RESPONSES_DIR), response_file.read()))
+    return responses
+
+
+def flatten_parsed(text: str) -> Dict:
+    return json_flattener(xml_to_json_parser(SimpleNamespace(text=text)))
+
+
+class TestXmlFlattener(unittest.TestCase):
+
+    def test_recorded_responses_flatten_same_as_parsed_responses(self):
+        responses = recorded_xml_responses()
+        self.assertTrue(responses)
+
+        for name, text in responses:
+            with self.subTest(response=name):
+                self.assertEqual(list(xml_flattener(text).items()), list(flatten_parsed(text).items()))
+
+    def test_edge_documents_flatten_same_as_parsed_responses(self):
+        for text in EDGE_DOCUMENTS:
+            with self.subTest(document=text):
+                self.assertEqual(list(xml_flattener(text).items()), list(flatten_parsed(text).items()))
+
+    def test_prefixes_keep_only_keys_under_them(self):
+        for name, text in recorded_xml_responses():
+            root = next(iter(xml_to_json_parser(SimpleNamespace(text=text))))
+            children = {key.split(".")[1] for key in flatten_parsed(text)}
+            for child in children:
+                prefix = "%s.%s" % (root, child)
+                with self.subTest(response=name, prefix=prefix):
+                    expected = [
+                        (key, value) for key, value in flatten_parsed(text).items()
+                        if key == prefix or key.startswith(prefix + ".")
+                    ]
+                    self.assertEqual(list(xml_flattener(text, [prefix]).items()), expected)
+
+
+def has_response_body(check_response_body: str, record: Dict) -> bool:
+    fetcher = SimpleNamespace(
+        compiled_template=compile_config_template({"check_response_body": check_response_body}),
+        xml_flatten={}
+    )
+    return XMLVendorOrderFetcher.has_response_body(fetcher, record, {})
+
+
+def legacy_has_response_body(check_response_body: str, text: str) -> bool:
+    """check_response_body as it was checked on the parsed response"""
+    flat_json = flatten(
+        xml_to_json_parser(SimpleNamespace(text=text)),
+        reducer="dot",
+        max_flatten_depth=len(check_response_body.split("."))
+    )
+    return flat_json.get(check_response_body) is not None
+
+
+class TestHasResponseBodyOfFlatRecord(unittest.TestCase):
+
+    def test_empty_child_element_keeps_record(self):
+        self.assertTrue(has_response_body("Order", xml_flattener('<Order><Lines/></Order>')))
+        self.assertFalse(has_response_body("Order", xml_flattener('<Order/>')))
+        self.assertFalse(has_response_body("Order.Lines", xml_flattener('<Order><Lines/></Order>')))
+
+    def test_same_as_check_of_parsed_response(self):
+        documents = EDGE_DOCUMENTS + [text for _, text in recorded_xml_responses()]
+        for text in documents:
+            record = xml_flattener(text)
+            paths = {".".join(key.split(".")[:depth]) for key in record for depth in range(1, 4)}
+            for path in sorted(paths | {"Missing", "Order.Missing"}):
+                # Paths through repeated elements were never found in the parsed response
+                if any(part.isdigit() for part in path.split(".")):
+                    continue
+                with self.subTest(document=text[:60], check_response_body=path):
+                    self.assertEqual(has_response_body(path, record), legacy_has_response_body(path, text))
+
+
+if __name__ == '__main__':
+    unittest.main()